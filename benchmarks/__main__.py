@@ -0,0 +1,75 @@
+"""
+Run the client scenarios against a local fake close.io server and print
+the results as JSON, to compare runs and track regressions.
+
+Run with ``python -m benchmarks``, see ``--help`` for the options.
+"""
+import argparse
+import json
+import platform
+import sys
+
+from closeio import codec
+
+from .scenarios import SCENARIOS
+from .server import FakeCloseIO
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__)
+    parser.add_argument('scenarios', nargs='*', metavar='scenario',
+                        help='scenarios to run, all by default: {}'.format(
+                            ', '.join(SCENARIOS)))
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help='seconds the server delays every response')
+    parser.add_argument('--leads', type=int, default=1000, help='leads the server has')
+    parser.add_argument('--events', type=int, default=2000, help='event logs the server has')
+    parser.add_argument('--page-size', type=int, default=100,
+                        help='_limit of cursor paginated requests')
+    parser.add_argument('--rate-limit', type=int, default=None,
+                        help='requests per --rate-window and endpoint group')
+    parser.add_argument('--rate-window', type=float, default=1.0)
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs per scenario, the fastest is reported')
+    parser.add_argument('--output', type=argparse.FileType('w'), default=sys.stdout,
+                        help='file to write the results to')
+
+    args = parser.parse_args(argv)
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error('unknown scenario {}'.format(name))
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = {
+        'latency': args.latency,
+        'leads': args.leads,
+        'events': args.events,
+        'page_size': args.page_size,
+        'rate_limit': args.rate_limit,
+        'rate_window': args.rate_window,
+        'repeat': args.repeat,
+    }
+
+    results = []
+    with FakeCloseIO(leads=args.leads, latency=args.latency, events=args.events,
+                     page_size=args.page_size, rate_limit=args.rate_limit,
+                     rate_window=args.rate_window) as server:
+        for name in args.scenarios or SCENARIOS:
+            results.extend(SCENARIOS[name](server, args.repeat))
+
+    json.dump({
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'json_backend': codec.BACKEND,
+        'config': config,
+        'results': results,
+    }, args.output, indent=2)
+    args.output.write('\n')
+
+
+if __name__ == '__main__':
+    main()
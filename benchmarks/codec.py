@@ -0,0 +1,40 @@
+"""
+Compare decoding close.io payloads with the standard library ``json``
+and the ``closeio.codec`` backend.
+
+Run with ``python -m benchmarks.codec``.
+"""
+import json
+
+from closeio import codec
+
+from .payloads import make_event_page, make_lead_page, make_webhook
+from .utils import best_of, report
+
+
+def main():
+    payloads = {
+        'a page of 100 leads': make_lead_page(100),
+        'a page of 100 event log entries': make_event_page(100),
+        'a webhook': make_webhook(),
+    }
+
+    for name, payload in payloads.items():
+        body = json.dumps(payload).encode('utf-8')
+        assert codec.loads(body) == json.loads(body)
+
+        # webhooks are small, decode many of them per measurement
+        number = 1000 if name == 'a webhook' else 10
+        json_seconds = best_of(lambda: json.loads(body), number=number)
+        codec_seconds = best_of(lambda: codec.loads(body), number=number)
+
+        report('decode {} ({} KB)'.format(name, len(body) // 1024), {
+            'json': json_seconds,
+            'codec ({})'.format(codec.BACKEND): codec_seconds,
+        }, baseline='json')
+        print('  {:<30} {:>10.1f} MB/s'.format(
+            'codec throughput', len(body) / codec_seconds / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+"""
+Compare sequential and concurrent offset pagination of ``get_leads``.
+
+Run with ``python -m benchmarks.paginate``.
+"""
+from closeio import CloseIO
+
+from .server import FakeCloseIO
+from .utils import best_of, report
+
+
+def main(leads=2000, latency=0.05):
+    with FakeCloseIO(leads=leads, latency=latency) as server:
+        results = {}
+        for window in (1, 2, 4, 8):
+            client = CloseIO('key', base_url=server.url, page_window=window)
+            assert len(list(client.get_leads())) == leads
+            results['page_window={}'.format(window)] = best_of(
+                lambda: list(client.get_leads()), repeat=3)
+
+    report('get_leads() of {} leads, {:.0f} ms latency'.format(leads, latency * 1000),
+           results, baseline='page_window=1')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Compare ``closeio.utils.parse`` with the former dateutil based parser.
+
+Run with ``python -m benchmarks.parse``.
+"""
+import types
+
+import dateutil.parser
+from six import string_types
+
+from closeio.utils import Item, parse
+
+from .payloads import make_lead_page
+from .utils import best_of, report
+
+
+def dateutil_parse(value):  # NoQA
+    """The parser as it was before the ISO-8601 fast path."""
+    try:
+        return Item({
+            key: dateutil_parse(value)
+            for key, value in value.items()
+        })
+    except AttributeError:
+        pass
+
+    if isinstance(value, types.GeneratorType):
+        return (
+            dateutil_parse(item)
+            for item in value
+        )
+
+    if not isinstance(value, string_types):
+        try:
+            return [
+                dateutil_parse(item)
+                for item in value
+            ]
+        except TypeError:
+            pass
+
+    try:
+        parsed = dateutil.parser.parse(value)
+
+        if parsed.isoformat() == value:
+            return parsed
+
+        if parsed.date().isoformat() == value:
+            return parsed.date()
+        if parsed.time().isoformat() == value:
+            return parsed.time()
+
+    except (TypeError, AttributeError, ValueError, OverflowError):
+        pass
+
+    return value
+
+
+def main():
+    page = make_lead_page(100)
+    assert parse(page) == dateutil_parse(page)
+
+    report('parse a page of 100 leads', {
+        'dateutil': best_of(lambda: dateutil_parse(page)),
+        'iso-8601 fast path': best_of(lambda: parse(page)),
+    }, baseline='dateutil')
+
+    def read_two_fields(lazy):
+        for lead in parse(page, lazy=lazy)['data']:
+            lead['display_name'], lead['date_updated']
+
+    report('parse a page of 100 leads and read two fields', {
+        'eager': best_of(lambda: read_two_fields(lazy=False)),
+        'lazy': best_of(lambda: read_two_fields(lazy=True)),
+    }, baseline='eager')
+
+
+if __name__ == '__main__':
+    main()
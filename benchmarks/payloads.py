@@ -0,0 +1,165 @@
+"""Realistic close.io response payloads for the benchmarks."""
+import datetime
+import random
+import string
+
+BASE_DATE = datetime.datetime(2018, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _id(prefix, rnd):
+    return '{}_{}'.format(prefix, ''.join(
+        rnd.choice(string.ascii_letters + string.digits)
+        for _ in range(43)
+    ))
+
+
+def _date(rnd):
+    return (BASE_DATE + datetime.timedelta(seconds=rnd.randrange(10 ** 8))).isoformat()
+
+
+def make_contact(rnd, organization_id, user_id):
+    name = ' '.join(rnd.choice(['Bruce', 'Gob', 'Lucille', 'Tobias', 'Wayne', 'Bluth'])
+                    for _ in range(2))
+    email = '{}@example.com'.format(name.lower().replace(' ', '.'))
+
+    return {
+        'id': _id('cont', rnd),
+        'name': name,
+        'title': rnd.choice(['CEO', 'Sr. Vice President', 'The Dark Knight', '']),
+        'organization_id': organization_id,
+        'created_by': user_id,
+        'updated_by': user_id,
+        'date_created': _date(rnd),
+        'date_updated': _date(rnd),
+        'emails': [{'type': 'office', 'email': email, 'email_lower': email}],
+        'phones': [{
+            'type': 'office',
+            'phone': '+4930{}'.format(rnd.randrange(10 ** 7, 10 ** 8)),
+            'phone_formatted': '+49 30 {}'.format(rnd.randrange(10 ** 7, 10 ** 8)),
+        }],
+    }
+
+
+def make_lead(seed=0, contacts=3, opportunities=1, tasks=2):
+    rnd = random.Random(seed)
+    organization_id = _id('orga', rnd)
+    user_id = _id('user', rnd)
+    lead_id = _id('lead', rnd)
+    name = '{} {}'.format(rnd.choice(['Wayne', 'Bluth', 'Stark']),
+                          rnd.choice(['Enterprises', 'Company', 'Industries']))
+
+    return {
+        'id': lead_id,
+        'name': name,
+        'display_name': name,
+        'description': 'Best. Show. Ever. ' * rnd.randrange(1, 5),
+        'url': 'http://example.com/{}'.format(seed),
+        'html_url': 'https://app.close.io/lead/{}/'.format(lead_id),
+        'status_id': _id('stat', rnd),
+        'status_label': rnd.choice(['Potential', 'Qualified', 'Customer']),
+        'organization_id': organization_id,
+        'created_by': user_id,
+        'updated_by': user_id,
+        'date_created': _date(rnd),
+        'date_updated': _date(rnd),
+        'addresses': [{
+            'label': 'business',
+            'address_1': '747 Howard St',
+            'address_2': 'Room {}'.format(seed),
+            'city': 'San Francisco',
+            'state': 'CA',
+            'zipcode': '94103',
+            'country': 'US',
+        }],
+        'custom': {
+            'Source': 'Website contact form',
+            'Transportation': 'Segway',
+            'Contract date': _date(rnd)[:10],
+            'Revenue': rnd.randrange(10 ** 6),
+        },
+        'contacts': [
+            make_contact(rnd, organization_id, user_id)
+            for _ in range(contacts)
+        ],
+        'opportunities': [{
+            'id': _id('oppo', rnd),
+            'lead_id': lead_id,
+            'lead_name': name,
+            'status_id': _id('stat', rnd),
+            'status_label': 'Active',
+            'status_type': 'active',
+            'confidence': rnd.randrange(100),
+            'value': rnd.randrange(10 ** 6),
+            'value_period': 'one_time',
+            'note': 'Needs new software for the Bat Cave.',
+            'user_id': user_id,
+            'user_name': 'P F',
+            'organization_id': organization_id,
+            'date_won': None,
+            'date_created': _date(rnd),
+            'date_updated': _date(rnd),
+        } for _ in range(opportunities)],
+        'tasks': [{
+            'id': _id('task', rnd),
+            'lead_id': lead_id,
+            'assigned_to': user_id,
+            'text': 'Call back',
+            'due_date': _date(rnd)[:10],
+            'is_complete': False,
+            'date_created': _date(rnd),
+            'date_updated': _date(rnd),
+        } for _ in range(tasks)],
+    }
+
+
+def make_leads(count):
+    return [make_lead(seed) for seed in range(count)]
+
+
+def make_lead_page(count, skip=0, has_more=False):
+    return {
+        'has_more': has_more,
+        'total_results': skip + count,
+        'data': [make_lead(skip + seed) for seed in range(count)],
+    }
+
+
+def make_event(seed=0):
+    rnd = random.Random(seed)
+    lead = make_lead(seed, contacts=1, opportunities=0, tasks=0)
+    action = rnd.choice(['created', 'updated', 'deleted'])
+
+    return {
+        'id': _id('ev', rnd),
+        'date_created': _date(rnd),
+        'date_updated': _date(rnd),
+        'organization_id': lead['organization_id'],
+        'user_id': lead['created_by'],
+        'request_id': _id('req', rnd),
+        'api_key_id': None,
+        'object_type': 'lead',
+        'object_id': lead['id'],
+        'lead_id': lead['id'],
+        'action': action,
+        'changed_fields': ['date_updated', 'status_id', 'status_label'],
+        'meta': {'request_path': '/api/v1/lead/{}/'.format(lead['id']),
+                 'request_method': 'PUT'},
+        'data': lead if action != 'deleted' else None,
+        'previous_data': {'status_label': 'Potential', 'date_updated': _date(rnd)},
+    }
+
+
+def make_event_page(count, skip=0, cursor_next=''):
+    return {
+        'cursor_next': cursor_next,
+        'data': [make_event(skip + seed) for seed in range(count)],
+    }
+
+
+def make_webhook(seed=0):
+    event = make_event(seed)
+    return {
+        'subscription_id': 'whsub_{}'.format(seed),
+        'event': event,
+        'event_id': event['id'],
+    }
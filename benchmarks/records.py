@@ -0,0 +1,46 @@
+"""
+Compare the memory used by ``Item`` and ``closeio.records`` objects.
+
+Run with ``python -m benchmarks.records``.
+"""
+import gc
+import tracemalloc
+
+from closeio import records
+from closeio.utils import parse
+
+from .payloads import make_leads
+
+
+def allocated(func):
+    """Return the result of ``func`` and the bytes it still holds."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, size
+
+
+def main(count=10000):
+    raw = make_leads(count)
+
+    results = {}
+    for label, record in [('Item', None), ('records.Lead', records.Lead)]:
+        leads, size = allocated(lambda: parse(raw, record=record))
+        results[label] = size
+        del leads
+
+    print('memory held by {} parsed leads'.format(count))
+    reference = results['Item']
+    for label, size in results.items():
+        print('  {:<30} {:>10.1f} MiB {:>8.0f} B/lead  {:>6.2f}x'.format(
+            label, size / 2 ** 20, size / count, reference / size,
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+Client scenarios run against :class:`~benchmarks.server.FakeCloseIO`.
+
+Every scenario takes the running server and the number of repetitions
+and returns a list of result dicts, one per variant, see :func:`measure`.
+"""
+import time
+
+from closeio import CloseIO
+
+from .payloads import make_lead
+
+try:
+    import django
+    from django.conf import settings
+except ImportError:
+    django = None
+
+
+def measure(server, scenario, params, func, repeat):
+    """
+    Run ``func`` ``repeat`` times and return the result of the fastest run.
+
+    ``func`` returns the number of items it processed. The result has the
+    ``scenario`` name, its ``params``, the wall time in ``seconds``, the
+    ``items`` and their throughput and the ``requests`` the server got,
+    ``throttled`` ones included.
+    """
+    best = None
+    for _ in range(repeat):
+        server.reset()
+        started = time.perf_counter()
+        items = func()
+        seconds = time.perf_counter() - started
+
+        if best is None or seconds < best['seconds']:
+            best = {
+                'scenario': scenario,
+                'params': params,
+                'seconds': seconds,
+                'items': items,
+                'items_per_second': items / seconds if seconds else None,
+                'requests': server.requests,
+                'throttled': server.throttled,
+            }
+    return best
+
+
+def _client(server, **kwargs):
+    return CloseIO('bench', base_url=server.url, **kwargs)
+
+
+def get_leads(server, repeat, page_windows=(1, 4)):
+    """Offset pagination of all leads, sequential and concurrent."""
+    results = []
+    for window in page_windows:
+        client = _client(server, page_window=window)
+        results.append(measure(
+            server, 'get_leads', {'page_window': window},
+            lambda: sum(1 for _ in client.get_leads()), repeat))
+    return results
+
+
+def get_event_logs(server, repeat, read_aheads=(0, 2)):
+    """Cursor pagination of all event logs, with and without read ahead."""
+    results = []
+    for pages in read_aheads:
+        client = _client(server, read_ahead=pages)
+        results.append(measure(
+            server, 'get_event_logs', {'read_ahead': pages, '_limit': server.page_size},
+            lambda: sum(1 for _ in client.get_event_logs(_limit=server.page_size)), repeat))
+    return results
+
+
+def bulk_update_leads(server, repeat, concurrencies=(1, 8), leads=200):
+    """Update ``leads`` leads, one request each."""
+    lead_ids = server.lead_ids[:leads]
+
+    def run(client, concurrency):
+        updates = ((lead_id, {'status_label': 'Customer'}) for lead_id in lead_ids)
+        results = list(client.bulk_update_leads(updates, concurrency=concurrency))
+        failed = [result for result in results if result.error is not None]
+        if failed:
+            raise failed[0].error
+        return len(results)
+
+    results = []
+    for concurrency in concurrencies:
+        client = _client(server, pool_maxsize=max(10, concurrency))
+        results.append(measure(
+            server, 'bulk_update_leads', {'concurrency': concurrency},
+            lambda: run(client, concurrency), repeat))
+    return results
+
+
+def webhook_ingestion(server, repeat, webhooks=1000):
+    """
+    Verify and dispatch ``webhooks`` signed lead updates with the Django
+    view, skipped if Django is not installed.
+    """
+    if django is None:
+        return [{'scenario': 'webhook_ingestion', 'skipped': 'django is not installed'}]
+
+    if not settings.configured:
+        settings.configure(
+            CLOSEIO_WEBHOOK_SIGNATURE_KEYS='{}', ALLOWED_HOSTS=['*'], DEBUG=False)
+        django.setup()
+    settings.CLOSEIO_WEBHOOK_SIGNATURE_KEYS = '{{"whsub_bench": "{}"}}'.format(
+        server.signature_key)
+
+    from django.test import RequestFactory
+
+    from closeio.contrib.django.utils import webhook_signature_valid
+    from closeio.contrib.django.views import CloseIOWebHook
+
+    view = CloseIOWebHook.as_view()
+    factory = RequestFactory()
+    signed = [
+        server.sign_webhook({
+            'subscription_id': 'whsub_bench',
+            'event': 'update',
+            'model': 'lead',
+            'data': make_lead(seed, contacts=1, tasks=0),
+        })
+        for seed in range(webhooks)
+    ]
+
+    def run():
+        for body, headers in signed:
+            request = factory.post(
+                '/closeio/', data=body, content_type='application/json', **headers)
+            if not webhook_signature_valid(request) or view(request).status_code != 200:
+                raise AssertionError('webhook was not accepted')
+        return len(signed)
+
+    return [measure(server, 'webhook_ingestion', {'webhooks': webhooks}, run, repeat)]
+
+
+SCENARIOS = {
+    'get_leads': get_leads,
+    'get_event_logs': get_event_logs,
+    'bulk_update_leads': bulk_update_leads,
+    'webhook_ingestion': webhook_ingestion,
+}
@@ -0,0 +1,30 @@
+"""
+Compare encoding request bodies with ``convert`` plus ``json.dumps``
+against the single pass ``closeio.codec.dumps``.
+
+Run with ``python -m benchmarks.serialize``.
+"""
+import json
+
+from closeio import codec
+from closeio.codec import dumps
+from closeio.utils import convert, parse
+
+from .payloads import make_lead
+from .utils import best_of, report
+
+
+def main():
+    # create_lead payload with a large contact list, dates as datetime objects
+    lead = parse(make_lead(contacts=500))
+    assert json.loads(dumps(lead)) == json.loads(json.dumps(convert(lead)))
+
+    report('encode a lead with 500 contacts', {
+        'convert + json.dumps': best_of(lambda: json.dumps(convert(lead)), repeat=20),
+        'single pass dumps': best_of(lambda: codec._json_dumps(lead), repeat=20),
+        'codec.dumps ({})'.format(codec.BACKEND): best_of(lambda: dumps(lead), repeat=20),
+    }, baseline='convert + json.dumps')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+"""A local fake close.io HTTP server for the benchmarks."""
+import hashlib
+import hmac
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from closeio import codec
+from closeio.contrib.testing_stub import CloseIOStub
+from closeio.exceptions import CloseIOError
+from closeio.ratelimit import endpoint_group
+
+from .payloads import make_event, make_lead
+
+
+class SharedCloseIOStub(CloseIOStub):
+    """
+    :class:`~closeio.contrib.testing_stub.CloseIOStub` keeping its data on
+    the instance instead of the current thread, so that all request
+    threads of the server see the same leads and event logs.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._storage = {}
+        self._lock = threading.Lock()
+        super(SharedCloseIOStub, self).__init__(*args, **kwargs)
+
+    def _clear(self):
+        self._storage = {}
+
+    def _data(self, attr, default=None):
+        if default is None:
+            default = []
+        return self._storage.setdefault(attr, default)
+
+
+class RateLimit(object):
+    """Allow ``limit`` requests per ``window`` seconds and endpoint group."""
+
+    def __init__(self, limit, window=1.0):
+        self.limit = limit
+        self.window = window
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, group):
+        """Return ``(remaining, reset)``, ``remaining`` is None if throttled."""
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated = self._buckets.get(group, (self.limit, now))
+            tokens = min(self.limit, tokens + (now - updated) * self.limit / self.window)
+
+            if tokens < 1:
+                self._buckets[group] = (tokens, now)
+                return None, (1 - tokens) * self.window / self.limit
+
+            tokens -= 1
+            self._buckets[group] = (tokens, now)
+            return int(tokens), (self.limit - tokens) * self.window / self.limit
+
+
+class FakeCloseIO(object):
+    """
+    Serve ``leads`` generated leads and ``events`` event logs from a
+    :class:`SharedCloseIOStub`, at the routes :class:`~closeio.CloseIO`
+    uses for them:
+
+    * ``GET lead/`` paginated with ``_skip`` and ``_limit``
+    * ``POST lead/``, ``GET lead/{id}/`` and ``PUT lead/{id}/``
+    * ``GET event/`` paginated with ``_cursor`` and ``_limit``, filtered
+      like :meth:`~closeio.contrib.testing_stub.CloseIOStub.get_event_logs`
+
+    Every request is delayed by ``latency`` seconds to simulate the
+    round trip to close.io. Use as a context manager::
+
+        with FakeCloseIO(leads=1000) as server:
+            client = CloseIO('key', base_url=server.url)
+
+    :param page_size: largest ``_limit`` honoured by ``event/``
+    :param rate_limit: requests allowed per ``rate_window`` seconds and
+        endpoint group, answered with ``429`` beyond that like close.io
+        does. None disables rate limiting.
+    """
+
+    signature_key = '00' * 32
+
+    def __init__(self, leads=1000, latency=0.05, events=0, page_size=100, rate_limit=None,
+                 rate_window=1.0):
+        self.latency = latency
+        self.page_size = page_size
+        self.rate_limit = RateLimit(rate_limit, rate_window) if rate_limit else None
+
+        self.stub = SharedCloseIOStub()
+        for seed in range(leads):
+            self.stub.create_lead(make_lead(seed, contacts=1, tasks=0))
+        self.stub._data('event_logs', []).extend(make_event(seed) for seed in range(events))
+
+        self._counter_lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Reset the request counters."""
+        with self._counter_lock:
+            self.requests = 0
+            self.throttled = 0
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return 'http://{}:{}/api/v1/'.format(host, port)
+
+    @property
+    def lead_ids(self):
+        return list(self.stub._data('leads', {}))
+
+    def sign_webhook(self, payload):
+        """Return the body and headers close.io would send ``payload`` with."""
+        body = codec.dumps(payload)
+        timestamp = str(int(time.time()))
+        signature = hmac.new(
+            bytes.fromhex(self.signature_key), timestamp.encode('utf-8') + body, hashlib.sha256)
+        return body, {
+            'HTTP_CLOSE_SIG_HASH': signature.hexdigest(),
+            'HTTP_CLOSE_SIG_TIMESTAMP': timestamp,
+        }
+
+    def handle(self, method, path, query, body):
+        if not path.startswith('/api/v1/'):
+            return 404, {'error': 'Not found'}
+        segments = path[len('/api/v1/'):].strip('/').split('/')
+
+        try:
+            if segments == ['lead']:
+                if method == 'GET':
+                    return 200, self._get_leads(query)
+                if method == 'POST':
+                    return 200, self.stub.create_lead(body)
+
+            if segments[0] == 'lead' and len(segments) == 2:
+                if method == 'GET':
+                    return 200, self.stub.get_lead(segments[1])
+                if method == 'PUT':
+                    with self.stub._lock:
+                        return 200, self.stub.update_lead(segments[1], body)
+
+            if segments == ['event'] and method == 'GET':
+                return 200, self._get_event_logs(query)
+
+        except CloseIOError:
+            return 404, {'error': 'Not found'}
+
+        return 404, {'error': 'Not found'}
+
+    def _get_leads(self, query):
+        skip = int(query.pop('_skip', 0))
+        limit = int(query.pop('_limit', 100))
+
+        if 'query' in query:
+            leads = list(self.stub.get_leads(query['query']))
+        else:
+            leads = list(self.stub._data('leads', {}).values())
+
+        return {
+            'has_more': skip + limit < len(leads),
+            'total_results': len(leads),
+            'data': leads[skip:skip + limit],
+        }
+
+    def _get_event_logs(self, query):
+        skip = int(query.pop('_cursor', None) or 0)
+        limit = min(int(query.pop('_limit', 50)), self.page_size)
+
+        if query:
+            logs = self.stub.get_event_logs(**query)
+        else:
+            logs = self.stub._data('event_logs', [])
+
+        more = skip + limit < len(logs)
+        return {
+            'cursor_next': str(skip + limit) if more else '',
+            'data': logs[skip:skip + limit],
+        }
+
+    def _throttle(self, path):
+        """
+        Return the ``(status, body)`` of a throttled request or None, and
+        the rate limit headers of the response.
+        """
+        if self.rate_limit is None:
+            return None, {}
+
+        remaining, reset = self.rate_limit.take(endpoint_group(path))
+        headers = {'RateLimit': 'limit={}, remaining={}, reset={:.3f}'.format(
+            self.rate_limit.limit, remaining or 0, reset)}
+        if remaining is not None:
+            return None, headers
+
+        with self._counter_lock:
+            self.throttled += 1
+        return (429, {'error': {
+            'message': 'API call count exceeded for this period',
+            'rate_reset': reset,
+            'rate_limit': self.rate_limit.limit,
+            'rate_window': self.rate_limit.window,
+            'rate_limit_type': 'key',
+        }}), headers
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def _respond(self, method):
+                with server._counter_lock:
+                    server.requests += 1
+                time.sleep(server.latency)
+
+                url = urlparse(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+
+                throttled, headers = server._throttle(url.path)
+                if throttled:
+                    status, data = throttled
+                else:
+                    query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                    status, data = server.handle(method, url.path, query, body)
+                data = codec.dumps(data)
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._respond('GET')
+
+            def do_POST(self):
+                self._respond('POST')
+
+            def do_PUT(self):
+                self._respond('PUT')
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
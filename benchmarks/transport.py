@@ -0,0 +1,72 @@
+"""
+Compare the per-call overhead of slumber resources with
+``closeio.transport.Endpoint``.
+
+Requests are answered in process by a canned ``requests`` adapter, so
+only the client side work is measured: URL building, encoding, the
+``requests`` round trip and decoding.
+
+Run with ``python -m benchmarks.transport``.
+"""
+import json
+
+import requests
+import slumber
+from requests.adapters import BaseAdapter
+
+from closeio.transport import Endpoint
+
+from .payloads import make_lead
+from .utils import best_of, report
+
+BASE_URL = 'https://app.close.io/api/v1/'
+
+
+class CannedAdapter(BaseAdapter):
+    def __init__(self, body):
+        super(CannedAdapter, self).__init__()
+        self.body = body
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Type'] = 'application/json'
+        response._content = self.body
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+def main(calls=1000):
+    session = requests.Session()
+    session.auth = ('key', '')
+    session.mount('https://', CannedAdapter(json.dumps(make_lead()).encode('utf-8')))
+
+    slumber_api = slumber.API(BASE_URL, session=session)
+    endpoint = Endpoint(session, BASE_URL)
+    assert slumber_api.lead('lead_1').get() == endpoint.lead('lead_1').get()
+
+    def get(api):
+        for _ in range(calls):
+            api.lead('lead_1').get()
+
+    def put(api):
+        for _ in range(calls):
+            api.lead('lead_1').put({'name': 'Wayne Enterprises'})
+
+    report('{} x lead(id).get()'.format(calls), {
+        'slumber': best_of(lambda: get(slumber_api)),
+        'endpoint': best_of(lambda: get(endpoint)),
+    }, baseline='slumber')
+
+    report('{} x lead(id).put(fields)'.format(calls), {
+        'slumber': best_of(lambda: put(slumber_api)),
+        'endpoint': best_of(lambda: put(endpoint)),
+    }, baseline='slumber')
+
+
+if __name__ == '__main__':
+    main()
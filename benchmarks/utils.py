@@ -0,0 +1,18 @@
+import timeit
+
+
+def best_of(func, number=1, repeat=5):
+    """Return the best wall time of ``func`` in seconds per call."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def report(title, results, baseline=None):
+    """Print ``{label: seconds}`` results, relative to ``baseline``."""
+    print(title)
+
+    reference = results[baseline] if baseline else None
+    for label, seconds in results.items():
+        line = '  {:<30} {:>10.3f} ms'.format(label, seconds * 1000)
+        if reference:
+            line += '  {:>6.2f}x'.format(reference / seconds)
+        print(line)
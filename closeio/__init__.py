@@ -5,4 +5,9 @@ try:
 except ImportError:
     pass
 
+try:
+    from .aio import AsyncCloseIO  # noqa
+except ImportError:
+    pass
+
 warnings.warn('Important: faster_closeio is no longer maintained. Please use the official close.io library instead: https://pypi.org/project/closeio/', DeprecationWarning)
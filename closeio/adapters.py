@@ -0,0 +1,245 @@
+import logging
+import threading
+from time import monotonic
+
+from requests.adapters import HTTPAdapter
+from requests.exceptions import (
+    ConnectionError as RequestsConnectionError, ConnectTimeout
+)
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError
+
+from closeio import codec, instrumentation
+from closeio.ratelimit import endpoint_group
+
+logger = logging.getLogger(__name__)
+
+
+class CloseIOAdapter(HTTPAdapter):
+    """
+    ``requests`` transport adapter used by :class:`~closeio.CloseIO`.
+
+    If a :class:`~closeio.ratelimit.RateLimiter` is given, requests are
+    paced per endpoint group, limits are learned from every response and
+    429 responses are retried after the advertised reset for up to
+    ``rate_limit_deadline`` seconds before they are returned.
+
+    If a :class:`~closeio.retry.RetryPolicy` is given, responses with a
+    retryable status and connection errors are retried with backoff.
+
+    If a :class:`~closeio.httpcache.HTTPCache` is given, cacheable GET
+    requests are sent as conditional requests and ``304`` responses are
+    answered from the cache. Responses backed by a cache entry get a
+    ``cache_entry`` attribute of ``(key, entry)``.
+
+    Every request, including its retries, is reported to the
+    :mod:`closeio.instrumentation` listeners.
+
+    The connection pool is sized with the ``HTTPAdapter`` arguments
+    ``pool_connections``, ``pool_maxsize`` and ``pool_block``, its usage
+    is reported by :attr:`pool_stats`.
+    """
+
+    def __init__(self, rate_limiter=None, rate_limit_deadline=60, retry_policy=None,
+                 http_cache=None, **kwargs):
+        self.rate_limiter = rate_limiter
+        self.rate_limit_deadline = rate_limit_deadline
+        self.retry_policy = retry_policy
+        self.http_cache = http_cache
+        self._pool_lock = threading.Lock()
+        self._requests = 0
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._saturated = 0
+        self._local = threading.local()
+        super(CloseIOAdapter, self).__init__(**kwargs)
+
+    @property
+    def pool_stats(self):
+        """
+        Connection pool usage.
+
+        ``requests`` sent, requests ``in_flight`` now and at their
+        ``peak``, ``saturated`` requests that found ``pool_maxsize``
+        requests in flight (they wait with ``pool_block``, otherwise they
+        use a connection that is closed afterwards), ``connections_opened``
+        and ``idle_connections`` over all ``pools`` (one per host).
+        """
+        opened = idle = 0
+        pools = self.poolmanager.pools
+        keys = pools.keys()
+        for key in keys:
+            try:
+                pool = pools[key]
+            except KeyError:
+                continue
+            opened += pool.num_connections
+            idle += pool.pool.qsize() if pool.pool is not None else 0
+
+        with self._pool_lock:
+            return {
+                'requests': self._requests,
+                'in_flight': self._in_flight,
+                'peak': self._peak_in_flight,
+                'saturated': self._saturated,
+                'pool_maxsize': self._pool_maxsize,
+                'pools': len(keys),
+                'connections_opened': opened,
+                'idle_connections': idle,
+            }
+
+    def _send_pooled(self, request, **kwargs):
+        self._local.attempts = getattr(self._local, 'attempts', 0) + 1
+        with self._pool_lock:
+            self._requests += 1
+            if self._in_flight >= self._pool_maxsize:
+                self._saturated += 1
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+
+        try:
+            return super(CloseIOAdapter, self).send(request, **kwargs)
+        finally:
+            with self._pool_lock:
+                self._in_flight -= 1
+
+    def send(self, request, **kwargs):
+        if not instrumentation.listeners:
+            return self._send_cached(request, **kwargs)
+        return self._send_instrumented(request, **kwargs)
+
+    def _send_instrumented(self, request, **kwargs):
+        method, page = instrumentation.context()
+        body = request.body
+        self._local.attempts = 0
+        started = monotonic()
+        response = error = None
+
+        try:
+            response = self._send_cached(request, **kwargs)
+            received = response.headers.get('Content-Length')
+            if received is not None:
+                received = int(received)
+            elif not kwargs.get('stream'):
+                received = len(response.content)
+            return response
+        except Exception as e:
+            error = e
+            received = None
+            raise
+        finally:
+            instrumentation.notify(instrumentation.RequestEvent(
+                method=method,
+                http_method=request.method,
+                endpoint=instrumentation.endpoint(request.url),
+                url=request.url,
+                status=response.status_code if response is not None else None,
+                bytes_sent=len(body) if body else 0,
+                bytes_received=received,
+                seconds=monotonic() - started,
+                retries=max(0, self._local.attempts - 1),
+                page=page,
+                error=error,
+            ))
+
+    def _send_cached(self, request, **kwargs):
+        cache = self.http_cache
+        key = cache.key(request) if cache is not None and not kwargs.get('stream') else None
+        if key is None:
+            return self._send_retrying(request, **kwargs)
+
+        entry = cache.backend.get(key)
+        if entry is not None:
+            request = request.copy()
+            if entry.etag:
+                request.headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                request.headers['If-Modified-Since'] = entry.last_modified
+
+        response = self._send_retrying(request, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            response.status_code = 200
+            response.reason = 'OK'
+            response._content = entry.content
+            response.headers.setdefault('Content-Type', 'application/json')
+        else:
+            entry = cache.entry(response)
+            if entry is not None:
+                cache.backend.set(key, entry)
+            elif response.status_code in (200, 404, 410):
+                cache.backend.delete(key)
+
+        if entry is not None:
+            response.cache_entry = (key, entry)
+        return response
+
+    def _send_retrying(self, request, **kwargs):
+        policy = self.retry_policy
+        if policy is None:
+            return self._send_rate_limited(request, **kwargs)
+
+        retries = 0
+        waited = 0.0
+
+        while True:
+            try:
+                response = self._send_rate_limited(request, **kwargs)
+            except RequestsConnectionError as e:
+                if not policy.can_retry(request.method, retries, connect=_is_connect_error(e)):
+                    policy.record(retries, waited, failed=True)
+                    raise
+                headers = None
+            else:
+                if not policy.should_retry_status(request.method, response.status_code, retries):
+                    policy.record(retries, waited, failed=response.status_code in policy.statuses)
+                    return response
+                headers = response.headers
+                response.close()
+
+            retries += 1
+            logger.info('retrying %s %s (retry %d)', request.method, request.url, retries)
+            waited += policy.wait(retries, headers)
+
+    def _send_rate_limited(self, request, **kwargs):
+        if self.rate_limiter is None:
+            return self._send_pooled(request, **kwargs)
+
+        group = endpoint_group(request.url)
+        deadline = monotonic() + (self.rate_limit_deadline or 0)
+
+        while True:
+            self.rate_limiter.acquire(group, deadline)
+            response = self._send_pooled(request, **kwargs)
+
+            error = None
+            if response.status_code == 429:
+                try:
+                    error = codec.loads(response.content)['error']
+                except (ValueError, KeyError, TypeError):
+                    error = {}
+                if not isinstance(error, dict):
+                    error = {}
+
+            self.rate_limiter.learn(group, response.headers, error)
+
+            if error is None:
+                return response
+
+            retry_in = self.rate_limiter.retry_after(group)
+            if monotonic() + retry_in > deadline:
+                return response
+
+            logger.info('close.io rate limit hit for %s, retrying in %.2fs', group, retry_in)
+            response.close()
+
+
+def _is_connect_error(error):
+    """Whether the ``requests`` ``error`` happened before the request was sent."""
+    if isinstance(error, ConnectTimeout):
+        return True
+
+    reason = error.args[0] if error.args else None
+    if isinstance(reason, MaxRetryError):
+        reason = reason.reason
+    # NewConnectionError is a ConnectTimeoutError
+    return isinstance(reason, ConnectTimeoutError)
@@ -0,0 +1,769 @@
+"""
+asyncio client for the close.io API.
+
+:class:`AsyncCloseIO` has the API methods of :class:`~closeio.CloseIO`,
+but they are coroutines and paginated methods return async iterators::
+
+    async with AsyncCloseIO(api_key) as client:
+        lead = await client.get_lead(lead_id)
+
+        async for lead in client.get_leads(query='name:Wayne'):
+            ...
+
+It covers the API methods but not the client side features of
+:class:`~closeio.CloseIO`, which has to be used for them:
+
+* no membership, user and catalog caches, ``find_*`` methods and
+  :meth:`~closeio.CloseIO.get_organization_user` request the API every
+  time, and there is no ``get_lead_status``, ``get_opportunity_status``
+  or ``invalidate_*``
+* no ``bulk_update_leads``, ``stream_lead_export``,
+  ``custom_field_cardinality`` or ``top_custom_field_values``
+* :meth:`get_organization_users` requests the users one after the other
+* no HTTP cache, ``page_window``, ``read_ahead``, connection pool options
+  or ``pool_stats``
+
+Requires ``aiohttp``.
+"""
+import asyncio
+import inspect
+import logging
+from base64 import b64encode
+from functools import wraps
+from time import monotonic
+
+import aiohttp
+
+from closeio import codec, instrumentation
+from closeio.closeio import CloseIO
+from closeio.exceptions import CloseIOError
+from closeio.ratelimit import RateLimiter, endpoint_group
+from closeio.records import RECORD_TYPES
+from closeio.retry import RetryPolicy
+from closeio.utils import (
+    MAX_CURSOR_LIMIT, convert, convert_errors, custom_field_values, parse,
+    response_error
+)
+
+logger = logging.getLogger(__name__)
+
+
+def parse_async_response(func):
+    """Async counterpart of :func:`closeio.utils.parse_response`."""
+    if inspect.isasyncgenfunction(func):
+        @wraps(func)
+        async def wrapped(self, *args, **kwargs):
+            record = self._record_types.get(func.__name__)
+            iterator = func(self, *args, **kwargs)
+            if instrumentation.listeners:
+                iterator = instrumentation.iterate_async(func.__name__, iterator)
+            with convert_errors():
+                async for item in iterator:
+                    yield parse(item, lazy=self._lazy, record=record)
+
+    else:
+        @wraps(func)
+        async def wrapped(self, *args, **kwargs):
+            with convert_errors():
+                response = await instrumentation.call_async(
+                    func.__name__, func, self, *args, **kwargs)
+            return parse(
+                response,
+                lazy=self._lazy,
+                record=self._record_types.get(func.__name__),
+            )
+
+    return wrapped
+
+
+class AsyncCloseIO(object):
+    base_url = CloseIO.base_url
+
+    def __init__(self, api_key, lazy=False, records=False, rate_limit_deadline=60,
+                 retry_policy=None, base_url=None, session=None):
+        """
+        asyncio close.io API client, without the caches, bulk updates,
+        export streaming and sketches of :class:`~closeio.CloseIO`, see
+        :mod:`closeio.aio`.
+
+        :param api_key: close.io API key
+        :param lazy: see :class:`~closeio.CloseIO`
+        :param records: see :class:`~closeio.CloseIO`
+        :param rate_limit_deadline: see :class:`~closeio.CloseIO`
+        :param retry_policy: see :class:`~closeio.CloseIO`
+        :param base_url: API root, defaults to :attr:`base_url`
+        :param session: ``aiohttp.ClientSession`` to use, one is created
+            on first use otherwise
+        """
+        self._api_key = api_key
+        self._lazy = lazy
+        self._record_types = RECORD_TYPES if records else {}
+        self._rate_limit_deadline = rate_limit_deadline
+        self._rate_limiter = (
+            RateLimiter.for_api_key(api_key)
+            if rate_limit_deadline is not None else None
+        )
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self._session = session
+        self._own_session = session is None
+        if base_url:
+            self.base_url = base_url
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self._own_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self):
+        if self._session is None:
+            credentials = '{}:'.format(self._api_key).encode('utf-8')
+            self._session = aiohttp.ClientSession(
+                headers={'Authorization': 'Basic ' + b64encode(credentials).decode('ascii')},
+                cookie_jar=aiohttp.DummyCookieJar(),
+            )
+        return self._session
+
+    async def _request(self, method, path, params=None, data=None, page=None):
+        """
+        Send a request, paced by the rate limiter and retried with the
+        retry policy, and return the decoded response.
+
+        Like the requests of :class:`~closeio.CloseIO`, it is reported to
+        the :mod:`closeio.instrumentation` listeners once it completes.
+
+        :param page: index of the page for paginated methods
+        """
+        url = self.base_url + path
+        headers = {'accept': 'application/json'}
+        body = None
+
+        if params:
+            params = {
+                key: value
+                for key, value in params.items()
+                if value is not None
+            }
+
+        if data is not None:
+            body = codec.dumps(data)
+            headers['content-type'] = 'application/json'
+
+        policy = self.retry_policy
+        limiter = self._rate_limiter
+        group = endpoint_group(url)
+        deadline = monotonic() + (self._rate_limit_deadline or 0)
+        retries = 0
+        waited = 0.0
+        # every attempt, including rate limit retries, for the listeners
+        attempts = 0
+        started = monotonic()
+
+        while True:
+            if limiter is not None:
+                wait = min(limiter.reserve(group), max(0.0, deadline - monotonic()))
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+            attempts += 1
+            try:
+                async with self._get_session().request(
+                        method, url, params=params, data=body, headers=headers) as response:
+                    content = await response.text()
+            except aiohttp.ClientConnectionError as e:
+                connect = isinstance(e, aiohttp.ClientConnectorError)
+                if not policy.can_retry(method, retries, connect=connect):
+                    policy.record(retries, waited, failed=True)
+                    if instrumentation.listeners:
+                        self._notify(method, url, page, body, started, attempts, error=e)
+                    raise
+                retries += 1
+                waited += await self._backoff(retries)
+                continue
+
+            if policy.should_retry_status(method, response.status, retries):
+                retries += 1
+                waited += await self._backoff(retries, response.headers)
+                continue
+
+            if limiter is None:
+                break
+
+            error = None
+            if response.status == 429:
+                try:
+                    error = codec.loads(content)['error']
+                except (ValueError, KeyError, TypeError):
+                    pass
+                if not isinstance(error, dict):
+                    error = {}
+
+            limiter.learn(group, response.headers, error)
+
+            if error is None or monotonic() + limiter.retry_after(group) > deadline:
+                break
+
+            logger.info('close.io rate limit hit for %s, retrying', group)
+
+        policy.record(retries, waited, failed=response.status in policy.statuses)
+        if instrumentation.listeners:
+            self._notify(method, url, page, body, started, attempts, response, content)
+
+        if response.status >= 400:
+            error = aiohttp.ClientResponseError(
+                response.request_info,
+                response.history,
+                status=response.status,
+                message=response.reason,
+                headers=response.headers,
+            )
+            request_data = 'url: {}\nbody: {}'.format(response.url, body)
+            raise response_error(response.status, content, request_data, error)
+
+        if method == 'DELETE':
+            return True
+
+        if not content:
+            return None
+
+        return codec.loads(content)
+
+    def _notify(self, http_method, url, page, body, started, attempts, response=None,
+                content=None, error=None):
+        received = None
+        if response is not None:
+            url = str(response.url)
+            received = response.content_length
+            if received is None:
+                received = len(content.encode('utf-8'))
+
+        instrumentation.notify(instrumentation.RequestEvent(
+            method=instrumentation.context()[0],
+            http_method=http_method,
+            endpoint=instrumentation.endpoint(url),
+            url=url,
+            status=response.status if response is not None else None,
+            bytes_sent=len(body) if body else 0,
+            bytes_received=received,
+            seconds=monotonic() - started,
+            retries=attempts - 1,
+            page=page,
+            error=error,
+        ))
+
+    async def _backoff(self, retry, headers=None):
+        delay = self.retry_policy.delay(retry, headers)
+        logger.info('retrying close.io request (retry %d) in %.2fs', retry, delay)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def _get(self, path, **params):
+        return self._request('GET', path, params=params)
+
+    def _post(self, path, data):
+        return self._request('POST', path, data=data)
+
+    def _put(self, path, data):
+        return self._request('PUT', path, data=data)
+
+    def _delete(self, path):
+        return self._request('DELETE', path)
+
+    @staticmethod
+    def _check_page(response):
+        if not isinstance(response, dict):
+            raise CloseIOError(
+                'close.io response is not a dict, '
+                'so most likely could not be parsed. \n'
+                'body "{}"'.format(response)
+            )
+        return response
+
+    async def _paginate(self, path, **params):
+        skip = 0
+        limit = 100
+
+        while True:
+            params['_skip'] = skip
+            params['_limit'] = limit
+
+            response = self._check_page(
+                await self._request('GET', path, params=params, page=skip // limit))
+
+            for item in response['data']:
+                yield item
+
+            if not response['has_more']:
+                break
+
+            skip += limit
+
+    async def _paginate_via_cursor(self, path, **params):
+        cursor = ''
+        limit = params.pop('_limit', 50)
+
+        if not 0 < limit <= MAX_CURSOR_LIMIT:
+            raise CloseIOError(
+                '_limit must be between 1 and {}'.format(MAX_CURSOR_LIMIT))
+
+        page = 0
+        while True:
+            params['_cursor'] = cursor
+            params['_limit'] = limit
+
+            response = self._check_page(
+                await self._request('GET', path, params=params, page=page))
+            page += 1
+
+            for item in response['data']:
+                yield item
+
+            cursor = response['cursor_next']
+            if not cursor:
+                break
+
+    # undocumented, hidden API - use with care
+    @parse_async_response
+    async def api_key(self):
+        return await self._get('api_key/')
+
+    @parse_async_response
+    async def me(self):
+        return await self._get('me/')
+
+    @parse_async_response
+    async def get_lead(self, lead_id):
+        return await self._get('lead/{}/'.format(lead_id))
+
+    @parse_async_response
+    async def get_contact(self, contact_id):
+        return await self._get('contact/{}/'.format(contact_id))
+
+    @parse_async_response
+    async def delete_lead(self, lead_id):
+        return await self._delete('lead/{}/'.format(lead_id))
+
+    @parse_async_response
+    async def delete_email_template(self, template_id):
+        return await self._delete('email_template/{}/'.format(template_id))
+
+    @parse_async_response
+    async def create_email_template(self, fields):
+        return await self._post('email_template/', fields)
+
+    @parse_async_response
+    async def get_email_templates(self):
+        async for template in self._paginate('email_template/'):
+            yield template
+
+    @parse_async_response
+    async def get_email_template(self, template_id):
+        return await self._get('email_template/{}/'.format(template_id))
+
+    @parse_async_response
+    async def find_email_template(self, name):
+        async for template in self.get_email_templates():
+            if template.name == name:
+                return template
+
+        raise CloseIOError(
+            "EMail template with nane \"{}\" could not be found!".format(name))
+
+    @parse_async_response
+    async def get_opportunity_statuss(self):
+        async for status in self._paginate('status/opportunity/'):
+            yield status
+
+    @parse_async_response
+    async def find_opportunity_status(self, label):
+        async for status in self.get_opportunity_statuss():
+            if status.label == label:
+                return status
+
+        raise CloseIOError(
+            "Opportunity-Status with label \"{}\" "
+            "could not be found!".format(label))
+
+    @parse_async_response
+    async def find_opportunity_status_in_organization(self, organization_id, label):
+        org = await self.get_organization(organization_id)
+
+        for status in org['opportunity_statuses']:
+            if status['label'] == label:
+                return status
+
+        raise CloseIOError(
+            "Opportunity-Status with label \"{}\" "
+            "could not be found!".format(label))
+
+    @parse_async_response
+    async def get_lead_statuss(self):
+        async for status in self._paginate('status/lead/'):
+            yield status
+
+    @parse_async_response
+    async def find_lead_status(self, label):
+        async for status in self.get_lead_statuss():
+            if status.label == label:
+                return status
+
+        raise CloseIOError(
+            "Lead-Status with label \"" + label + "\" could not be found!")
+
+    @parse_async_response
+    async def find_user(self, full_name):
+        me = await self._get('me/')
+        for membership in me['memberships']:
+            org_id = membership['organization_id']
+
+            org = await self._get('organization/{}/'.format(org_id))
+
+            for user in org['memberships']:
+                if user['user_full_name'] == full_name:
+                    return await self.get_organization_user(org_id, user['user_id'])
+
+        raise CloseIOError(
+            "User with full-name \"" + full_name + "\" could not be found!")
+
+    @parse_async_response
+    async def find_user_id(self, email):
+        ids = set()
+        email = email.strip().lower()
+
+        me = await self._get('me/')
+        for my_membership in me['memberships']:
+            organization_id = my_membership['organization_id']
+            org = await self._get('organization/{}/'.format(organization_id))
+            for membership in org['memberships']:
+                membership_mail = membership['user_email']
+                membership_mail = membership_mail.strip().lower()
+
+                if membership_mail == email:
+                    ids.add(membership['user_id'])
+
+        if not ids:
+            raise CloseIOError("user with email {} not found".format(email))
+
+        elif len(ids) > 1:
+            raise CloseIOError(
+                "multiple users with email {} found".format(email))
+
+        else:
+            return ids.pop()
+
+    @parse_async_response
+    async def update_lead(self, lead_id, fields):
+        return await self._put('lead/{}/'.format(lead_id), fields)
+
+    @parse_async_response
+    async def create_lead(self, fields):
+        return await self._post('lead/', fields)
+
+    @parse_async_response
+    async def create_opportunity(self, fields):
+        return await self._post('opportunity/', fields)
+
+    @parse_async_response
+    async def update_opportunity(self, opportunity_id, fields):
+        return await self._put('opportunity/{}/'.format(opportunity_id), fields)
+
+    @parse_async_response
+    async def create_task(self, lead_id, assigned_to, text, due_date=None,
+                          is_complete=False):
+
+        return await self._post('task/', {
+            "lead_id": lead_id,
+            "assigned_to": assigned_to,
+            "text": text,
+            "due_date": due_date.isoformat() if due_date else None,
+            "is_complete": is_complete
+        })
+
+    @parse_async_response
+    async def update_task(self, task_id, fields):
+        return await self._put('task/{}/'.format(task_id), fields)
+
+    @parse_async_response
+    async def delete_task(self, task_id):
+        return await self._delete('task/{}/'.format(task_id))
+
+    @parse_async_response
+    async def get_tasks(self, **kwargs):
+        kwargs = convert(kwargs)
+        kwargs.update({
+            k: 'true' if v else 'false'
+            for k, v in kwargs.items()
+            if isinstance(v, bool)
+        })
+
+        kwargs.setdefault('_order_by', '-date_created')
+
+        async for task in self._paginate('task/', **kwargs):
+            yield task
+
+    @parse_async_response
+    async def create_opportunity_status(self, label, type_):
+        if type_ not in ('active', 'won', 'lost'):
+            raise CloseIOError("invalid opportunity status type {}".format(type_))
+
+        return await self._post('status/opportunity/', {
+            'label': label,
+            'type': type_,
+        })
+
+    @parse_async_response
+    async def delete_opportunity_status(self, status_id):
+        return await self._delete('status/opportunity/{}/'.format(status_id))
+
+    @parse_async_response
+    async def create_lead_status(self, label):
+        return await self._post('status/lead/', {
+            'label': label,
+        })
+
+    @parse_async_response
+    async def delete_lead_status(self, status_id):
+        return await self._delete('status/lead/{}/'.format(status_id))
+
+    @parse_async_response
+    async def create_activity_note(self, lead_id, note):
+        return await self._post('activity/note/', {
+            'lead_id': lead_id,
+            'note': note,
+        })
+
+    @parse_async_response
+    async def create_activity_email(self, **kwargs):
+        kwargs.setdefault('status', 'draft')
+        return await self._post('activity/email/', kwargs)
+
+    @parse_async_response
+    async def create_activity_call(self, **kwargs):
+        return await self._post('activity/call/', kwargs)
+
+    @parse_async_response
+    async def get_activity_email(self, lead_id):
+        async for activity in self._paginate('activity/email/', lead_id=lead_id):
+            yield activity
+
+    @parse_async_response
+    async def get_activity_call(self, lead_id):
+        async for activity in self._paginate('activity/call/', lead_id=lead_id):
+            yield activity
+
+    @parse_async_response
+    async def get_activity_note(self, lead_id):
+        async for activity in self._paginate('activity/note/', lead_id=lead_id):
+            yield activity
+
+    @parse_async_response
+    async def get_activities(self, **kwargs):
+        fields = kwargs.pop('fields', None)
+        if fields:
+            kwargs['_fields'] = ','.join(fields)
+
+        async for activity in self._paginate('activity/', **kwargs):
+            yield activity
+
+    @parse_async_response
+    async def delete_activity_email(self, activity_id):
+        return await self._delete('activity/email/{}/'.format(activity_id))
+
+    @parse_async_response
+    async def delete_activity_call(self, activity_id):
+        return await self._delete('activity/call/{}/'.format(activity_id))
+
+    @parse_async_response
+    async def delete_activity_note(self, activity_id):
+        return await self._delete('activity/note/{}/'.format(activity_id))
+
+    @parse_async_response
+    async def get_opportunities(self):
+        async for opportunity in self._paginate('opportunity/'):
+            yield opportunity
+
+    @parse_async_response
+    async def delete_opportunity(self, opportunity_id):
+        return await self._delete('opportunity/{}/'.format(opportunity_id))
+
+    @parse_async_response
+    async def get_leads(self, query=None, fields=None):
+        args = {}
+        if query:
+            args['query'] = query
+
+        if fields:
+            args['_fields'] = ','.join(fields)
+
+        async for lead in self._paginate('lead/', **args):
+            yield lead
+
+    @parse_async_response
+    async def get_user(self, user_id):
+        return await self._get('user/{}/'.format(user_id))
+
+    @parse_async_response
+    async def get_organization(self, organization_id):
+        return await self._get('organization/{}/'.format(organization_id))
+
+    @parse_async_response
+    async def get_organization_users(self, organization_id=None):
+        if not organization_id:
+            me = await self._get('me/')
+            for mem in me['memberships']:
+                organization_id = mem['organization_id']
+                break
+
+        users = []
+
+        org = await self._get('organization/{}/'.format(organization_id))
+        for membership in org['memberships']:
+            uid = membership['user_id']
+            user = await self._get('user/{}/'.format(uid))
+
+            user.update({
+                key[5:]: value
+                for key, value in membership.items()
+                if key.startswith('user_')
+            })
+
+            users.append(user)
+
+        return users
+
+    @parse_async_response
+    async def get_organization_user(self, organization_id, user_id):
+        user = await self._get('user/{}/'.format(user_id))
+
+        org = await self._get('organization/{}/'.format(organization_id))
+        for membership in org['memberships']:
+            if membership['user_id'] == user_id:
+                user.update({
+                    key[5:]: value
+                    for key, value in membership.items()
+                    if key.startswith('user_')
+                })
+                break
+
+        else:
+            raise CloseIOError(
+                "User {} not found in "
+                "organization {}".format(user_id, organization_id))
+
+        return user
+
+    @parse_async_response
+    async def get_lead_display_name_by_id(self, lead_id):
+        lead = await self.get_lead(lead_id)
+        if 'display_name' in lead:
+            return lead['display_name']
+        else:
+            return None
+
+    @parse_async_response
+    async def get_lead_display_name(self, query):
+        possible_leads = [
+            lead
+            async for lead in self.get_leads(query=query)
+        ]
+
+        if len(possible_leads) > 0:
+            if len(possible_leads) > 1:
+                logger.warning(
+                    "got {len} possible leads for query {query}. "
+                    "Using the first one. ".format(
+                        len=len(possible_leads),
+                        query=query,
+                    ))
+
+            display_name = possible_leads[0].display_name
+            return display_name
+
+        return ""
+
+    @parse_async_response
+    async def custom_field_values(self, fieldname):
+        leads = self._paginate(
+            'lead/',
+            query='custom.{}:*'.format(fieldname),
+            _fields='custom.{}'.format(fieldname),
+        )
+
+        return {
+            value
+            async for lead in leads
+            for value in custom_field_values(lead, fieldname)
+        }
+
+    @parse_async_response
+    async def user_exists(self, email):
+        try:
+            await self.find_user_id(email)
+            return True
+        except Exception:
+            return False
+
+    @parse_async_response
+    async def create_lead_export(self, query='*', format='json', fields=(),
+                                 include_activities=False, include_smart_fields=False):
+
+        args = dict(
+            format=format,
+            type='leads',
+            query=query,
+        )
+
+        if include_activities:
+            args['include_activities'] = include_activities
+
+        if include_smart_fields:
+            args['include_smart_fields'] = include_smart_fields
+
+        if fields:
+            args['fields'] = list(fields)
+
+        return await self._post('export/lead/', args)
+
+    @parse_async_response
+    async def get_export(self, id):
+        return await self._get('export/{}/'.format(id))
+
+    @parse_async_response
+    async def get_event_logs(self, **kwargs):
+        async for event in self._paginate_via_cursor('event/', **kwargs):
+            yield event
+
+    @parse_async_response
+    async def get_webhooks(self):
+        async for webhook in self._paginate('webhook/'):
+            yield webhook
+
+    @parse_async_response
+    async def get_webhook(self, webhook_id):
+        return await self._get('webhook/{}/'.format(webhook_id))
+
+    @parse_async_response
+    async def create_webhook(self, data):
+        return await self._post('webhook/', data)
+
+    @parse_async_response
+    async def update_webhook(self, webhook_id, data):
+        """
+        Update a webhook status.
+
+        :param webhook_id:
+        :param data (dict): { status: active or paused }
+        :return:
+        """
+        status = convert(data)
+        return await self._put('webhook/{}/'.format(webhook_id), status)
+
+    @parse_async_response
+    async def delete_webhook(self, webhook_id):
+        return await self._delete('webhook/{}/'.format(webhook_id))
@@ -0,0 +1,181 @@
+"""
+Running many close.io API calls concurrently.
+"""
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from time import monotonic
+
+from closeio.exceptions import CloseIOError
+
+#: outcome of one call, ``id`` is its first argument (e.g. the lead id)
+#: and either ``result`` or ``error`` is set
+BulkResult = namedtuple('BulkResult', ['id', 'result', 'error'])
+
+
+def _as_completed(func, calls, concurrency):
+    """
+    Call ``func(*args)`` for every ``args`` in ``calls`` on a thread pool,
+    yield ``(args, future)`` in completion order.
+    """
+    if concurrency < 1:
+        raise CloseIOError('concurrency must be at least 1, got {}'.format(concurrency))
+
+    calls = iter(calls)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    pending = {}
+
+    def submit(count):
+        for args in islice(calls, count):
+            pending[executor.submit(func, *args)] = args
+
+    try:
+        submit(concurrency)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            finished = [(pending.pop(future), future) for future in done]
+            submit(len(finished))
+
+            for args, future in finished:
+                yield args, future
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def bulk(func, calls, concurrency=8):
+    """
+    Call ``func(*args)`` for every ``args`` tuple in ``calls`` on a pool
+    of ``concurrency`` threads.
+
+    Yields a :class:`BulkResult` per call as calls complete, so results
+    are not in input order. A :class:`CloseIOError` raised by a call is
+    returned as its ``error``, other exceptions are raised. ``calls`` is
+    consumed lazily, at most ``concurrency`` calls are in flight and
+    closing the generator cancels calls that have not started yet.
+    """
+    for args, future in _as_completed(func, calls, concurrency):
+        error = future.exception()
+        if error is None:
+            yield BulkResult(args[0], future.result(), None)
+        elif isinstance(error, CloseIOError):
+            yield BulkResult(args[0], None, error)
+        else:
+            raise error
+
+
+class Operation(namedtuple('Operation', ['method', 'args', 'kwargs'])):
+    """
+    One call of a :class:`~closeio.CloseIO` method, e.g.
+    ``Operation('create_activity_call', kwargs={'lead_id': ...})``.
+    """
+    __slots__ = ()
+
+    def __new__(cls, method, args=(), kwargs=None):
+        return super(Operation, cls).__new__(cls, method, tuple(args), kwargs or {})
+
+
+#: outcome of an :class:`Operation`, ``index`` is its position in the input
+BatchResult = namedtuple('BatchResult', ['index', 'operation', 'result', 'error'])
+
+
+class BatchExecutor(object):
+    """
+    Run a stream of :class:`Operation` concurrently against a client.
+
+    Meant for one-request-per-object endpoints such as ``create_task``,
+    ``create_activity_note``, ``create_activity_call`` and their
+    ``delete_*`` counterparts::
+
+        executor = BatchExecutor(client, concurrency=8)
+        calls = (Operation('create_activity_call', kwargs=call) for call in calls)
+        for result in executor.run(calls):
+            ...
+        executor.stats
+
+    :param client: :class:`~closeio.CloseIO` instance
+    :param concurrency: maximum number of operations in flight
+    :param fail_fast: raise the first :class:`CloseIOError` and cancel the
+        remaining operations, instead of returning errors in the results
+    """
+
+    def __init__(self, client, concurrency=8, fail_fast=False):
+        self.client = client
+        self.concurrency = concurrency
+        self.fail_fast = fail_fast
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._succeeded = 0
+        self._failed = 0
+        self._started = None
+        self._finished = None
+
+    def _method(self, operation):
+        name = operation.method
+        method = getattr(self.client, name, None) if not name.startswith('_') else None
+        if not callable(method):
+            raise CloseIOError('{!r} is not a client method'.format(name))
+        return method
+
+    def _execute(self, index, operation):
+        # an unknown method fails its operation only, like an API error
+        method = self._method(operation)
+        return method(*operation.args, **operation.kwargs)
+
+    def _calls(self, operations):
+        for index, operation in enumerate(operations):
+            if not isinstance(operation, Operation):
+                operation = Operation(*operation)
+            yield index, operation
+
+    def run(self, operations):
+        """
+        Execute ``operations``, an iterable of :class:`Operation` or
+        ``(method, args, kwargs)`` tuples that is consumed lazily.
+
+        Yields a :class:`BatchResult` per operation in completion order.
+        """
+        self._reset_stats()
+        self._started = monotonic()
+        # create the session before the worker threads need it
+        self.client._api
+
+        try:
+            for (index, operation), future in _as_completed(
+                    self._execute, self._calls(operations), self.concurrency):
+                error = future.exception()
+
+                if error is None:
+                    self._succeeded += 1
+                    yield BatchResult(index, operation, future.result(), None)
+                    continue
+
+                self._failed += 1
+                if self.fail_fast or not isinstance(error, CloseIOError):
+                    raise error
+                yield BatchResult(index, operation, None, error)
+        finally:
+            self._finished = monotonic()
+
+    @property
+    def stats(self):
+        """
+        Counters of the last :meth:`run`: ``succeeded`` and ``failed``
+        operations, ``seconds`` elapsed and ``throughput`` in completed
+        operations per second.
+        """
+        if self._started is None:
+            seconds = 0.0
+        else:
+            seconds = (self._finished or monotonic()) - self._started
+
+        completed = self._succeeded + self._failed
+        return {
+            'succeeded': self._succeeded,
+            'failed': self._failed,
+            'seconds': seconds,
+            'throughput': completed / seconds if seconds else 0.0,
+        }
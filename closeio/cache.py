@@ -0,0 +1,137 @@
+"""
+In-process caches for slowly changing close.io data.
+"""
+import threading
+from time import monotonic
+
+
+class CachedValue(object):
+    """
+    Value returned by ``load()``, cached for ``ttl`` seconds.
+
+    Refreshes are single-flight: when the value expires one thread calls
+    ``load`` while concurrent callers wait for its result instead of
+    loading it again. A value loaded while :meth:`invalidate` was called
+    is returned to the thread that loaded it, but not cached.
+    """
+
+    def __init__(self, load, ttl):
+        self._load = load
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entry = None
+        self._generation = 0
+
+    def _fresh(self, entry):
+        return entry is not None and monotonic() < entry[1]
+
+    def get(self):
+        entry = self._entry
+        if self._fresh(entry):
+            return entry[0]
+
+        with self._lock:
+            entry = self._entry
+            if self._fresh(entry):
+                return entry[0]
+
+            generation = self._generation
+            value = self._load()
+            if generation == self._generation:
+                self._entry = (value, monotonic() + self.ttl)
+            return value
+
+    def invalidate(self):
+        # not under the lock, which is held while loading
+        self._generation += 1
+        self._entry = None
+
+
+class MembershipIndex(object):
+    """
+    Users of all organizations the API key has access to.
+
+    :attr:`by_email` maps lowercase emails to user ids, :attr:`by_name`
+    full names to ``(organization_id, user_id)`` pairs, both in the order
+    close.io returns them. :attr:`memberships` maps those pairs to the
+    organization membership.
+
+    :param organizations: iterable of ``(organization_id, organization)``
+    """
+
+    def __init__(self, organizations):
+        self.by_email = {}
+        self.by_name = {}
+        self.memberships = {}
+
+        for organization_id, organization in organizations:
+            for membership in organization['memberships']:
+                user_id = membership['user_id']
+                key = (organization_id, user_id)
+                self.memberships[key] = membership
+
+                email = membership['user_email'].strip().lower()
+                ids = self.by_email.setdefault(email, [])
+                if user_id not in ids:
+                    ids.append(user_id)
+
+                self.by_name.setdefault(membership['user_full_name'], []).append(key)
+
+    def user_ids(self, email):
+        return self.by_email.get(email.strip().lower(), [])
+
+    def find_name(self, full_name):
+        """Return the first ``(organization_id, user_id)`` with ``full_name``."""
+        keys = self.by_name.get(full_name)
+        return keys[0] if keys else None
+
+
+class TTLCache(object):
+    """
+    :class:`CachedValue` per key, e.g. ``cache.get(user_id, fetch_user)``.
+
+    Each key is refreshed single-flight and independently of the others.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def get(self, key, load):
+        """Return the cached value of ``key``, calling ``load(key)`` if needed."""
+        with self._lock:
+            value = self._values.get(key)
+            if value is None:
+                value = self._values[key] = CachedValue(lambda: load(key), self.ttl)
+
+        return value.get()
+
+    def invalidate(self, key=None):
+        """Drop ``key``, or everything if no key is given."""
+        with self._lock:
+            if key is None:
+                values = list(self._values.values())
+                self._values.clear()
+            else:
+                values = [self._values.pop(key, None)]
+
+        # callers may still hold them while loading
+        for value in values:
+            if value is not None:
+                value.invalidate()
+
+
+class Catalog(object):
+    """
+    Objects indexed by ``id`` and by their ``key`` field, e.g. statuses by
+    label. If several objects share a ``key`` the first one wins.
+    """
+
+    def __init__(self, items, key):
+        self.by_id = {}
+        self.by_key = {}
+
+        for item in items:
+            self.by_id[item['id']] = item
+            self.by_key.setdefault(item.get(key), item)
@@ -1,42 +1,218 @@
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
-import slumber
-from requests.adapters import HTTPAdapter
 
+from closeio import codec, instrumentation
+from closeio.adapters import CloseIOAdapter
+from closeio.bulk import bulk
+from closeio.cache import CachedValue, Catalog, MembershipIndex, TTLCache
 from closeio.exceptions import CloseIOError
+from closeio.export import iter_gunzipped, iter_json_values, wait_for_export
+from closeio.ratelimit import RateLimiter
+from closeio.records import RECORD_TYPES
+from closeio.retry import RetryPolicy
+from closeio.sketches import HyperLogLog, SpaceSaving
+from closeio.transport import Endpoint
 from closeio.utils import (
-    DummyCookieJar, convert, handle_errors, paginate, paginate_via_cursor,
-    parse_response
+    DummyCookieJar, Parsed, convert, convert_errors, custom_field_values,
+    handle_errors, paginate, paginate_concurrently, paginate_via_cursor,
+    paginate_via_cursor_read_ahead, parse, parse_response
 )
 
 logger = logging.getLogger(__name__)
 
 
 class CloseIO(object):
-    def __init__(self, api_key, max_retries=5):
+    base_url = 'https://app.close.io/api/v1/'
+
+    # pool settings and manager of clients created with ``shared_session``,
+    # by API key and URL
+    _shared_pools = {}
+    _shared_pools_lock = threading.Lock()
+
+    def __init__(self, api_key, max_retries=None, lazy=False, records=False,
+                 page_window=1, read_ahead=0, rate_limit_deadline=60, retry_policy=None,
+                 membership_ttl=300, user_ttl=60, catalog_ttl=300, http_cache=None,
+                 base_url=None, pool_connections=10, pool_maxsize=10, pool_block=False,
+                 shared_session=False):
+        """
+        Close.io API client.
+
+        :param api_key: close.io API key
+        :param max_retries: retries per request of the default
+            ``retry_policy``, ignored if one is given
+        :param lazy: return :class:`~closeio.utils.LazyItem` objects that
+            only parse the fields that are actually accessed
+        :param records: return the compact types from :mod:`closeio.records`
+            for leads, contacts, opportunities, tasks and activities
+        :param page_window: number of pages offset paginated methods keep
+            in flight concurrently
+        :param read_ahead: number of pages cursor paginated methods fetch
+            ahead on a background thread
+        :param rate_limit_deadline: seconds a request may wait for the
+            rate limit before a :class:`~closeio.exceptions.RateLimitError`
+            is raised, ``None`` disables client side rate limiting. Clients
+            using the same API key share their rate limits.
+        :param retry_policy: :class:`~closeio.retry.RetryPolicy` for 5xx
+            responses and connection errors, defaults to retrying GET and
+            DELETE requests. Its counters are available as
+            ``client.retry_policy.stats``.
+        :param membership_ttl: seconds the organization memberships used by
+            :meth:`find_user`, :meth:`find_user_id` and :meth:`user_exists`
+            are cached, see :meth:`invalidate_memberships`
+        :param user_ttl: seconds users fetched by :meth:`find_user`,
+            :meth:`get_organization_user` and :meth:`get_organization_users`
+            are cached
+        :param catalog_ttl: seconds lead statuses, opportunity statuses and
+            email templates are cached for the ``find_*`` lookups, creating
+            or deleting them with this client invalidates the cache, see
+            also :meth:`invalidate_catalogs`
+        :param http_cache: :class:`~closeio.httpcache.HTTPCache` used for
+            conditional GET requests, e.g. ``HTTPCache(SQLiteBackend(path))``
+            to share cached responses between processes
+        :param base_url: API root, defaults to :attr:`base_url`
+        :param pool_connections: number of hosts connection pools are kept for
+        :param pool_maxsize: connections kept open per host, should be at
+            least the number of threads using the client concurrently
+        :param pool_block: wait for a free connection when ``pool_maxsize``
+            connections are in use, instead of opening a connection that is
+            closed after the request
+        :param shared_session: use one connection pool for all clients with
+            this option and the same API key and ``base_url``. Only the
+            connections are shared, retry policy, HTTP cache and the
+            :attr:`pool_stats` counters stay the client's own. The pool
+            arguments must be the same for all of these clients, a
+            :class:`~closeio.exceptions.CloseIOError` is raised otherwise.
+        """
         self._api_key = api_key
         self._api_cache = None
-        self._max_retries = max_retries
+        self._api_lock = threading.Lock()
+        self._adapter = None
+        self._pool_connections = pool_connections
+        self._pool_maxsize = pool_maxsize
+        self._pool_block = pool_block
+        self._shared_session = shared_session
+        self._lazy = lazy
+        self._record_types = RECORD_TYPES if records else {}
+        self._page_window = page_window
+        self._read_ahead = read_ahead
+        self._rate_limit_deadline = rate_limit_deadline
+        self._rate_limiter = (
+            RateLimiter.for_api_key(api_key)
+            if rate_limit_deadline is not None else None
+        )
+        if retry_policy is None:
+            retry_policy = RetryPolicy() if max_retries is None else RetryPolicy(total=max_retries)
+        self.retry_policy = retry_policy
+        self._memberships = CachedValue(self._load_memberships, membership_ttl)
+        self._users = TTLCache(user_ttl)
+        self._http_cache = http_cache
+        self._lead_statuses = CachedValue(
+            lambda: Catalog(self._paginate(self._api.status.lead.get), 'label'), catalog_ttl)
+        self._opportunity_statuses = CachedValue(
+            lambda: Catalog(self._paginate(self._api.status.opportunity.get), 'label'),
+            catalog_ttl)
+        self._email_templates = CachedValue(
+            lambda: Catalog(self._paginate(self._api.email_template.get), 'name'), catalog_ttl)
+        if base_url:
+            self.base_url = base_url
+
+        if shared_session:
+            settings = (pool_connections, pool_maxsize, pool_block)
+            with CloseIO._shared_pools_lock:
+                shared = CloseIO._shared_pools.setdefault(
+                    (api_key, self.base_url), [settings, None])
+            if shared[0] != settings:
+                raise CloseIOError(
+                    'shared_session clients need the same pool settings, '
+                    'got {} and {}'.format(settings, shared[0]))
 
     @property
     def _api(self):
-        if self._api_cache:
-            return self._api_cache
+        api = self._api_cache
+        if api is not None:
+            return api
+
+        with self._api_lock:
+            if self._api_cache is not None:
+                return self._api_cache
+
+            _session = self._create_session()
+            self._adapter = _session.get_adapter(self.base_url)
+
+            if self._shared_session:
+                with CloseIO._shared_pools_lock:
+                    shared = CloseIO._shared_pools[self._api_key, self.base_url]
+                    if shared[1] is None:
+                        shared[1] = self._adapter.poolmanager
+                    self._adapter.poolmanager = shared[1]
+
+            self._api_cache = Endpoint(_session, self.base_url)
+
+        return self._api_cache
 
+    def _create_session(self):
         _session = requests.Session()
         _session.cookies = DummyCookieJar()
         _session.auth = (self._api_key, "")
         _session.verify = True
-        _session.mount('http://', HTTPAdapter(max_retries=self._max_retries))
-        _session.mount('https://', HTTPAdapter(max_retries=self._max_retries))
-
-        self._api_cache = slumber.API(
-            'https://app.close.io/api/v1/',
-            session=_session
+        adapter = CloseIOAdapter(
+            rate_limiter=self._rate_limiter,
+            rate_limit_deadline=self._rate_limit_deadline,
+            retry_policy=self.retry_policy,
+            http_cache=self._http_cache,
+            # retries are the retry policy's only, so they are all counted
+            max_retries=0,
+            pool_connections=self._pool_connections,
+            pool_maxsize=self._pool_maxsize,
+            pool_block=self._pool_block,
         )
+        _session.mount('http://', adapter)
+        _session.mount('https://', adapter)
+        return _session
 
-        return self._api_cache
+    @property
+    def pool_stats(self):
+        """Connection pool usage, see :attr:`CloseIOAdapter.pool_stats`."""
+        self._api
+        return self._adapter.pool_stats
+
+    def _get_resource(self, resource, method):
+        """
+        GET the :class:`~closeio.transport.Endpoint` ``resource`` for
+        ``method``.
+
+        With an HTTP cache, items parsed from an unchanged body are reused.
+        """
+        if self._http_cache is None or self._lazy:
+            return resource.get()
+
+        response = resource.request('GET')
+        cached = getattr(response, 'cache_entry', None)
+        if cached is None:
+            return resource.decode(response)
+
+        key, entry = cached
+        record = self._record_types.get(method)
+        # clients sharing the cache may parse into different types
+        mode = (record, self._lazy)
+        value = self._http_cache.get_parsed(key, entry, mode)
+        if value is None:
+            value = parse(codec.loads(response.content), record=record)
+            value = self._http_cache.set_parsed(key, entry, value, mode)
+        return Parsed(value)
+
+    def _paginate(self, func, *args, **kwargs):
+        if self._page_window > 1:
+            return paginate_concurrently(func, self._page_window, *args, **kwargs)
+        return paginate(func, *args, **kwargs)
+
+    def _paginate_via_cursor(self, func, *args, **kwargs):
+        if self._read_ahead > 0:
+            return paginate_via_cursor_read_ahead(func, self._read_ahead, *args, **kwargs)
+        return paginate_via_cursor(func, *args, **kwargs)
 
     # undocumented, hidden API - use with care
     @parse_response
@@ -52,7 +228,7 @@ class CloseIO(object):
     @parse_response
     @handle_errors
     def get_lead(self, lead_id):
-        return self._api.lead(lead_id).get()
+        return self._get_resource(self._api.lead(lead_id), 'get_lead')
 
     @parse_response
     @handle_errors
@@ -67,18 +243,21 @@ class CloseIO(object):
     @parse_response
     @handle_errors
     def delete_email_template(self, template_id):
-        return self._api.email_template(template_id).delete()
+        result = self._api.email_template(template_id).delete()
+        self._email_templates.invalidate()
+        return result
 
     @parse_response
     @handle_errors
     def create_email_template(self, fields):
-        fields = convert(fields)
-        return self._api.email_template.post(fields)
+        template = self._api.email_template.post(fields)
+        self._email_templates.invalidate()
+        return template
 
     @parse_response
     @handle_errors
     def get_email_templates(self):
-        return paginate(
+        return self._paginate(
             self._api.email_template.get
         )
 
@@ -90,9 +269,9 @@ class CloseIO(object):
     @parse_response
     @handle_errors
     def find_email_template(self, name):
-        for template in self.get_email_templates():
-            if template.name == name:
-                return template
+        template = self._email_templates.get().by_key.get(name)
+        if template is not None:
+            return template
 
         raise CloseIOError(
             "EMail template with nane \"{}\" could not be found!".format(name))
@@ -100,14 +279,14 @@ class CloseIO(object):
     @parse_response
     @handle_errors
     def get_opportunity_statuss(self):
-        return paginate(self._api.status.opportunity.get)
+        return self._paginate(self._api.status.opportunity.get)
 
     @parse_response
     @handle_errors
     def find_opportunity_status(self, label):
-        for status in self.get_opportunity_statuss():
-            if status.label == label:
-                return status
+        status = self._opportunity_statuses.get().by_key.get(label)
+        if status is not None:
+            return status
 
         raise CloseIOError(
             "Opportunity-Status with label \"{}\" "
@@ -129,50 +308,60 @@ class CloseIO(object):
     @parse_response
     @handle_errors
     def get_lead_statuss(self):
-        return paginate(self._api.status.lead.get)
+        return self._paginate(self._api.status.lead.get)
 
     @parse_response
     @handle_errors
     def find_lead_status(self, label):
-        for status in self.get_lead_statuss():
-            if status.label == label:
-                return status
+        status = self._lead_statuses.get().by_key.get(label)
+        if status is not None:
+            return status
 
         raise CloseIOError(
             "Lead-Status with label \"" + label + "\" could not be found!")
 
     @parse_response
     @handle_errors
-    def find_user(self, full_name):
-        me = self._api.me.get()
-        for membership in me['memberships']:
-            org_id = membership['organization_id']
+    def get_lead_status(self, status_id):
+        status = self._lead_statuses.get().by_id.get(status_id)
+        if status is not None:
+            return status
 
-            org = self._api.organization(org_id).get()
+        raise CloseIOError("Lead-Status {} could not be found!".format(status_id))
 
-            for user in org['memberships']:
-                if user['user_full_name'] == full_name:
-                    return self.get_organization_user(org_id, user['user_id'])
+    @parse_response
+    @handle_errors
+    def get_opportunity_status(self, status_id):
+        status = self._opportunity_statuses.get().by_id.get(status_id)
+        if status is not None:
+            return status
 
-        raise CloseIOError(
-            "User with full-name \"" + full_name + "\" could not be found!")
+        raise CloseIOError("Opportunity-Status {} could not be found!".format(status_id))
+
+    def invalidate_catalogs(self):
+        """Drop the cached lead statuses, opportunity statuses and email templates."""
+        self._lead_statuses.invalidate()
+        self._opportunity_statuses.invalidate()
+        self._email_templates.invalidate()
 
     @parse_response
     @handle_errors
-    def find_user_id(self, email):
-        ids = set()
-        email = email.strip().lower()
+    def find_user(self, full_name):
+        memberships = self._memberships.get()
+        key = memberships.find_name(full_name)
+        if key is None:
+            raise CloseIOError(
+                "User with full-name \"" + full_name + "\" could not be found!")
 
-        me = self._api.me.get()
-        for my_membership in me['memberships']:
-            organization_id = my_membership['organization_id']
-            org = self._api.organization(organization_id).get()
-            for membership in org['memberships']:
-                membership_mail = membership['user_email']
-                membership_mail = membership_mail.strip().lower()
+        organization_id, user_id = key
+        user = self._get_cached_user(user_id)
+        return _merge_membership(user, memberships.memberships[key])
 
-                if membership_mail == email:
-                    ids.add(membership['user_id'])
+    @parse_response
+    @handle_errors
+    def find_user_id(self, email):
+        email = email.strip().lower()
+        ids = self._memberships.get().user_ids(email)
 
         if not ids:
             raise CloseIOError("user with email {} not found".format(email))
@@ -182,30 +371,57 @@ class CloseIO(object):
                 "multiple users with email {} found".format(email))
 
         else:
-            return ids.pop()
+            return ids[0]
+
+    def _load_memberships(self):
+        me = self._api.me.get()
+        return MembershipIndex(
+            (membership['organization_id'],
+             self._api.organization(membership['organization_id']).get())
+            for membership in me['memberships']
+        )
+
+    def invalidate_memberships(self):
+        """Drop the cached organization memberships and users."""
+        self._memberships.invalidate()
+        self._users.invalidate()
 
     @parse_response
     @handle_errors
     def update_lead(self, lead_id, fields):
-        fields = convert(fields)
         return self._api.lead(lead_id).put(fields)
 
+    def bulk_update_leads(self, updates, concurrency=8):
+        """
+        Update many leads concurrently.
+
+        Requests go through the same rate limiter and retry policy as
+        single calls.
+
+        :param updates: iterable of ``(lead_id, fields)``, consumed lazily
+            so it may be a generator
+        :param concurrency: maximum number of updates in flight
+        :return: generator of :class:`~closeio.bulk.BulkResult` with the
+            lead id and either the updated lead or the
+            :class:`~closeio.exceptions.CloseIOError`, in completion order
+        """
+        # create the session before the worker threads need it
+        self._api
+        return bulk(self.update_lead, updates, concurrency)
+
     @parse_response
     @handle_errors
     def create_lead(self, fields):
-        fields = convert(fields)
         return self._api.lead.post(fields)
 
     @parse_response
     @handle_errors
     def create_opportunity(self, fields):
-        fields = convert(fields)
         return self._api.opportunity.post(fields)
 
     @parse_response
     @handle_errors
     def update_opportunity(self, opportunity_id, fields):
-        fields = convert(fields)
         return self._api.opportunity(opportunity_id).put(fields)
 
     @parse_response
@@ -224,7 +440,6 @@ class CloseIO(object):
     @parse_response
     @handle_errors
     def update_task(self, task_id, fields):
-        fields = convert(fields)
         return self._api.task(task_id).put(fields)
 
     @parse_response
@@ -244,7 +459,7 @@ class CloseIO(object):
 
         kwargs.setdefault('_order_by', '-date_created')
 
-        return paginate(
+        return self._paginate(
             self._api.task.get,
             **kwargs
         )
@@ -255,27 +470,35 @@ class CloseIO(object):
         if type_ not in ('active', 'won', 'lost'):
             raise CloseIOError("invalid opportunity status type {}".format(type_))
 
-        return self._api.status.opportunity.post({
+        status = self._api.status.opportunity.post({
             'label': label,
             'type': type_,
         })
+        self._opportunity_statuses.invalidate()
+        return status
 
     @parse_response
     @handle_errors
     def delete_opportunity_status(self, status_id):
-        return self._api.status.opportunity(status_id).delete()
+        result = self._api.status.opportunity(status_id).delete()
+        self._opportunity_statuses.invalidate()
+        return result
 
     @parse_response
     @handle_errors
     def create_lead_status(self, label):
-        return self._api.status.lead.post({
+        status = self._api.status.lead.post({
             'label': label,
         })
+        self._lead_statuses.invalidate()
+        return status
 
     @parse_response
     @handle_errors
     def delete_lead_status(self, status_id):
-        return self._api.status.lead(status_id).delete()
+        result = self._api.status.lead(status_id).delete()
+        self._lead_statuses.invalidate()
+        return result
 
     @parse_response
     @handle_errors
@@ -299,7 +522,7 @@ class CloseIO(object):
     @parse_response
     @handle_errors
     def get_activity_email(self, lead_id):
-        return paginate(
+        return self._paginate(
             self._api.activity.email.get,
             lead_id=lead_id,
         )
@@ -307,7 +530,7 @@ class CloseIO(object):
     @parse_response
     @handle_errors
     def get_activity_call(self, lead_id):
-        return paginate(
+        return self._paginate(
             self._api.activity.call.get,
             lead_id=lead_id,
         )
@@ -315,7 +538,7 @@ class CloseIO(object):
     @parse_response
     @handle_errors
     def get_activity_note(self, lead_id):
-        return paginate(
+        return self._paginate(
             self._api.activity.note.get,
             lead_id=lead_id,
         )
@@ -327,7 +550,7 @@ class CloseIO(object):
         if fields:
             kwargs['_fields'] = ','.join(fields)
 
-        return paginate(
+        return self._paginate(
             self._api.activity.get,
             **kwargs)
 
@@ -349,7 +572,7 @@ class CloseIO(object):
     @parse_response
     @handle_errors
     def get_opportunities(self):
-        return paginate(
+        return self._paginate(
             self._api.opportunity.get,
         )
 
@@ -368,59 +591,70 @@ class CloseIO(object):
         if fields:
             args['_fields'] = ','.join(fields)
 
-        return paginate(
+        return self._paginate(
             self._api.lead.get,
             **args)
 
     @parse_response
     @handle_errors
     def get_user(self, user_id):
-        return self._api.user(user_id).get()
+        return self._get_resource(self._api.user(user_id), 'get_user')
 
     @parse_response
     @handle_errors
     def get_organization(self, organization_id):
-        return self._api.organization(organization_id).get()
+        return self._get_resource(self._api.organization(organization_id), 'get_organization')
 
     @parse_response
     @handle_errors
-    def get_organization_users(self, organization_id=None):
+    def get_organization_users(self, organization_id=None, hydrate=True, concurrency=8):
+        """
+        Return the users of an organization, in membership order.
+
+        :param organization_id: defaults to the first organization of the
+            API key
+        :param hydrate: fetch every user and merge in the membership data,
+            otherwise only return the membership data
+        :param concurrency: maximum number of users fetched concurrently,
+            fetched users are cached for ``user_ttl`` seconds
+        """
         if not organization_id:
             me = self._api.me.get()
             for mem in me['memberships']:
                 organization_id = mem['organization_id']
                 break
 
-        users = []
+        memberships = self._api.organization(organization_id).get()['memberships']
 
-        org = self._api.organization(organization_id).get()
-        for membership in org['memberships']:
-            uid = membership['user_id']
-            user = self._api.user(uid).get()
+        if not hydrate:
+            return [_merge_membership({}, membership) for membership in memberships]
 
-            user.update({
-                key[5:]: value
-                for key, value in membership.items()
-                if key.startswith('user_')
-            })
+        user_ids = [membership['user_id'] for membership in memberships]
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(user_ids)))) as pool:
+            futures = [
+                pool.submit(instrumentation.copy_context().run, self._get_cached_user, user_id)
+                for user_id in user_ids
+            ]
+            users = [future.result() for future in futures]
 
-            users.append(user)
+        return [
+            _merge_membership(user, membership)
+            for user, membership in zip(users, memberships)
+        ]
 
-        return users
+    def _get_cached_user(self, user_id):
+        # copy, callers merge membership data into the result
+        return dict(self._users.get(user_id, lambda key: self._api.user(key).get()))
 
     @parse_response
     @handle_errors
     def get_organization_user(self, organization_id, user_id):
-        user = self._api.user(user_id).get()
+        user = self._get_cached_user(user_id)
 
         org = self._api.organization(organization_id).get()
         for membership in org['memberships']:
             if membership['user_id'] == user_id:
-                user.update({
-                    key[5:]: value
-                    for key, value in membership.items()
-                    if key.startswith('user_')
-                })
+                _merge_membership(user, membership)
                 break
 
         else:
@@ -463,15 +697,47 @@ class CloseIO(object):
     @parse_response
     @handle_errors
     def custom_field_values(self, fieldname):
-        leads = self.get_leads(
+        """
+        Return the distinct values of custom field ``fieldname``.
+
+        Only the field is requested. Values are collected raw while the
+        pages are read, so each distinct value is only parsed once.
+        """
+        return set(self._iter_custom_field_values(fieldname))
+
+    @handle_errors
+    def custom_field_cardinality(self, fieldname, precision=14):
+        """
+        Estimate the number of distinct values of custom field
+        ``fieldname`` in constant memory, see :class:`HyperLogLog`.
+        """
+        sketch = HyperLogLog(precision)
+        sketch.update(self._iter_custom_field_values(fieldname))
+        return sketch.count()
+
+    @handle_errors
+    def top_custom_field_values(self, fieldname, n=10, capacity=None):
+        """
+        Return the ``n`` most frequent values of custom field ``fieldname``
+        as ``(value, count)`` pairs, most frequent first.
+
+        Counts are exact unless there are more than ``capacity`` (default
+        ``10 * n``) distinct values, see :class:`SpaceSaving`.
+        """
+        sketch = SpaceSaving(capacity or 10 * n)
+        sketch.update(self._iter_custom_field_values(fieldname))
+        return [(parse(value), count) for value, count in sketch.top(n)]
+
+    def _iter_custom_field_values(self, fieldname):
+        leads = self._paginate(
+            self._api.lead.get,
             query='custom.{}:*'.format(fieldname),
-            fields=['custom']
+            _fields='custom.{}'.format(fieldname),
         )
 
-        return {
-            lead['custom'][fieldname]
-            for lead in leads
-        }
+        for lead in leads:
+            for value in custom_field_values(lead, fieldname):
+                yield value
 
     @parse_response
     @handle_errors
@@ -509,10 +775,47 @@ class CloseIO(object):
     def get_export(self, id):
         return self._api.export(id).get()
 
+    @parse_response
+    def stream_lead_export(self, query='*', fields=(), include_activities=False,
+                           include_smart_fields=False, poll_interval=1, poll_max_interval=30,
+                           timeout=None, chunk_size=64 * 1024, download_timeout=(10, 60)):
+        """
+        Export leads and yield them one at a time.
+
+        Creates a JSON lead export, polls it with backoff until it is done
+        and then streams, gunzips and decodes the download incrementally,
+        so memory use does not depend on the size of the export.
+
+        :param poll_interval: seconds before the first poll, doubled after
+            every poll up to ``poll_max_interval``
+        :param timeout: seconds to wait for the export to finish
+        :param chunk_size: bytes read from the download at a time
+        :param download_timeout: seconds to connect to the download and to
+            wait for each chunk, as ``(connect, read)`` or one number
+        """
+        export = self.create_lead_export(
+            query, 'json', fields, include_activities, include_smart_fields)
+        return self._stream_export(
+            export.id, poll_interval, poll_max_interval, timeout, chunk_size, download_timeout)
+
+    def _stream_export(self, export_id, poll_interval, poll_max_interval, timeout, chunk_size,
+                       download_timeout):
+        export = wait_for_export(
+            self.get_export, export_id, poll_interval, poll_max_interval, timeout)
+
+        with convert_errors():
+            # the download URL is presigned, it must not get our credentials
+            with requests.get(export['download_url'], stream=True,
+                              timeout=download_timeout) as response:
+                response.raise_for_status()
+                chunks = iter_gunzipped(response.iter_content(chunk_size))
+                for value in iter_json_values(chunks):
+                    yield value
+
     @parse_response
     @handle_errors
     def get_event_logs(self, **kwargs):
-        return paginate_via_cursor(
+        return self._paginate_via_cursor(
             self._api.event.get,
             **kwargs
         )
@@ -520,14 +823,14 @@ class CloseIO(object):
     @parse_response
     @handle_errors
     def get_webhooks(self):
-        return paginate(
+        return self._paginate(
             self._api.webhook.get,
         )
 
     @parse_response
     @handle_errors
     def get_webhook(self, webhook_id):
-        return self._api.webhook(webhook_id).get()
+        return self._get_resource(self._api.webhook(webhook_id), 'get_webhook')
 
     @parse_response
     @handle_errors
@@ -544,10 +847,19 @@ class CloseIO(object):
         :param data (dict): { status: active or paused }
         :return:
         """
-        status = convert(data)
-        return self._api.webhook(webhook_id).put(status)
+        return self._api.webhook(webhook_id).put(data)
 
     @parse_response
     @handle_errors
     def delete_webhook(self, webhook_id):
         return self._api.webhook(webhook_id).delete()
+
+
+def _merge_membership(user, membership):
+    """Add the ``user_*`` fields of an organization membership to ``user``."""
+    user.update({
+        key[5:]: value
+        for key, value in membership.items()
+        if key.startswith('user_')
+    })
+    return user
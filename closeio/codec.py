@@ -0,0 +1,85 @@
+"""
+JSON codec for close.io requests, responses and webhooks.
+
+Uses ``orjson`` if installed, ``ujson`` (for decoding) otherwise and the
+standard library as a fallback. :data:`BACKEND` names the library in use.
+
+Decoding errors are always :class:`ValueError` subclasses.
+"""
+import json
+from datetime import date, datetime, time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class JSONEncoder(json.JSONEncoder):
+    """
+    Encode what :func:`~closeio.utils.convert` accepts without copying it
+    first.
+
+    Dates and times become ISO 8601 strings, other mappings objects and
+    iterables are encoded as they are read.
+    """
+
+    def default(self, value):
+        return _default(value)
+
+
+def _default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+
+    if hasattr(value, 'items'):
+        return dict(value.items())
+
+    try:
+        return list(value)
+    except TypeError:
+        pass
+
+    raise TypeError('Object of type {} is not JSON serializable'.format(
+        type(value).__name__))
+
+
+_encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def _json_dumps(value):
+    return _encoder.encode(value).encode('utf-8')
+
+
+if orjson is not None:
+    BACKEND = 'orjson'
+    _loads = orjson.loads
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def _dumps(value):
+        return orjson.dumps(value, default=_default, option=_ORJSON_OPTIONS)
+
+elif ujson is not None:
+    BACKEND = 'ujson'
+    _loads = ujson.loads
+    _dumps = _json_dumps
+
+else:
+    BACKEND = 'json'
+    _loads = json.loads
+    _dumps = _json_dumps
+
+
+def loads(data):
+    """Decode JSON ``data``, ``str`` or UTF-8 ``bytes``."""
+    return _loads(data)
+
+
+def dumps(value):
+    """Encode ``value`` to UTF-8 JSON bytes in a single pass."""
+    return _dumps(value)
@@ -0,0 +1,244 @@
+"""
+Write lead exports as tables.
+
+Leads are flattened into a stable column schema, one row per contact
+(or one row for a lead without contacts), and written in fixed size
+record batches to Parquet or Arrow IPC files with ``pyarrow``, or to CSV
+when ``pyarrow`` is not installed::
+
+    from closeio.contrib.columnar import write_lead_export
+
+    stats = write_lead_export(client, 'leads.parquet', custom_fields=['Source'])
+    stats['rows_per_second']
+"""
+import csv
+from datetime import date, datetime, time, timezone
+from time import monotonic
+
+from six import string_types
+
+from closeio.exceptions import CloseIOError
+from closeio.utils import parse_datetime
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+STRING = 'string'
+TIMESTAMP = 'timestamp'
+
+#: ``(column, type, lead field)``
+LEAD_COLUMNS = (
+    ('lead_id', STRING, 'id'),
+    ('lead_name', STRING, 'display_name'),
+    ('lead_url', STRING, 'url'),
+    ('lead_description', STRING, 'description'),
+    ('lead_status_id', STRING, 'status_id'),
+    ('lead_status_label', STRING, 'status_label'),
+    ('lead_organization_id', STRING, 'organization_id'),
+    ('lead_created_by', STRING, 'created_by'),
+    ('lead_date_created', TIMESTAMP, 'date_created'),
+    ('lead_date_updated', TIMESTAMP, 'date_updated'),
+)
+
+#: ``(column, type, address field)`` of the first address
+ADDRESS_COLUMNS = (
+    ('address_1', STRING, 'address_1'),
+    ('address_2', STRING, 'address_2'),
+    ('address_city', STRING, 'city'),
+    ('address_state', STRING, 'state'),
+    ('address_zipcode', STRING, 'zipcode'),
+    ('address_country', STRING, 'country'),
+)
+
+#: ``(column, type, contact field)``
+CONTACT_COLUMNS = (
+    ('contact_id', STRING, 'id'),
+    ('contact_name', STRING, 'name'),
+    ('contact_title', STRING, 'title'),
+    ('contact_date_created', TIMESTAMP, 'date_created'),
+)
+
+FORMATS = ('parquet', 'arrow', 'csv')
+
+
+class LeadTable(object):
+    """
+    Column schema of flattened leads.
+
+    :param custom_fields: names of the custom fields to include, as
+        ``custom.<name>`` string columns
+    :param contacts: add contact columns and a row per contact
+    """
+
+    def __init__(self, custom_fields=(), contacts=True):
+        self.custom_fields = tuple(custom_fields)
+        self.contacts = contacts
+
+        columns = list(LEAD_COLUMNS) + list(ADDRESS_COLUMNS)
+        if contacts:
+            columns += list(CONTACT_COLUMNS)
+            columns += [
+                ('contact_email', STRING, None),
+                ('contact_phone', STRING, None),
+            ]
+        columns += [('custom.' + name, STRING, None) for name in self.custom_fields]
+
+        self.columns = [(name, type_) for name, type_, _ in columns]
+        self.names = [name for name, _ in self.columns]
+
+    def rows(self, lead):
+        """Yield the rows of ``lead`` as tuples in column order."""
+        row = [_value(lead.get(field), type_) for _, type_, field in LEAD_COLUMNS]
+
+        addresses = lead.get('addresses') or [{}]
+        row += [_value(addresses[0].get(field), type_) for _, type_, field in ADDRESS_COLUMNS]
+
+        custom = lead.get('custom') or {}
+        custom_row = [_string(custom.get(name)) for name in self.custom_fields]
+
+        if not self.contacts:
+            yield tuple(row + custom_row)
+            return
+
+        for contact in lead.get('contacts') or [{}]:
+            contact_row = [
+                _value(contact.get(field), type_) for _, type_, field in CONTACT_COLUMNS
+            ]
+            contact_row.append(_first(contact.get('emails'), 'email'))
+            contact_row.append(_first(contact.get('phones'), 'phone'))
+            yield tuple(row + contact_row + custom_row)
+
+
+def _first(values, field):
+    if values:
+        return _string(values[0].get(field))
+    return None
+
+
+def _string(value):
+    if value is None or isinstance(value, string_types):
+        return value
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return ';'.join(_string(item) or '' for item in value)
+    return str(value)
+
+
+def _value(value, type_):
+    if type_ == TIMESTAMP:
+        if isinstance(value, string_types):
+            value = parse_datetime(value)
+        if isinstance(value, datetime):
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            return value
+        return None
+    return _string(value)
+
+
+class CSVBatchWriter(object):
+    def __init__(self, path, table):
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(table.names)
+
+    def write(self, rows):
+        self._writer.writerows(
+            [_string(value) for value in row] for row in rows)
+
+    def close(self):
+        self._file.close()
+
+
+class ArrowBatchWriter(object):
+    def __init__(self, path, table, format):
+        self.schema = pyarrow.schema([
+            (name, pyarrow.timestamp('us', tz='UTC') if type_ == TIMESTAMP else pyarrow.string())
+            for name, type_ in table.columns
+        ])
+        if format == 'parquet':
+            self._writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+        else:
+            self._writer = pyarrow.ipc.new_file(path, self.schema)
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        batch = pyarrow.RecordBatch.from_arrays(
+            [pyarrow.array(column, type=field.type)
+             for column, field in zip(columns, self.schema)],
+            schema=self.schema,
+        )
+        self._writer.write_batch(batch)
+
+    def close(self):
+        self._writer.close()
+
+
+def write_leads(leads, path, format=None, batch_size=10000, custom_fields=(), contacts=True):
+    """
+    Flatten ``leads`` and write them to ``path`` in batches of
+    ``batch_size`` rows.
+
+    :param format: ``parquet``, ``arrow`` or ``csv``, defaults to
+        ``parquet`` if ``pyarrow`` is installed and ``csv`` otherwise
+    :param custom_fields: see :class:`LeadTable`
+    :param contacts: see :class:`LeadTable`
+    :return: ``rows``, ``leads``, ``batches``, ``seconds`` and
+        ``rows_per_second`` written
+    """
+    if format is None:
+        format = 'parquet' if pyarrow is not None else 'csv'
+
+    if format not in FORMATS:
+        raise CloseIOError('unknown format {}, use one of {}'.format(format, FORMATS))
+
+    if format != 'csv' and pyarrow is None:
+        raise CloseIOError('writing {} requires pyarrow'.format(format))
+
+    table = LeadTable(custom_fields, contacts)
+    if format == 'csv':
+        writer = CSVBatchWriter(path, table)
+    else:
+        writer = ArrowBatchWriter(path, table, format)
+
+    started = monotonic()
+    stats = {'rows': 0, 'leads': 0, 'batches': 0}
+    batch = []
+
+    try:
+        for lead in leads:
+            stats['leads'] += 1
+            batch.extend(table.rows(lead))
+
+            while len(batch) >= batch_size:
+                writer.write(batch[:batch_size])
+                stats['rows'] += batch_size
+                stats['batches'] += 1
+                del batch[:batch_size]
+
+        if batch:
+            writer.write(batch)
+            stats['rows'] += len(batch)
+            stats['batches'] += 1
+    finally:
+        writer.close()
+
+    stats['seconds'] = monotonic() - started
+    stats['rows_per_second'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
+
+
+def write_lead_export(client, path, query='*', format=None, batch_size=10000,
+                      custom_fields=(), contacts=True, **export_kwargs):
+    """
+    Export the leads matching ``query`` with
+    :meth:`~closeio.CloseIO.stream_lead_export` and write them with
+    :func:`write_leads`.
+    """
+    leads = client.stream_lead_export(query=query, **export_kwargs)
+    return write_leads(leads, path, format, batch_size, custom_fields, contacts)
@@ -1,11 +1,12 @@
 import hashlib
 import hmac
-import json
 import logging
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 
+from closeio import codec
+
 logger = logging.getLogger(__name__)
 
 
@@ -33,18 +34,18 @@ def webhook_signature_valid(request):
         request: an instance of Django's ``HttpRequest`` object
     """
     try:
-        payload = json.loads(request.body)
-    except json.JSONDecodeError:
+        payload = codec.loads(request.body)
+    except ValueError:
         return False
     subscription_id = payload.get('subscription_id')
     if not subscription_id:
         return False
 
     try:
-        signature_keys = json.loads(settings.CLOSEIO_WEBHOOK_SIGNATURE_KEYS)
+        signature_keys = codec.loads(settings.CLOSEIO_WEBHOOK_SIGNATURE_KEYS)
     except AttributeError:
         raise ImproperlyConfigured('CLOSEIO_WEBHOOK_SIGNATURE_KEYS setting not set.')
-    except TypeError:
+    except (TypeError, ValueError):
         raise ImproperlyConfigured('Cannot load value of CLOSEIO_WEBHOOK_SIGNATURE_KEYS to json.')
 
     try:
@@ -1,13 +1,11 @@
-import json
 import logging
 
 from django.http import HttpResponse, HttpResponseBadRequest
 from django.utils.decorators import method_decorator
-from django.utils.encoding import force_text
 from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import View
 
-from closeio import utils
+from closeio import codec, utils
 
 from . import signals
 
@@ -21,7 +19,7 @@ class CloseIOWebHook(View):
 
     def post(self, request, *args, **kwargs):
         try:
-            query = json.loads(force_text(request.body))
+            query = codec.loads(request.body)
         except (ValueError, TypeError):
             logger.exception("CloseIO webhook request could not be parsed.")
             return HttpResponseBadRequest()
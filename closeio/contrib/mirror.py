@@ -0,0 +1,375 @@
+"""
+Local mirror of all leads, kept up to date from the event log.
+
+The first :meth:`LeadMirror.sync` loads every lead with
+:meth:`~closeio.CloseIO.get_leads`. Later syncs only read the events
+since the last sync from :meth:`~closeio.CloseIO.get_event_logs` and
+apply them, so their cost depends on the rate of change and not on the
+size of the account::
+
+    mirror = LeadMirror(client, SQLiteLeadStore('leads.db'))
+    mirror.sync()
+    mirror.store.get('lead_xyz')
+"""
+import json
+import re
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from closeio.exceptions import CloseIOError
+from closeio.utils import convert, parse
+
+#: fields of the secondary lead index, besides ``custom.<name>``
+INDEXED_FIELDS = ('id', 'name', 'email', 'phone', 'status', 'status_id')
+
+_PHONE_CHARACTERS_RE = re.compile(r'[^\d+]')
+
+
+def normalize_phone(phone):
+    return _PHONE_CHARACTERS_RE.sub('', phone)
+
+
+def index_terms(lead, custom_fields=()):
+    """
+    Yield the ``(field, value)`` index entries of ``lead``.
+
+    Values are lowercase strings, phone numbers are reduced to digits and
+    ``+``. Custom fields with a list value get an entry per item.
+    """
+    yield 'id', lead['id'].lower()
+
+    name = lead.get('display_name') or lead.get('name')
+    if name:
+        yield 'name', name.lower()
+
+    if lead.get('status_label'):
+        yield 'status', lead['status_label'].lower()
+    if lead.get('status_id'):
+        yield 'status_id', lead['status_id'].lower()
+
+    for contact in lead.get('contacts') or ():
+        for email in contact.get('emails') or ():
+            if email.get('email'):
+                yield 'email', email['email'].strip().lower()
+        for phone in contact.get('phones') or ():
+            if phone.get('phone'):
+                yield 'phone', normalize_phone(phone['phone'])
+
+    custom = lead.get('custom') or {}
+    for field in custom_fields:
+        values = custom.get(field)
+        if values is None:
+            continue
+        if not isinstance(values, (list, tuple)):
+            values = [values]
+        for value in convert(values):
+            yield 'custom.' + field, str(value).lower()
+
+
+class SQLiteLeadStore(object):
+    """
+    Leads stored as JSON in a sqlite database, plus the sync state.
+
+    Leads are indexed by :data:`INDEXED_FIELDS` and ``custom_fields``
+    in the ``lead_index`` table, see :func:`index_terms`.
+
+    :param path: database file, in memory by default
+    :param custom_fields: names of the custom fields to index, call
+        :meth:`reindex` after changing them for an existing database
+    """
+
+    def __init__(self, path=':memory:', custom_fields=()):
+        self.path = path
+        self.custom_fields = tuple(custom_fields)
+        self.connection = sqlite3.connect(path)
+
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS leads (id TEXT PRIMARY KEY, data TEXT)')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT)')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS lead_index (field TEXT, value TEXT, lead_id TEXT)')
+            self.connection.execute(
+                'CREATE INDEX IF NOT EXISTS lead_index_value ON lead_index (field, value)')
+            self.connection.execute(
+                'CREATE INDEX IF NOT EXISTS lead_index_lead ON lead_index (lead_id)')
+
+    @property
+    def indexed_fields(self):
+        return INDEXED_FIELDS + tuple('custom.' + field for field in self.custom_fields)
+
+    def transaction(self):
+        """Context manager committing all changes made inside at once."""
+        return self.connection
+
+    def __len__(self):
+        count, = self.connection.execute('SELECT COUNT(*) FROM leads').fetchone()
+        return count
+
+    def __iter__(self):
+        for data, in self.connection.execute('SELECT data FROM leads ORDER BY id'):
+            yield parse(json.loads(data))
+
+    def __contains__(self, lead_id):
+        return self.connection.execute(
+            'SELECT 1 FROM leads WHERE id = ?', (lead_id,)).fetchone() is not None
+
+    def get(self, lead_id):
+        """Return the lead with ``lead_id`` or None."""
+        row = self.connection.execute(
+            'SELECT data FROM leads WHERE id = ?', (lead_id,)).fetchone()
+        if row is None:
+            return None
+        return parse(json.loads(row[0]))
+
+    def put(self, lead):
+        self.put_many([lead])
+
+    def put_many(self, leads):
+        leads = [convert(lead) for lead in leads]
+        self.connection.executemany(
+            'DELETE FROM lead_index WHERE lead_id = ?', ((lead['id'],) for lead in leads))
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO leads (id, data) VALUES (?, ?)',
+            ((lead['id'], json.dumps(lead)) for lead in leads),
+        )
+        self._index(leads)
+
+    def _index(self, leads):
+        self.connection.executemany(
+            'INSERT INTO lead_index (field, value, lead_id) VALUES (?, ?, ?)',
+            (
+                (field, value, lead['id'])
+                for lead in leads
+                for field, value in set(index_terms(lead, self.custom_fields))
+            ),
+        )
+
+    def delete(self, lead_id):
+        self.connection.execute('DELETE FROM leads WHERE id = ?', (lead_id,))
+        self.connection.execute('DELETE FROM lead_index WHERE lead_id = ?', (lead_id,))
+
+    def clear(self):
+        self.connection.execute('DELETE FROM leads')
+        self.connection.execute('DELETE FROM lead_index')
+
+    def reindex(self):
+        """Rebuild the secondary index from the stored leads."""
+        with self.connection:
+            self.connection.execute('DELETE FROM lead_index')
+            rows = self.connection.execute('SELECT data FROM leads')
+            for data, in rows:
+                self._index([json.loads(data)])
+
+    def lookup(self, field, value=None, prefix=False):
+        """
+        Return the ids of leads with an index entry for ``field`` equal
+        to ``value``, starting with ``value`` if ``prefix`` is set, or any
+        value if ``value`` is None.
+        """
+        if value is None:
+            rows = self.connection.execute(
+                'SELECT lead_id FROM lead_index WHERE field = ?', (field,))
+        elif prefix:
+            rows = self.connection.execute(
+                'SELECT lead_id FROM lead_index WHERE field = ? AND value >= ? AND value < ?',
+                (field, value, value + '\U0010ffff'))
+        else:
+            rows = self.connection.execute(
+                'SELECT lead_id FROM lead_index WHERE field = ? AND value = ?', (field, value))
+
+        return {lead_id for lead_id, in rows}
+
+    def get_state(self, key, default=None):
+        row = self.connection.execute(
+            'SELECT value FROM sync_state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row is not None else default
+
+    def set_state(self, key, value):
+        self.connection.execute(
+            'INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)', (key, value))
+
+    def close(self):
+        self.connection.close()
+
+
+class LeadMirror(object):
+    """
+    Keeps a lead store in sync with close.io.
+
+    Events are streamed newest first, as close.io returns them, with the
+    same outcome as applying them oldest first:
+
+    * ``created`` and ``updated`` lead events store the lead from the
+      event ``data``, merged over the stored lead (fields set by newer
+      events of the same sync are kept),
+    * ``deleted`` lead events delete the lead,
+    * ``merged`` lead events and lead events without ``data`` re-fetch
+      every lead involved, as do events of objects nested in a lead
+      (contacts, opportunities, tasks, ...),
+    * leads that can no longer be fetched are deleted.
+
+    The cursor, the ``date_updated`` of the newest applied event, and the
+    ids of the events at that time are stored in the same transaction as
+    the changes. Events are read from the cursor on, including it, and
+    the ones already applied are skipped, so events with the same time
+    arriving in a later sync are not missed.
+
+    :param client: :class:`~closeio.CloseIO` instance
+    :param store: :class:`SQLiteLeadStore` (or compatible), in memory by
+        default
+    :param clock_skew: seconds of events before the initial load that are
+        replayed, to cover clock differences with close.io
+    :param batch_size: leads written per statement during the initial load
+    """
+
+    CURSOR = 'event_log_cursor'
+    CURSOR_EVENTS = 'event_log_cursor_events'
+
+    def __init__(self, client, store=None, clock_skew=60, batch_size=1000):
+        self.client = client
+        self.store = store if store is not None else SQLiteLeadStore()
+        self.clock_skew = clock_skew
+        self.batch_size = batch_size
+
+    @property
+    def cursor(self):
+        return self.store.get_state(self.CURSOR)
+
+    def sync(self):
+        """
+        Load all leads on the first call, apply new events afterwards.
+
+        Returns counters of ``loaded`` leads, applied ``events``,
+        ``refetched`` and ``deleted`` leads.
+        """
+        if self.cursor is None:
+            return self.load()
+        return self.tail()
+
+    def load(self):
+        """Replace the store content with all leads."""
+        started = datetime.now(timezone.utc) - timedelta(seconds=self.clock_skew)
+        loaded = 0
+
+        with self.store.transaction():
+            self.store.clear()
+
+            batch = []
+            for lead in self.client.get_leads():
+                batch.append(lead)
+                if len(batch) >= self.batch_size:
+                    self.store.put_many(batch)
+                    loaded += len(batch)
+                    batch = []
+
+            self.store.put_many(batch)
+            loaded += len(batch)
+            self.store.set_state(self.CURSOR, started.isoformat())
+            self.store.set_state(self.CURSOR_EVENTS, '[]')
+
+        return {'loaded': loaded, 'events': 0, 'refetched': 0, 'deleted': 0}
+
+    def tail(self):
+        """Apply the events since the last sync."""
+        cursor = self.cursor
+        applied = set(json.loads(self.store.get_state(self.CURSOR_EVENTS) or '[]'))
+        next_cursor, next_applied = cursor, None
+
+        stats = {'loaded': 0, 'events': 0, 'refetched': 0, 'deleted': 0}
+        refetch = {}
+        # lead id: fields stored by newer events, None if newer events
+        # deleted the lead or have it re-fetched
+        written = {}
+
+        with self.store.transaction():
+            # the event log is newest first
+            for event in self.client.get_event_logs(date_updated__gte=cursor):
+                date = convert(event.get('date_updated'))
+                if next_applied is None:
+                    next_cursor, next_applied = date or cursor, set()
+                if date == next_cursor and event.get('id'):
+                    next_applied.add(event['id'])
+                if date == cursor and event.get('id') in applied:
+                    continue
+
+                stats['events'] += 1
+                for lead_id in self._apply(event, stats, written):
+                    refetch[lead_id] = True
+                    written[lead_id] = None
+
+            for lead_id in refetch:
+                self._refetch(lead_id, stats)
+
+            if next_applied is not None:
+                if next_cursor == cursor:
+                    next_applied |= applied
+                self.store.set_state(self.CURSOR, next_cursor)
+                self.store.set_state(self.CURSOR_EVENTS, json.dumps(sorted(next_applied)))
+
+        return stats
+
+    def _apply(self, event, stats, written):
+        """Apply ``event``, return the ids of leads to re-fetch."""
+        lead_id = event.get('lead_id')
+
+        if event.get('object_type') != 'lead':
+            return [lead_id] if lead_id else []
+
+        lead_id = event.get('object_id') or lead_id
+        fields = written.get(lead_id, ())
+        if fields is None:
+            return []
+
+        action = event.get('action')
+        data = event.get('data')
+
+        if action == 'deleted':
+            self.store.delete(lead_id)
+            stats['deleted'] += 1
+            written[lead_id] = None
+            return []
+
+        if action == 'merged':
+            meta = event.get('meta') or {}
+            data = data or {}
+            return [
+                id for id in (
+                    lead_id,
+                    meta.get('merge_source_lead_id') or data.get('source_lead_id'),
+                    meta.get('merge_destination_lead_id') or data.get('destination_lead_id'),
+                ) if id
+            ]
+
+        if action in ('created', 'updated') and data:
+            lead = self.store.get(lead_id) or {}
+            for key, value in data.items():
+                if key not in fields:
+                    lead[key] = value
+            lead['id'] = lead_id
+            self.store.put(lead)
+            written[lead_id] = set(fields) | set(data)
+            return []
+
+        return [lead_id]
+
+    def _refetch(self, lead_id, stats):
+        try:
+            lead = self.client.get_lead(lead_id)
+        except CloseIOError as e:
+            if _status_code(e) not in (404, 410):
+                raise
+            if lead_id in self.store:
+                stats['deleted'] += 1
+            self.store.delete(lead_id)
+        else:
+            self.store.put(lead)
+            stats['refetched'] += 1
+
+
+def _status_code(error):
+    # CloseIOError(message, exception, request_data) from convert_errors
+    exception = error.args[1] if len(error.args) > 1 else None
+    response = getattr(exception, 'response', None)
+    return getattr(response, 'status_code', None)
@@ -0,0 +1,229 @@
+"""
+Answer lead searches from a local :class:`~closeio.contrib.mirror.SQLiteLeadStore`.
+
+A subset of the close.io search syntax is served from the store's
+secondary index:
+
+* ``field:value`` and ``field:"quoted value"`` equality (case insensitive),
+* ``field:prefix*`` prefix matching,
+* ``custom.X:*`` (any value),
+* ``AND`` (or juxtaposition) and ``OR``, grouped with parentheses,
+
+on the indexed fields ``id``, ``name``, ``email``, ``phone``, ``status``
+(alias ``lead_status``), ``status_id`` and the custom fields indexed by
+the store. :meth:`LocalQueryEngine.plan` tells whether a query can be
+served locally; :meth:`LocalQueryEngine.get_leads` falls back to the
+API for everything else::
+
+    engine = LocalQueryEngine(mirror.store, client)
+    engine.plan('email:bruce@wayne.com OR phone:+1555*').local
+    leads = engine.get_leads('custom.Source:* AND status:Potential')
+"""
+import re
+from collections import namedtuple
+
+from closeio.contrib.mirror import normalize_phone
+from closeio.exceptions import CloseIOError
+
+FIELD_ALIASES = {
+    'lead_status': 'status',
+    'lead_id': 'id',
+}
+
+_TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<open>\()
+      | (?P<close>\))
+      | (?P<term>
+            (?P<field>"[^"]*"|[\w.]+)
+            :
+            (?P<value>"[^"]*"\*?|[^\s()"]*)
+        )
+      | (?P<word>[^\s()]+)
+    )
+''', re.VERBOSE)
+
+#: a query that matches leads with a ``field`` entry equal to ``value``,
+#: starting with it if ``prefix`` is set, or any value if ``value`` is None
+Term = namedtuple('Term', ['field', 'value', 'prefix'])
+And = namedtuple('And', ['operands'])
+Or = namedtuple('Or', ['operands'])
+
+#: result of :meth:`LocalQueryEngine.plan`, ``expression`` is set if the
+#: query can be served locally and ``reason`` says why not otherwise
+QueryPlan = namedtuple('QueryPlan', ['query', 'local', 'expression', 'reason'])
+
+
+class UnsupportedQuery(CloseIOError):
+    pass
+
+
+def _unquote(text):
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        return text[1:-1]
+    return text
+
+
+def _tokenize(query):
+    tokens = []
+    position = 0
+    query = query.strip()
+
+    while position < len(query):
+        match = _TOKEN_RE.match(query, position)
+        if match is None or match.end() == position:
+            raise UnsupportedQuery('cannot parse query at {!r}'.format(query[position:]))
+        position = match.end()
+
+        if match.group('open'):
+            tokens.append(('(', None))
+        elif match.group('close'):
+            tokens.append((')', None))
+        elif match.group('term'):
+            tokens.append(('term', (match.group('field'), match.group('value'))))
+        else:
+            word = match.group('word')
+            if word.upper() in ('AND', 'OR'):
+                tokens.append((word.upper(), None))
+            else:
+                raise UnsupportedQuery('free text search {!r} is not indexed'.format(word))
+
+    return tokens
+
+
+class _Parser(object):
+    def __init__(self, tokens, fields):
+        self.tokens = tokens
+        self.position = 0
+        self.fields = fields
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position][0]
+        return None
+
+    def take(self):
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def parse(self):
+        expression = self.parse_or()
+        if self.peek() is not None:
+            raise UnsupportedQuery('unexpected {!r}'.format(self.peek()))
+        return expression
+
+    def parse_or(self):
+        operands = [self.parse_and()]
+        while self.peek() == 'OR':
+            self.take()
+            operands.append(self.parse_and())
+        return operands[0] if len(operands) == 1 else Or(tuple(operands))
+
+    def parse_and(self):
+        operands = [self.parse_operand()]
+        while self.peek() in ('AND', 'term', '('):
+            if self.peek() == 'AND':
+                self.take()
+            operands.append(self.parse_operand())
+        return operands[0] if len(operands) == 1 else And(tuple(operands))
+
+    def parse_operand(self):
+        kind = self.peek()
+        if kind == '(':
+            self.take()
+            expression = self.parse_or()
+            if self.peek() != ')':
+                raise UnsupportedQuery('unbalanced parentheses')
+            self.take()
+            return expression
+
+        if kind != 'term':
+            raise UnsupportedQuery('expected a field:value term, got {!r}'.format(kind))
+
+        field, value = self.take()[1]
+        return self.term(_unquote(field), value)
+
+    def term(self, field, value):
+        field = FIELD_ALIASES.get(field, field)
+        if field not in self.fields:
+            raise UnsupportedQuery('field {!r} is not indexed'.format(field))
+
+        if value == '*':
+            if not field.startswith('custom.'):
+                raise UnsupportedQuery('{}:* is only supported for custom fields'.format(field))
+            return Term(field, None, False)
+
+        prefix = value.endswith('*')
+        if prefix:
+            value = value[:-1]
+        value = _unquote(value)
+
+        if not value or '*' in value or any(c in value for c in '<>'):
+            raise UnsupportedQuery('unsupported value {!r} for {}'.format(value, field))
+
+        value = normalize_phone(value) if field == 'phone' else value.strip().lower()
+        return Term(field, value, prefix)
+
+
+class LocalQueryEngine(object):
+    """
+    Search leads in a local store, falling back to ``client``.
+
+    :param store: :class:`~closeio.contrib.mirror.SQLiteLeadStore`
+    :param client: :class:`~closeio.CloseIO` used for queries that cannot
+        be served locally, optional
+    """
+
+    def __init__(self, store, client=None):
+        self.store = store
+        self.client = client
+
+    def plan(self, query):
+        """Return the :class:`QueryPlan` of ``query``."""
+        try:
+            expression = _Parser(_tokenize(query), self.store.indexed_fields).parse()
+        except UnsupportedQuery as e:
+            return QueryPlan(query, False, None, str(e))
+        return QueryPlan(query, True, expression, None)
+
+    def can_serve(self, query):
+        return self.plan(query).local
+
+    def lead_ids(self, query):
+        """Return the ids of the local leads matching ``query``."""
+        plan = self.plan(query)
+        if not plan.local:
+            raise UnsupportedQuery(plan.reason)
+        return self._evaluate(plan.expression)
+
+    def _evaluate(self, expression):
+        if isinstance(expression, Term):
+            return self.store.lookup(*expression)
+
+        results = (self._evaluate(operand) for operand in expression.operands)
+        if isinstance(expression, And):
+            ids = next(results)
+            for other in results:
+                if not ids:
+                    break
+                ids &= other
+            return ids
+
+        ids = set()
+        for other in results:
+            ids |= other
+        return ids
+
+    def get_leads(self, query):
+        """
+        Return the leads matching ``query``, from the store if possible
+        and from ``client.get_leads`` otherwise.
+        """
+        plan = self.plan(query)
+        if plan.local:
+            return (self.store.get(lead_id) for lead_id in sorted(self._evaluate(plan.expression)))
+
+        if self.client is None:
+            raise UnsupportedQuery(plan.reason)
+        return self.client.get_leads(query=query)
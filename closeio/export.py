@@ -0,0 +1,157 @@
+"""
+Streaming close.io exports.
+
+Exports can be several GB, so they are downloaded in chunks, gunzipped
+on the fly and decoded one JSON value at a time.
+"""
+import codecs
+import itertools
+import json
+import zlib
+from time import monotonic, sleep
+
+from closeio.exceptions import CloseIOError
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+#: characters a single exported JSON value may have
+MAX_VALUE_SIZE = 8 * 1024 * 1024
+
+_WHITESPACE = ' \t\n\r'
+
+
+def wait_for_export(get_export, export_id, interval=1, max_interval=30, timeout=None):
+    """
+    Poll ``get_export(export_id)`` until the export is done.
+
+    The poll interval starts at ``interval`` seconds and doubles up to
+    ``max_interval``. Raises :class:`CloseIOError` if the export fails or
+    is not done after ``timeout`` seconds.
+    """
+    deadline = monotonic() + timeout if timeout is not None else None
+
+    while True:
+        export = get_export(export_id)
+        status = export['status']
+
+        if status == 'done':
+            return export
+
+        if status in ('error', 'failed'):
+            raise CloseIOError('export {} failed'.format(export_id))
+
+        if deadline is not None and monotonic() + interval > deadline:
+            raise CloseIOError(
+                'export {} not done after {} seconds, status {}'.format(
+                    export_id, timeout, status))
+
+        sleep(interval)
+        interval = min(interval * 2, max_interval)
+
+
+def iter_gunzipped(chunks):
+    """
+    Decompress ``chunks`` if they start with the gzip magic bytes.
+
+    Concatenated gzip members are decompressed one after the other.
+    """
+    chunks = iter(chunks)
+
+    first = b''
+    for chunk in chunks:
+        first += chunk
+        if len(first) >= len(GZIP_MAGIC):
+            break
+
+    if not first.startswith(GZIP_MAGIC):
+        if first:
+            yield first
+        for chunk in chunks:
+            yield chunk
+        return
+
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for chunk in itertools.chain([first], chunks):
+        while chunk:
+            if decompressor.eof:
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            yield decompressor.decompress(chunk)
+            # the start of the next member, if this one ended
+            chunk = decompressor.unused_data
+    yield decompressor.flush()
+
+
+def iter_json_values(chunks, encoding='utf-8', max_value_size=MAX_VALUE_SIZE):
+    """
+    Incrementally decode a JSON array or a stream of whitespace separated
+    JSON values (e.g. NDJSON) from byte ``chunks``.
+
+    Yields the array items or the values one by one, only the value being
+    decoded is kept in memory. Raises :class:`CloseIOError` if a value
+    does not decode within ``max_value_size`` characters, instead of
+    buffering the rest of the download.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder(encoding)()
+    chunks = iter(chunks)
+
+    buffer = ''
+    position = 0
+    exhausted = False
+    in_array = None
+    # characters to buffer before decoding a value that did not decode,
+    # so that values spanning many chunks are not decoded once per chunk
+    wanted = 0
+
+    def skip(characters):
+        nonlocal position
+        while position < len(buffer) and buffer[position] in characters:
+            position += 1
+
+    while True:
+        skip(_WHITESPACE + (',' if in_array else ''))
+
+        if position < len(buffer) and (exhausted or len(buffer) - position >= wanted):
+            if in_array is None:
+                in_array = buffer[position] == '['
+                if in_array:
+                    position += 1
+                continue
+
+            if in_array and buffer[position] == ']':
+                return
+
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except ValueError:
+                if exhausted:
+                    raise CloseIOError(
+                        'invalid JSON in export at character {}'.format(position))
+
+                pending = len(buffer) - position
+                if pending > max_value_size:
+                    raise CloseIOError(
+                        'invalid JSON in export or value larger than {} characters'.format(
+                            max_value_size))
+                wanted = min(2 * pending, max_value_size + 1)
+            else:
+                # a number at the end of the buffer might continue in the next chunk
+                if end < len(buffer) or exhausted or isinstance(value, (dict, list)):
+                    yield value
+                    position = end
+                    wanted = 0
+                    continue
+
+        elif exhausted:
+            if in_array:
+                raise CloseIOError('export ended before the JSON array was closed')
+            return
+
+        chunk = next(chunks, None)
+        buffer = buffer[position:]
+        position = 0
+        if chunk is None:
+            buffer += text_decoder.decode(b'', final=True)
+            exhausted = True
+        else:
+            buffer += text_decoder.decode(chunk)
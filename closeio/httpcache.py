@@ -0,0 +1,230 @@
+"""
+HTTP level cache for close.io read requests.
+
+:class:`HTTPCache` stores response bodies together with their
+``ETag``/``Last-Modified`` validators and turns repeated GET requests
+into conditional requests. On ``304 Not Modified`` the stored body is
+served and, for the ``CloseIO`` methods that support it, the already
+parsed item is reused as well.
+
+Bodies are kept in a backend: :class:`MemoryBackend` (the default) is a
+byte bounded LRU for one process, :class:`SQLiteBackend` stores them in
+a sqlite file shared by several processes. Other shared stores can be
+plugged in by implementing ``get``, ``set`` and ``delete``.
+"""
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict, namedtuple
+from time import time
+
+from closeio.records import Record
+from closeio.utils import Item
+
+#: a stored response body with its validators
+CacheEntry = namedtuple('CacheEntry', ['etag', 'last_modified', 'content'])
+
+
+class MemoryBackend(object):
+    """
+    In-process LRU of :class:`CacheEntry`, bounded to ``max_bytes``.
+
+    The size of an entry is the size of its key and body.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _size(key, entry):
+        return len(key) + len(entry.content)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        size = self._size(key, entry)
+
+        with self._lock:
+            self._delete(key)
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = entry
+            self.size += size
+
+            while self.size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._delete(oldest)
+
+    def delete(self, key):
+        with self._lock:
+            self._delete(key)
+
+    def _delete(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= self._size(key, entry)
+
+
+class SQLiteBackend(object):
+    """
+    :class:`CacheEntry` storage in a sqlite database shared by processes.
+
+    Least recently used entries are evicted once the stored bodies exceed
+    ``max_bytes``.
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, timeout=5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._local = threading.local()
+
+        with self._connection() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS closeio_http_cache ('
+                'key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, '
+                'content BLOB, size INTEGER, used REAL)'
+            )
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(
+                self.path, timeout=self.timeout)
+        return connection
+
+    def get(self, key):
+        with self._connection() as connection:
+            row = connection.execute(
+                'SELECT etag, last_modified, content FROM closeio_http_cache WHERE key = ?',
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+
+            connection.execute(
+                'UPDATE closeio_http_cache SET used = ? WHERE key = ?', (time(), key))
+
+        etag, last_modified, content = row
+        return CacheEntry(etag, last_modified, bytes(content))
+
+    def set(self, key, entry):
+        size = len(key) + len(entry.content)
+        if size > self.max_bytes:
+            self.delete(key)
+            return
+
+        with self._connection() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO closeio_http_cache VALUES (?, ?, ?, ?, ?, ?)',
+                (key, entry.etag, entry.last_modified, entry.content, size, time()),
+            )
+
+            total, = connection.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM closeio_http_cache').fetchone()
+            if total > self.max_bytes:
+                self._evict(connection, total - self.max_bytes)
+
+    def _evict(self, connection, excess):
+        rows = connection.execute(
+            'SELECT key, size FROM closeio_http_cache ORDER BY used')
+        keys = []
+        for key, size in rows:
+            if excess <= 0:
+                break
+            keys.append((key,))
+            excess -= size
+
+        connection.executemany('DELETE FROM closeio_http_cache WHERE key = ?', keys)
+
+    def delete(self, key):
+        with self._connection() as connection:
+            connection.execute('DELETE FROM closeio_http_cache WHERE key = ?', (key,))
+
+
+class HTTPCache(object):
+    """
+    Conditional GET cache used by ``CloseIO(http_cache=HTTPCache())``.
+
+    Only GET requests without query string are cached, paginated list
+    requests are always sent as is.
+
+    :param backend: body storage, defaults to a :class:`MemoryBackend`
+    :param parsed_items: number of parsed items kept in this process to
+        be served again when the body did not change
+    """
+
+    def __init__(self, backend=None, parsed_items=1024):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.parsed_items = parsed_items
+        self._parsed = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, request):
+        """Cache key of a prepared request, distinct per API key."""
+        if request.method != 'GET' or '?' in request.url:
+            return None
+
+        authorization = request.headers.get('Authorization', '')
+        digest = hashlib.sha256(authorization.encode('utf-8')).hexdigest()[:16]
+        return '{} {}'.format(digest, request.url)
+
+    def entry(self, response):
+        """Return the :class:`CacheEntry` for a 200 response, if it has validators."""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if response.status_code != 200 or not (etag or last_modified):
+            return None
+        return CacheEntry(etag, last_modified, response.content)
+
+    def get_parsed(self, key, entry, mode=None):
+        """
+        Return a copy of the item parsed from ``entry``, if there is one.
+
+        :param mode: how the item was parsed, e.g. its record type, items
+            parsed in another mode are not returned
+        """
+        with self._lock:
+            cached = self._parsed.get((key, mode))
+            if cached is None or cached[0] != entry[:2]:
+                return None
+            self._parsed.move_to_end((key, mode))
+            value = cached[1]
+
+        return _copy(value)
+
+    def set_parsed(self, key, entry, value, mode=None):
+        """Remember ``value`` as the parsed item of ``entry``, returns a copy."""
+        with self._lock:
+            self._parsed[key, mode] = (entry[:2], value)
+            self._parsed.move_to_end((key, mode))
+            while len(self._parsed) > self.parsed_items:
+                self._parsed.popitem(last=False)
+
+        return _copy(value)
+
+
+def _copy(value):
+    """Copy a parsed value, immutable values like datetimes are shared."""
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+
+    if isinstance(value, (Item, Record)):
+        return value.__class__((key, _copy(item)) for key, item in value.items())
+
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+
+    return value
@@ -0,0 +1,322 @@
+"""
+Hooks reporting every HTTP request made by :class:`~closeio.CloseIO` and
+:class:`~closeio.aio.AsyncCloseIO`.
+
+Listeners are callables registered with :func:`add_listener`, they get a
+:class:`RequestEvent` after each request, including its retries::
+
+    from closeio import instrumentation
+
+    instrumentation.add_listener(instrumentation.LoggingListener())
+    instrumentation.add_listener(instrumentation.PrometheusListener())
+
+Without listeners, requests only pay for an empty list check.
+"""
+import logging
+import re
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+from closeio.exceptions import CloseIOError
+
+try:
+    import contextvars
+except ImportError:  # Python < 3.7
+    contextvars = None
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+try:
+    from opentelemetry import metrics as otel_metrics, trace as otel_trace
+except ImportError:
+    otel_metrics = otel_trace = None
+
+logger = logging.getLogger(__name__)
+
+if contextvars is not None:
+    ContextVar = contextvars.ContextVar
+    copy_context = contextvars.copy_context
+
+else:
+    _context_vars = []
+
+    class ContextVar(object):
+        """
+        Thread local stand-in for :class:`contextvars.ContextVar`, shared
+        by the asyncio tasks of a thread.
+        """
+
+        def __init__(self, name, default=None):
+            self.name = name
+            self.default = default
+            self._local = threading.local()
+            _context_vars.append(self)
+
+        def get(self):
+            return getattr(self._local, 'value', self.default)
+
+        def set(self, value):
+            token = self.get()
+            self._local.value = value
+            return token
+
+        def reset(self, token):
+            self._local.value = token
+
+    class _Context(object):
+        def __init__(self):
+            self._values = [(var, var.get()) for var in _context_vars]
+
+        def run(self, func, *args, **kwargs):
+            tokens = [(var, var.set(value)) for var, value in self._values]
+            try:
+                return func(*args, **kwargs)
+            finally:
+                for var, token in tokens:
+                    var.reset(token)
+
+    def copy_context():
+        """Snapshot of the :class:`ContextVar` values of the current thread."""
+        return _Context()
+
+try:
+    time_ns = time.time_ns
+except AttributeError:  # Python < 3.7
+    def time_ns():
+        return int(time.time() * 1e9)
+
+#: ``method`` is the :class:`~closeio.CloseIO` method that made the
+#: request (None for direct ``_api`` use), ``endpoint`` the API path with
+#: ids replaced by ``{id}``, ``status`` None if no response was received
+#: (``error`` is set then), ``bytes_received`` the ``Content-Length`` or
+#: body size, ``retries`` the repeated attempts and ``page`` the index of
+#: the page for paginated methods
+RequestEvent = namedtuple('RequestEvent', [
+    'method', 'http_method', 'endpoint', 'url', 'status', 'bytes_sent',
+    'bytes_received', 'seconds', 'retries', 'page', 'error',
+])
+
+#: registered listeners, see :func:`add_listener`
+listeners = []
+_listeners_lock = threading.Lock()
+
+_method = ContextVar('closeio_method', default=None)
+_page = ContextVar('closeio_page', default=None)
+
+_ID_RE = re.compile(r'^[a-z]+_[A-Za-z0-9]+$')
+_API_ROOT = '/api/v1/'
+
+
+def add_listener(listener):
+    """Call ``listener(event)`` with a :class:`RequestEvent` after every request."""
+    with _listeners_lock:
+        listeners.append(listener)
+
+
+def remove_listener(listener):
+    with _listeners_lock:
+        listeners.remove(listener)
+
+
+def notify(event):
+    for listener in tuple(listeners):
+        try:
+            listener(event)
+        except Exception:
+            logger.exception('closeio instrumentation listener %r failed', listener)
+
+
+def endpoint(url):
+    """Return the API path of ``url`` with ids replaced, e.g. ``lead/{id}/``."""
+    path = urlsplit(url).path
+    if _API_ROOT in path:
+        path = path.split(_API_ROOT, 1)[1]
+
+    segments = [
+        '{id}' if _ID_RE.match(segment) else segment
+        for segment in path.strip('/').split('/')
+    ]
+    return '/'.join(segments) + '/'
+
+
+def context():
+    """Return the ``(method, page)`` of the request being made."""
+    return _method.get(), _page.get()
+
+
+def call(method, func, *args, **kwargs):
+    """Call ``func`` with requests attributed to ``method``."""
+    if not listeners or _method.get() is not None:
+        return func(*args, **kwargs)
+
+    token = _method.set(method)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _method.reset(token)
+
+
+def iterate(method, iterable):
+    """Iterate ``iterable`` with requests attributed to ``method``."""
+    iterator = iter(iterable)
+    while True:
+        token = _method.set(_method.get() or method)
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _method.reset(token)
+        yield item
+
+
+async def call_async(method, func, *args, **kwargs):
+    """Await ``func`` with requests attributed to ``method``."""
+    if not listeners or _method.get() is not None:
+        return await func(*args, **kwargs)
+
+    token = _method.set(method)
+    try:
+        return await func(*args, **kwargs)
+    finally:
+        _method.reset(token)
+
+
+async def iterate_async(method, iterable):
+    """Async counterpart of :func:`iterate`."""
+    iterator = iterable.__aiter__()
+    while True:
+        token = _method.set(_method.get() or method)
+        try:
+            item = await iterator.__anext__()
+        except StopAsyncIteration:
+            return
+        finally:
+            _method.reset(token)
+        yield item
+
+
+def fetch_page(index, func, *args, **kwargs):
+    """Call ``func`` with requests attributed to page ``index``."""
+    if not listeners:
+        return func(*args, **kwargs)
+
+    token = _page.set(index)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _page.reset(token)
+
+
+class LoggingListener(object):
+    """Log every request at ``level``."""
+
+    def __init__(self, logger=logger, level=logging.DEBUG):
+        self.logger = logger
+        self.level = level
+
+    def __call__(self, event):
+        self.logger.log(
+            self.level,
+            'close.io %s %s -> %s in %.3fs (%s, page %s, %s bytes sent, %s received, '
+            '%d retries)',
+            event.http_method, event.endpoint,
+            event.status if event.status is not None else event.error, event.seconds,
+            event.method, event.page, event.bytes_sent, event.bytes_received, event.retries,
+        )
+
+
+class PrometheusListener(object):
+    """
+    Export request metrics with ``prometheus_client``.
+
+    ``<namespace>_request_duration_seconds`` histogram and
+    ``<namespace>_request_bytes_sent``, ``<namespace>_response_bytes_received``
+    and ``<namespace>_request_retries`` counters, all labelled with
+    ``method``, ``http_method``, ``endpoint`` and ``status``.
+    """
+
+    LABELS = ('method', 'http_method', 'endpoint', 'status')
+
+    def __init__(self, namespace='closeio', registry=None):
+        if prometheus_client is None:
+            raise CloseIOError('PrometheusListener requires prometheus_client')
+
+        registry = registry if registry is not None else prometheus_client.REGISTRY
+        self.duration = prometheus_client.Histogram(
+            'request_duration_seconds', 'close.io request wall time, including retries',
+            self.LABELS, namespace=namespace, registry=registry)
+        self.bytes_sent = prometheus_client.Counter(
+            'request_bytes_sent', 'close.io request body bytes',
+            self.LABELS, namespace=namespace, registry=registry)
+        self.bytes_received = prometheus_client.Counter(
+            'response_bytes_received', 'close.io response body bytes',
+            self.LABELS, namespace=namespace, registry=registry)
+        self.retries = prometheus_client.Counter(
+            'request_retries', 'close.io request retries',
+            self.LABELS, namespace=namespace, registry=registry)
+
+    def __call__(self, event):
+        labels = {
+            'method': event.method or '',
+            'http_method': event.http_method,
+            'endpoint': event.endpoint,
+            'status': str(event.status) if event.status is not None else 'error',
+        }
+        self.duration.labels(**labels).observe(event.seconds)
+        self.bytes_sent.labels(**labels).inc(event.bytes_sent)
+        if event.bytes_received is not None:
+            self.bytes_received.labels(**labels).inc(event.bytes_received)
+        if event.retries:
+            self.retries.labels(**labels).inc(event.retries)
+
+
+class OpenTelemetryListener(object):
+    """
+    Record a span and a ``closeio.request.duration`` histogram per request
+    with ``opentelemetry-api``.
+    """
+
+    def __init__(self, meter_provider=None, tracer_provider=None):
+        if otel_metrics is None:
+            raise CloseIOError('OpenTelemetryListener requires opentelemetry-api')
+
+        meter = otel_metrics.get_meter(__name__, meter_provider=meter_provider)
+        self.tracer = otel_trace.get_tracer(__name__, tracer_provider=tracer_provider)
+        self.duration = meter.create_histogram(
+            'closeio.request.duration', unit='s',
+            description='close.io request wall time, including retries')
+        self.bytes_received = meter.create_counter(
+            'closeio.response.size', unit='By', description='close.io response body bytes')
+
+    def __call__(self, event):
+        attributes = {
+            'closeio.method': event.method or '',
+            'closeio.endpoint': event.endpoint,
+            'closeio.retries': event.retries,
+            'http.request.method': event.http_method,
+        }
+        if event.status is not None:
+            attributes['http.response.status_code'] = event.status
+        if event.page is not None:
+            attributes['closeio.page'] = event.page
+
+        self.duration.record(event.seconds, attributes)
+        if event.bytes_received is not None:
+            self.bytes_received.add(event.bytes_received, attributes)
+
+        end = time_ns()
+        span = self.tracer.start_span(
+            'closeio {} {}'.format(event.http_method, event.endpoint),
+            kind=otel_trace.SpanKind.CLIENT,
+            start_time=end - int(event.seconds * 1e9),
+            attributes=dict(attributes, **{'url.full': event.url}),
+        )
+        if event.error is not None or (event.status or 0) >= 400:
+            span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR))
+        span.end(end_time=end)
@@ -0,0 +1,198 @@
+"""
+Client side rate limiting for the close.io API.
+
+close.io enforces request limits per API key and endpoint group. The
+:class:`RateLimiter` learns those limits from rate limit headers and 429
+responses and paces outgoing requests accordingly. Clients using the
+same API key share one limiter per process, see
+:meth:`RateLimiter.for_api_key`.
+"""
+import re
+import threading
+from time import monotonic, sleep
+from urllib.parse import urlsplit
+
+_RATELIMIT_FIELD_RE = re.compile(r'(limit|remaining|reset)\s*=\s*([0-9.]+)')
+
+
+def endpoint_group(url):
+    """
+    Return the endpoint group of an API ``url``.
+
+    This is the first path segment below the API root, e.g. ``lead`` for
+    ``https://app.close.io/api/v1/lead/lead_xyz/``.
+    """
+    path = urlsplit(url).path
+    marker = '/api/v1/'
+    if marker in path:
+        path = path.split(marker, 1)[1]
+    return path.strip('/').split('/', 1)[0]
+
+
+def parse_rate_limit_headers(headers):
+    """
+    Read ``limit``, ``remaining`` and ``reset`` from response headers.
+
+    Supports the ``RateLimit: limit=.., remaining=.., reset=..`` header as
+    well as ``X-Rate-Limit-Limit`` and friends. Missing values are None.
+    """
+    values = {}
+
+    header = headers.get('RateLimit')
+    if header:
+        for name, value in _RATELIMIT_FIELD_RE.findall(header):
+            values[name] = float(value)
+
+    for name in ('limit', 'remaining', 'reset'):
+        if name not in values:
+            value = headers.get('X-Rate-Limit-{}'.format(name.title()))
+            if value is not None:
+                try:
+                    values[name] = float(value)
+                except ValueError:
+                    pass
+
+    return values.get('limit'), values.get('remaining'), values.get('reset')
+
+
+class TokenBucket(object):
+    """
+    Token bucket allowing ``limit`` requests per ``window`` seconds.
+
+    The bucket starts without a known limit and only enforces a pause set
+    with :meth:`block` until :meth:`configure` is called.
+    """
+
+    def __init__(self, limit=None, window=None):
+        self.rate = None
+        self.capacity = None
+        self.tokens = 0.0
+        self.updated = monotonic()
+        self.blocked_until = 0.0
+        if limit and window:
+            self.configure(limit, window)
+
+    def configure(self, limit, window):
+        rate = float(limit) / window
+        if self.rate is None:
+            self.tokens = float(limit)
+        self.rate = rate
+        self.capacity = float(limit)
+
+    def _refill(self, now):
+        if self.rate is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now):
+        """Take a token and return the seconds to wait before using it."""
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+
+        if self.rate is not None:
+            self.tokens -= 1
+            if self.tokens < 0:
+                wait = max(wait, -self.tokens / self.rate)
+
+        return wait
+
+    def set_remaining(self, remaining, now):
+        self._refill(now)
+        self.tokens = min(self.tokens, float(remaining))
+
+    def block(self, seconds, now):
+        self._refill(now)
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = min(self.tokens, 0.0)
+
+
+class RateLimiter(object):
+    """Thread safe token buckets per endpoint group."""
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    @classmethod
+    def for_api_key(cls, api_key):
+        """Return the limiter shared by all clients using ``api_key``."""
+        with cls._shared_lock:
+            limiter = cls._shared.get(api_key)
+            if limiter is None:
+                limiter = cls._shared[api_key] = cls()
+            return limiter
+
+    def _bucket(self, group):
+        bucket = self._buckets.get(group)
+        if bucket is None:
+            bucket = self._buckets[group] = TokenBucket()
+        return bucket
+
+    def reserve(self, group):
+        """Reserve a request to ``group``, return the seconds to wait first."""
+        with self._lock:
+            return self._bucket(group).reserve(monotonic())
+
+    def acquire(self, group, deadline=None):
+        """
+        Wait until a request to ``group`` may be sent.
+
+        Never waits past ``deadline`` (a :func:`time.monotonic` value).
+        Returns the seconds waited.
+        """
+        wait = self.reserve(group)
+        if deadline is not None:
+            wait = min(wait, max(0.0, deadline - monotonic()))
+        if wait > 0:
+            sleep(wait)
+        return wait
+
+    def retry_after(self, group):
+        """Seconds until ``group`` is no longer blocked by a 429 response."""
+        with self._lock:
+            return max(0.0, self._bucket(group).blocked_until - monotonic())
+
+    def learn(self, group, headers=None, error=None):
+        """
+        Update the limits of ``group`` from a response.
+
+        :param headers: response headers, see :func:`parse_rate_limit_headers`
+        :param error: for 429 responses the ``error`` object of the body,
+            or an empty dict if there is none
+        """
+        headers = headers or {}
+        limit, remaining, reset = parse_rate_limit_headers(headers)
+        window = None
+
+        if error is not None:
+            limit = error.get('rate_limit', limit)
+            window = error.get('rate_window')
+            reset = error.get('rate_reset', reset)
+            if reset is None:
+                reset = _retry_after(headers) or 1.0
+            remaining = 0
+
+        if limit is None and remaining is None:
+            return
+
+        with self._lock:
+            bucket = self._bucket(group)
+            now = monotonic()
+
+            if limit and window:
+                bucket.configure(limit, window)
+
+            if remaining is not None:
+                bucket.set_remaining(remaining, now)
+                if remaining <= 0 and reset:
+                    bucket.block(reset, now)
+
+
+def _retry_after(headers):
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
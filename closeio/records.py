@@ -0,0 +1,313 @@
+"""
+Compact record types for the main close.io resources.
+
+Records are an alternative to :class:`~closeio.utils.Item` for holding
+large numbers of objects in memory. Known fields are stored in
+``__slots__``, everything else (e.g. custom fields) in a small overflow
+dict. Like :class:`~closeio.utils.Item`, records support both attribute
+and ``['key']`` access and compare equal to dicts with the same content.
+
+Use them with ``CloseIO(api_key, records=True)``.
+"""
+from collections.abc import MutableMapping
+
+_MISSING = object()
+
+
+class Record(MutableMapping):
+    __slots__ = ('_extra',)
+
+    #: record types of nested fields, e.g. ``{'contacts': Contact}``
+    nested = {}
+
+    _fields = ()
+    _field_set = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        fields = []
+        for klass in reversed(cls.__mro__):
+            for name in klass.__dict__.get('__slots__', ()):
+                if name != '_extra' and name not in fields:
+                    fields.append(name)
+
+        cls._fields = tuple(fields)
+        cls._field_set = frozenset(fields)
+
+    def __init__(self, *args, **kwargs):
+        object.__setattr__(self, '_extra', None)
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    @classmethod
+    def record_type(cls, data):
+        """Return the record class to use for ``data``."""
+        return cls
+
+    @classmethod
+    def from_response(cls, data):
+        """Build a record from a response mapping, parsing its values."""
+        from closeio.utils import parse
+
+        klass = cls.record_type(data)
+        record = klass.__new__(klass)
+        object.__setattr__(record, '_extra', None)
+
+        nested = klass.nested
+        for key, value in data.items():
+            record[key] = parse(value, record=nested.get(key))
+
+        return record
+
+    def __getitem__(self, key):
+        if key in self._field_set:
+            try:
+                return object.__getattribute__(self, key)
+            except AttributeError:
+                raise KeyError(key)
+
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        if key in self._field_set:
+            object.__setattr__(self, key, value)
+        elif self._extra is None:
+            object.__setattr__(self, '_extra', {key: value})
+        else:
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._field_set:
+            try:
+                object.__delattr__(self, key)
+            except AttributeError:
+                raise KeyError(key)
+        elif self._extra is None:
+            raise KeyError(key)
+        else:
+            del self._extra[key]
+
+    def __iter__(self):
+        for name in self._fields:
+            if getattr(self, name, _MISSING) is not _MISSING:
+                yield name
+
+        if self._extra:
+            for key in self._extra:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __getattr__(self, name):
+        # only called for unset slots and overflow keys
+        if name == '_extra' or name.startswith('__'):
+            raise AttributeError(name)
+
+        extra = self._extra
+        if extra is not None and name in extra:
+            return extra[name]
+
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+    def __delattr__(self, name):
+        try:
+            del self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, dict(self))
+
+    def to_dict(self):
+        return dict(self)
+
+
+class Contact(Record):
+    __slots__ = (
+        'id', 'lead_id', 'name', 'title', 'display_name', 'organization_id',
+        'created_by', 'updated_by', 'date_created', 'date_updated',
+        'emails', 'phones', 'urls', 'integration_links',
+    )
+
+
+class Opportunity(Record):
+    __slots__ = (
+        'id', 'lead_id', 'lead_name', 'contact_id', 'contact_name',
+        'status_id', 'status_label', 'status_type', 'confidence',
+        'value', 'value_period', 'value_currency', 'value_formatted',
+        'expected_value', 'annualized_value', 'annualized_expected_value',
+        'note', 'user_id', 'user_name', 'organization_id', 'created_by',
+        'updated_by', 'date_won', 'date_created', 'date_updated',
+        'integration_links',
+    )
+
+
+class Task(Record):
+    __slots__ = (
+        'id', '_type', 'lead_id', 'lead_name', 'contact_id', 'contact_name',
+        'assigned_to', 'assigned_to_name', 'text', 'view', 'date',
+        'due_date', 'is_complete', 'is_dateless', 'organization_id',
+        'created_by', 'created_by_name', 'updated_by', 'updated_by_name',
+        'date_created', 'date_updated',
+    )
+
+
+class Lead(Record):
+    __slots__ = (
+        'id', 'name', 'display_name', 'description', 'url', 'html_url',
+        'status_id', 'status_label', 'organization_id', 'created_by',
+        'created_by_name', 'updated_by', 'updated_by_name', 'date_created',
+        'date_updated', 'addresses', 'contacts', 'opportunities', 'tasks',
+        'custom', 'integration_links',
+    )
+
+    nested = {
+        'contacts': Contact,
+        'opportunities': Opportunity,
+        'tasks': Task,
+    }
+
+
+class Activity(Record):
+    """
+    Base class of all activity records.
+
+    Building an ``Activity`` from a response picks the subclass matching
+    its ``_type``, so mixed activity lists get the right record types.
+    """
+    __slots__ = (
+        'id', '_type', 'lead_id', 'contact_id', 'user_id', 'user_name',
+        'organization_id', 'created_by', 'created_by_name', 'updated_by',
+        'updated_by_name', 'date_created', 'date_updated',
+    )
+
+    types = {}
+
+    #: value of ``_type`` for this activity
+    activity_type = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.activity_type:
+            Activity.types[cls.activity_type] = cls
+
+    @classmethod
+    def record_type(cls, data):
+        return cls.types.get(data.get('_type'), cls)
+
+
+class Note(Activity):
+    activity_type = 'Note'
+    __slots__ = ('note', 'note_html')
+
+
+class Call(Activity):
+    activity_type = 'Call'
+    __slots__ = (
+        'direction', 'status', 'duration', 'phone', 'local_phone',
+        'remote_phone', 'voicemail_url', 'voicemail_duration',
+        'recording_url', 'source', 'note', 'disposition', 'cost',
+    )
+
+
+class Email(Activity):
+    activity_type = 'Email'
+    __slots__ = (
+        'direction', 'status', 'subject', 'body_text', 'body_html',
+        'body_preview', 'sender', 'to', 'cc', 'bcc', 'template_id',
+        'template_name', 'thread_id', 'attachments', 'envelope', 'opens',
+        'opens_summary', 'date_sent', 'date_scheduled', 'in_reply_to_id',
+        'email_account_id', 'message_ids',
+    )
+
+
+class EmailThread(Activity):
+    activity_type = 'EmailThread'
+    __slots__ = (
+        'emails', 'latest_normalized_subject', 'n_emails', 'participants',
+    )
+
+
+class SMS(Activity):
+    activity_type = 'SMS'
+    __slots__ = (
+        'direction', 'status', 'text', 'local_phone', 'remote_phone',
+        'date_sent', 'date_scheduled', 'attachments', 'source',
+    )
+
+
+class Meeting(Activity):
+    activity_type = 'Meeting'
+    __slots__ = (
+        'title', 'note', 'status', 'source', 'location', 'starts_at',
+        'ends_at', 'duration', 'attendees',
+    )
+
+
+class LeadStatusChange(Activity):
+    activity_type = 'LeadStatusChange'
+    __slots__ = (
+        'old_status_id', 'old_status_label', 'new_status_id',
+        'new_status_label',
+    )
+
+
+class OpportunityStatusChange(Activity):
+    activity_type = 'OpportunityStatusChange'
+    __slots__ = (
+        'opportunity_id', 'opportunity_value', 'opportunity_value_period',
+        'opportunity_value_formatted', 'old_status_id', 'old_status_label',
+        'old_status_type', 'new_status_id', 'new_status_label',
+        'new_status_type',
+    )
+
+
+class TaskCompleted(Activity):
+    activity_type = 'TaskCompleted'
+    __slots__ = ('task_id', 'task_text', 'task_assigned_to')
+
+
+class Created(Activity):
+    activity_type = 'Created'
+    __slots__ = ('source',)
+
+
+#: record types of ``CloseIO`` methods, used by ``CloseIO(records=True)``
+RECORD_TYPES = {
+    'get_lead': Lead,
+    'get_leads': Lead,
+    'create_lead': Lead,
+    'update_lead': Lead,
+    'stream_lead_export': Lead,
+    'get_contact': Contact,
+    'get_opportunities': Opportunity,
+    'create_opportunity': Opportunity,
+    'update_opportunity': Opportunity,
+    'get_tasks': Task,
+    'create_task': Task,
+    'update_task': Task,
+    'get_activities': Activity,
+    'get_activity_note': Note,
+    'create_activity_note': Note,
+    'get_activity_call': Call,
+    'create_activity_call': Call,
+    'get_activity_email': Email,
+    'create_activity_email': Email,
+}
@@ -0,0 +1,117 @@
+"""
+Retrying failed close.io API requests.
+
+A :class:`RetryPolicy` decides which failed requests are sent again and
+how long to back off in between. Requests that failed to connect were
+never sent and are retried whatever their method. Otherwise only
+idempotent methods are retried by default; POST and PUT can be opted in
+with ``methods``. 429 responses are left to :mod:`closeio.ratelimit`.
+"""
+import random
+import threading
+from time import sleep
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'DELETE'])
+
+
+class RetryPolicy(object):
+    """
+    Exponential backoff with jitter for 5xx responses and connection errors.
+
+    The n-th retry waits ``min(cap, backoff * 2 ** (n - 1))`` seconds, or a
+    random duration up to that with ``jitter``. A ``Retry-After`` header
+    raises the wait, still bounded by ``cap``.
+
+    :param total: maximum number of retries per request, 0 disables retries
+    :param backoff: base of the exponential backoff in seconds
+    :param cap: maximum backoff in seconds
+    :param jitter: randomize the backoff ("full jitter")
+    :param statuses: response status codes to retry
+    :param methods: HTTP methods to retry, e.g.
+        ``IDEMPOTENT_METHODS | {'POST', 'PUT'}``
+    """
+
+    def __init__(self, total=3, backoff=0.5, cap=30, jitter=True,
+                 statuses=(500, 502, 503, 504), methods=IDEMPOTENT_METHODS):
+        self.total = total
+        self.backoff = backoff
+        self.cap = cap
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(method.upper() for method in methods)
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def can_retry(self, method, retries, connect=False):
+        """
+        Whether a ``method`` request that was retried ``retries`` times may be retried.
+
+        :param connect: the request failed to connect, so it was never sent
+            and can be retried whatever its method
+        """
+        return retries < self.total and (connect or method.upper() in self.methods)
+
+    def should_retry_status(self, method, status, retries):
+        return status in self.statuses and self.can_retry(method, retries)
+
+    def delay(self, retry, headers=None):
+        """Seconds to wait before the ``retry``-th retry (counting from 1)."""
+        delay = min(self.cap, self.backoff * 2 ** (retry - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+
+        retry_after = (headers or {}).get('Retry-After')
+        if retry_after is not None:
+            try:
+                delay = max(delay, min(self.cap, float(retry_after)))
+            except ValueError:
+                pass
+
+        return delay
+
+    def wait(self, retry, headers=None):
+        """Sleep before the ``retry``-th retry, return the seconds slept."""
+        delay = self.delay(retry, headers)
+        if delay > 0:
+            sleep(delay)
+        return delay
+
+    def record(self, retries, waited, failed):
+        """
+        Count a finished request.
+
+        :param retries: number of retries it took
+        :param waited: seconds spent backing off
+        :param failed: whether the request failed after all
+        """
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats['retries'] += retries
+            self._stats['backoff_seconds'] += waited
+            if retries:
+                self._stats['retried_requests'] += 1
+                if failed:
+                    self._stats['exhausted'] += 1
+
+    @property
+    def stats(self):
+        """
+        Snapshot of the retry counters.
+
+        ``requests`` finished requests, ``retried_requests`` of them needed at
+        least one retry and ``exhausted`` still failed after retrying.
+        ``retries`` counts all retries and ``backoff_seconds`` the latency
+        they added by backing off.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {
+                'requests': 0,
+                'retried_requests': 0,
+                'exhausted': 0,
+                'retries': 0,
+                'backoff_seconds': 0.0,
+            }
@@ -0,0 +1,131 @@
+"""
+Fixed memory summaries of large value streams.
+
+Used to describe custom fields with too many distinct values to collect,
+see :meth:`~closeio.CloseIO.custom_field_cardinality` and
+:meth:`~closeio.CloseIO.top_custom_field_values`.
+"""
+import hashlib
+import math
+
+from six import string_types
+
+from closeio.exceptions import CloseIOError
+
+_MASK = (1 << 64) - 1
+
+
+def _hash(value):
+    if isinstance(value, bytes):
+        data = value
+    elif isinstance(value, string_types):
+        data = value.encode('utf-8')
+    else:
+        data = repr(value).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+class HyperLogLog(object):
+    """
+    Estimate the number of distinct values added.
+
+    Uses ``2 ** precision`` one byte registers, the standard error of the
+    estimate is about ``1.04 / sqrt(2 ** precision)`` (0.8% for the
+    default of 14, in 16 KB).
+
+    :param precision: between 4 and 18
+    """
+
+    def __init__(self, precision=14):
+        if not 4 <= precision <= 18:
+            raise CloseIOError('precision must be between 4 and 18')
+
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value):
+        hashed = _hash(value)
+        index = hashed >> (64 - self.precision)
+        rest = (hashed << self.precision) & _MASK
+        rank = min(64 - rest.bit_length(), 64 - self.precision) + 1
+
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other):
+        """Add the values counted by ``other``, of the same precision."""
+        if other.precision != self.precision:
+            raise CloseIOError('cannot merge sketches of different precision')
+
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # linear counting is more accurate for small cardinalities
+            estimate = m * math.log(float(m) / zeros)
+
+        return int(round(estimate))
+
+    def __len__(self):
+        return self.count()
+
+
+class SpaceSaving(object):
+    """
+    Track the most frequent values added, with at most ``capacity``
+    counters.
+
+    Counts are upper bounds, overestimated by at most :meth:`error`.
+    Every value occurring more than ``total / capacity`` times is
+    guaranteed to be tracked.
+    """
+
+    def __init__(self, capacity=100):
+        if capacity < 1:
+            raise CloseIOError('capacity must be at least 1')
+
+        self.capacity = capacity
+        self.total = 0
+        self.counts = {}
+        self.errors = {}
+
+    def add(self, value, count=1):
+        self.total += count
+
+        if value in self.counts:
+            self.counts[value] += count
+            return
+
+        if len(self.counts) < self.capacity:
+            self.counts[value] = count
+            self.errors[value] = 0
+            return
+
+        # replace the least frequent value, whose count becomes the error
+        evicted = min(self.counts, key=self.counts.get)
+        minimum = self.counts.pop(evicted)
+        del self.errors[evicted]
+
+        self.counts[value] = minimum + count
+        self.errors[value] = minimum
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def error(self, value):
+        return self.errors.get(value, 0)
+
+    def top(self, n=None):
+        """Return up to ``n`` ``(value, count)`` pairs, most frequent first."""
+        items = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        return items[:n] if n is not None else items
@@ -0,0 +1,130 @@
+"""
+Thin HTTP transport for :class:`~closeio.CloseIO`.
+
+Endpoints are addressed like slumber resources (``api.lead('lead_1')``,
+``api.status.lead``), but an endpoint is just its URL and the session:
+children reached by attribute are created once and kept, request bodies
+and responses are encoded and decoded once with :mod:`closeio.codec`.
+
+Proxy and TLS settings from the environment are resolved on the first
+request of an API and reused, instead of on every request.
+
+Error responses raise the slumber exceptions, so
+:func:`~closeio.utils.convert_errors` handles them as before.
+"""
+import requests
+from slumber.exceptions import (
+    HttpClientError, HttpNotFoundError, HttpServerError
+)
+
+from closeio import codec
+
+HEADERS = {
+    'accept': 'application/json',
+    'content-type': 'application/json',
+}
+
+JSON_CONTENT_TYPES = frozenset([
+    'application/json',
+    'application/x-javascript',
+    'text/javascript',
+    'text/x-javascript',
+    'text/x-json',
+])
+
+
+class Endpoint(object):
+    """
+    The API path ``url``, requested with the ``requests`` ``session``.
+
+    :param session: ``requests.Session`` with the authentication set up
+    :param url: absolute URL ending with a slash
+    """
+
+    def __init__(self, session, url, _settings=None):
+        self._session = session
+        self._url = url if url.endswith('/') else url + '/'
+        # send() arguments shared by all endpoints of an API
+        self._settings = _settings if _settings is not None else {}
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        child = Endpoint(self._session, self._url + name + '/', self._settings)
+        # later lookups find the child without calling __getattr__
+        setattr(self, name, child)
+        return child
+
+    def __call__(self, id):
+        return Endpoint(self._session, '{}{}/'.format(self._url, id), self._settings)
+
+    def __repr__(self):
+        return '<Endpoint {}>'.format(self._url)
+
+    def url(self):
+        return self._url
+
+    def request(self, method, data=None, params=None):
+        """Send a request and return the response, raise for 4xx and 5xx."""
+        if data is not None:
+            data = codec.dumps(data)
+
+        session = self._session
+        settings = self._settings
+        if not settings:
+            settings.update(session.merge_environment_settings(
+                self._url, {}, None, None, None))
+
+        prepared = session.prepare_request(requests.Request(
+            method, self._url, data=data, params=params, headers=HEADERS))
+        response = session.send(prepared, **settings)
+
+        status = response.status_code
+        if 400 <= status <= 499:
+            exception_class = HttpNotFoundError if status == 404 else HttpClientError
+            raise exception_class(
+                'Client Error {}: {}'.format(status, self._url),
+                response=response, content=response.content)
+        if 500 <= status <= 599:
+            raise HttpServerError(
+                'Server Error {}: {}'.format(status, self._url),
+                response=response, content=response.content)
+
+        return response
+
+    def decode(self, response):
+        """
+        Return the decoded body of ``response``.
+
+        Like slumber, bodies that are not JSON are returned as bytes and
+        ``204`` and ``205`` responses as None.
+        """
+        if response.status_code in (204, 205):
+            return None
+
+        content = response.content
+        content_type = response.headers.get('content-type')
+        if not content or not content_type:
+            return content
+
+        if content_type.split(';')[0].strip() not in JSON_CONTENT_TYPES:
+            return content
+
+        try:
+            return codec.loads(content)
+        except ValueError:
+            return content
+
+    def get(self, **params):
+        return self.decode(self.request('GET', params=params))
+
+    def post(self, data=None, **params):
+        return self.decode(self.request('POST', data, params))
+
+    def put(self, data=None, **params):
+        return self.decode(self.request('PUT', data, params))
+
+    def delete(self, **params):
+        self.request('DELETE', params=params)
+        return True
@@ -1,14 +1,27 @@
+import collections
 import contextlib
+import logging
+import queue
+import re
+import threading
 import types
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, time
 from functools import wraps
+from time import sleep
 
 import dateutil.parser
 from six import string_types, text_type
 from slumber.exceptions import SlumberBaseException
 
+from closeio import codec, instrumentation
 from closeio.exceptions import CloseIOError, RateLimitError
 
+logger = logging.getLogger(__name__)
+
+# largest ``_limit`` close.io accepts for cursor paginated endpoints
+MAX_CURSOR_LIMIT = 100
+
 
 @contextlib.contextmanager
 def convert_errors():
@@ -20,30 +33,34 @@ def convert_errors():
 
     except SlumberBaseException as e:
         if hasattr(e, 'response'):
-
-            try:
-                error_info = e.response.json()
-                if e.response.status_code == 429:
-                    raise RateLimitError(**error_info['error'])
-                error_message = error_info['error']
-            except (ValueError, KeyError):
-                error_message = e.response.text
-
             request = e.response.request
             request_data = 'url: {}\nbody: {}'.format(
                 request.url,
                 request.body,
             )
-        else:
-            error_message = text_type(e)
-            request_data = ''
 
-        raise CloseIOError(error_message, e, request_data)
+            raise response_error(
+                e.response.status_code, e.response.text, request_data, e)
+
+        raise CloseIOError(text_type(e), e, '')
 
     except Exception as e:
         raise CloseIOError(text_type(e), e, '')
 
 
+def response_error(status_code, text, request_data, exception=None):
+    """Return the :class:`CloseIOError` for an error response from close.io."""
+    try:
+        error_info = codec.loads(text)
+        if status_code == 429:
+            return RateLimitError(**error_info['error'])
+        error_message = error_info['error']
+    except (ValueError, KeyError):
+        error_message = text
+
+    return CloseIOError(error_message, exception, request_data)
+
+
 def handle_errors(func):
     @wraps(func)
     def wrapped(*args, **kwargs):
@@ -59,42 +76,239 @@ class Item(dict):
         self.__dict__ = self
 
 
-def parse(value):  # NoQA
+class LazyItem(Item):
+    """
+    An :class:`Item` that parses its values when they are first accessed.
+
+    Values are kept as received and replaced by their parsed counterpart
+    on first read, so fields that are never accessed are never parsed.
+    Comparison and the ``dict`` API behave like :class:`Item`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        object.__setattr__(self, '_LazyItem__raw', set(dict.keys(self)))
+
+    def _decode(self, key):
+        value = parse(dict.__getitem__(self, key), lazy=True)
+        dict.__setitem__(self, key, value)
+        self.__raw.discard(key)
+        return value
+
+    def _decode_all(self):
+        for key in list(self.__raw):
+            self._decode(key)
+
+    def __getitem__(self, key):
+        if key in self.__raw:
+            return self._decode(key)
+        return dict.__getitem__(self, key)
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self.__raw.discard(key)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self.__raw.discard(key)
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+    def __delattr__(self, name):
+        try:
+            del self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __iter__(self):
+        return dict.__iter__(self)
+
+    def __eq__(self, other):
+        self._decode_all()
+        if isinstance(other, LazyItem):
+            other._decode_all()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        self._decode_all()
+        return dict.__repr__(self)
+
+    def __reduce__(self):
+        return self.__class__, (dict(self.items()),)
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        self[key] = default
+        return default
+
+    def pop(self, key, *args):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        return dict.pop(self, key, *args)
+
+    def popitem(self):
+        self._decode_all()
+        return dict.popitem(self)
+
+    def update(self, *args, **kwargs):
+        # dict.update bypasses __setitem__ and would leave the keys raw
+        if len(args) > 1:
+            raise TypeError('update expected at most 1 argument, got {}'.format(len(args)))
+        if args:
+            other = args[0]
+            if hasattr(other, 'keys'):
+                for key in other.keys():
+                    self[key] = other[key]
+            else:
+                for key, value in other:
+                    self[key] = value
+        for key, value in kwargs.items():
+            self[key] = value
+
+    if hasattr(dict, '__ior__'):
+        def __ior__(self, other):
+            self.update(other)
+            return self
+
+    def clear(self):
+        dict.clear(self)
+        self.__raw.clear()
+
+    def items(self):
+        self._decode_all()
+        return dict.items(self)
+
+    def values(self):
+        self._decode_all()
+        return dict.values(self)
+
+    def copy(self):
+        self._decode_all()
+        return dict.copy(self)
+
+
+ISO_8601_RE = re.compile(
+    r'(?P<date>\d{4}-\d{2}-\d{2})'
+    r'(?P<datetime>T\d{2}:\d{2}:\d{2}(?:\.\d{6})?(?:[+-]\d{2}:\d{2})?)?'
+    r'|(?P<time>\d{2}:\d{2}:\d{2}(?:\.\d{6})?)'
+)
+
+
+def parse_datetime(value):
+    """
+    Convert an ISO-8601 string to a ``datetime``, ``date`` or ``time``.
+
+    Only strings that match the shape produced by ``isoformat()`` are
+    considered, and they are only converted if ``isoformat()`` reproduces
+    the input. Every other value is returned unchanged.
+    """
+    match = ISO_8601_RE.fullmatch(value)
+    if match is None:
+        return value
+
+    if match.group('datetime'):
+        from_iso = _datetime_fromisoformat
+    elif match.group('date'):
+        from_iso = _date_fromisoformat
+    else:
+        from_iso = _time_fromisoformat
+
+    try:
+        parsed = from_iso(value)
+    except (ValueError, OverflowError):
+        return value
+
+    if parsed.isoformat() == value:
+        return parsed
+
+    return value
+
+
+def _legacy_fromisoformat(cls):
+    # Python < 3.7 has no ``fromisoformat``
+    def from_iso(value):
+        parsed = dateutil.parser.parse(value)
+        if cls is date:
+            return parsed.date()
+        if cls is time:
+            return parsed.time()
+        return parsed
+
+    return from_iso
+
+
+_datetime_fromisoformat = getattr(datetime, 'fromisoformat', _legacy_fromisoformat(datetime))
+_date_fromisoformat = getattr(date, 'fromisoformat', _legacy_fromisoformat(date))
+_time_fromisoformat = getattr(time, 'fromisoformat', _legacy_fromisoformat(time))
+
+
+def parse(value, lazy=False, record=None):  # NoQA
+    """
+    Convert a decoded close.io response into :class:`Item` objects.
+
+    With ``lazy=True`` mappings become :class:`LazyItem` objects that
+    parse their values on first access instead of up front. If a
+    :class:`~closeio.records.Record` type is given, mappings are parsed
+    into records of that type instead.
+    """
+    if isinstance(value, string_types):
+        return parse_datetime(value)
+
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+
+    if lazy and isinstance(value, LazyItem):
+        return value
+
+    if record is not None and hasattr(value, 'items'):
+        return record.from_response(value)
+
     try:
+        items = value.items()
+    except AttributeError:
+        pass
+    else:
+        if lazy:
+            return LazyItem(items)
+
         return Item({
             key: parse(value)
-            for key, value in value.items()
+            for key, value in items
         })
-    except AttributeError:
-        pass
 
     if isinstance(value, types.GeneratorType):
         return (
-            parse(item)
+            parse(item, lazy, record)
             for item in value
         )
 
-    if not isinstance(value, string_types):
-        try:
-            return [
-                parse(item)
-                for item in value
-            ]
-        except TypeError:
-            pass
-
     try:
-        parsed = dateutil.parser.parse(value)
-
-        if parsed.isoformat() == value:
-            return parsed
-
-        if parsed.date().isoformat() == value:
-            return parsed.date()
-        if parsed.time().isoformat() == value:
-            return parsed.time()
-
-    except (TypeError, AttributeError, ValueError, OverflowError):
+        return [
+            parse(item, lazy, record)
+            for item in value
+        ]
+    except TypeError:
         pass
 
     return value
@@ -124,14 +338,67 @@ def convert(value):
     return value
 
 
+def custom_field_values(lead, fieldname):
+    """
+    Return the raw values of custom field ``fieldname`` in ``lead``.
+
+    Understands leads projected with ``_fields=custom.<name>`` as well as
+    the full ``custom`` dict. List values yield one entry per item.
+    """
+    key = 'custom.' + fieldname
+    if key in lead:
+        value = lead[key]
+    else:
+        value = (lead.get('custom') or {}).get(fieldname)
+
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [item for item in value if item is not None]
+    return [value]
+
+
+class Parsed(object):
+    """Already parsed response, returned by :func:`parse_response` as is."""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+
 def parse_response(func):
     @wraps(func)
-    def wrapped(*args, **kwargs):
-        return parse(func(*args, **kwargs))
+    def wrapped(self, *args, **kwargs):
+        response = instrumentation.call(func.__name__, func, self, *args, **kwargs)
+        if isinstance(response, Parsed):
+            return response.value
+
+        if instrumentation.listeners and isinstance(response, types.GeneratorType):
+            response = instrumentation.iterate(func.__name__, response)
+
+        return parse(
+            response,
+            lazy=getattr(self, '_lazy', False),
+            record=getattr(self, '_record_types', {}).get(func.__name__),
+        )
 
     return wrapped
 
 
+def _fetch_page(func, *args, **kwargs):
+    with convert_errors():
+        response = func(*args, **kwargs)
+
+    if not isinstance(response, dict):
+        raise CloseIOError(
+            'close.io response is not a dict, '
+            'so most likely could not be parsed. \n'
+            'body "{}"'.format(response)
+        )
+
+    return response
+
+
 def paginate(func, *args, **kwargs):
     skip = 0
     limit = 100
@@ -140,15 +407,7 @@ def paginate(func, *args, **kwargs):
         kwargs['_skip'] = skip
         kwargs['_limit'] = limit
 
-        with convert_errors():
-            response = func(*args, **kwargs)
-
-        if not isinstance(response, dict):
-            raise CloseIOError(
-                'close.io response is not a dict, '
-                'so most likely could not be parsed. \n'
-                'body "{}"'.format(response)
-            )
+        response = instrumentation.fetch_page(skip // limit, _fetch_page, func, *args, **kwargs)
 
         for item in response['data']:
             yield item
@@ -160,30 +419,164 @@ def paginate(func, *args, **kwargs):
             skip += limit
 
 
-def paginate_via_cursor(func, *args, **kwargs):
+def paginate_concurrently(func, window, *args, **kwargs):
+    """
+    Like :func:`paginate`, but keeps up to ``window`` pages in flight.
+
+    The first page is fetched on its own. After that, the following pages
+    are requested on a thread pool while earlier ones are yielded, in
+    their original order. No further pages are requested once a page
+    reports ``has_more`` false or ``total_results`` is reached. A rate
+    limit response halves the window and retries the page after
+    ``rate_reset``, pages that were in flight with the larger window are
+    retried without shrinking it again. It is only raised once the window
+    is down to one.
+    """
+    limit = 100
+
+    def fetch(skip):
+        return instrumentation.fetch_page(
+            skip // limit, _fetch_page, func, *args, **dict(kwargs, _skip=skip, _limit=limit))
+
+    response = fetch(0)
+    for item in response['data']:
+        yield item
+
+    if not response['has_more']:
+        return
+
+    total = response.get('total_results')
+    next_skip = limit
+    pending = collections.deque()
+    executor = ThreadPoolExecutor(max_workers=window)
+
+    try:
+        while True:
+            while len(pending) < window and (total is None or next_skip < total):
+                pending.append((next_skip, window, executor.submit(
+                    instrumentation.copy_context().run, fetch, next_skip)))
+                next_skip += limit
+
+            if not pending:
+                break
+
+            skip, issued_window, future = pending.popleft()
+            try:
+                response = future.result()
+            except RateLimitError as e:
+                if issued_window == 1:
+                    raise
+
+                # only the first rate limited request of a window shrinks it and
+                # waits, the ones issued before that are retried right away
+                if issued_window == window:
+                    window = max(1, window // 2)
+                    logger.info(
+                        'close.io rate limit hit, reducing pagination window to %d', window)
+                    sleep(e.rate_reset)
+
+                pending.appendleft((skip, window, executor.submit(
+                    instrumentation.copy_context().run, fetch, skip)))
+                continue
+
+            for item in response['data']:
+                yield item
+
+            if not response['has_more']:
+                break
+
+    finally:
+        for _, _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def _cursor_pages(func, *args, **kwargs):
     cursor = ''
-    limit = 50
+    limit = kwargs.pop('_limit', 50)
 
+    if not 0 < limit <= MAX_CURSOR_LIMIT:
+        raise CloseIOError(
+            '_limit must be between 1 and {}'.format(MAX_CURSOR_LIMIT))
+
+    page = 0
     while True:
         kwargs['_cursor'] = cursor
         kwargs['_limit'] = limit
 
-        with convert_errors():
-            response = func(*args, **kwargs)
+        response = instrumentation.fetch_page(page, _fetch_page, func, *args, **kwargs)
+        yield response
+        page += 1
 
-        if not isinstance(response, dict):
-            raise CloseIOError(
-                'close.io response is not a dict, '
-                'so most likely could not be parsed. \n'
-                'body "{}"'.format(response)
-            )
+        cursor = response['cursor_next']
+        if not cursor:
+            break
 
+
+def paginate_via_cursor(func, *args, **kwargs):
+    for response in _cursor_pages(func, *args, **kwargs):
         for item in response['data']:
             yield item
 
-        cursor = response['cursor_next']
-        if not cursor:
-            break
+
+def paginate_via_cursor_read_ahead(func, pages, *args, **kwargs):
+    """
+    Like :func:`paginate_via_cursor`, but fetches up to ``pages`` pages
+    ahead on a background thread while the caller consumes the current one.
+
+    Errors are raised once the pages before the failing one are consumed.
+    """
+    for response in read_ahead(_cursor_pages(func, *args, **kwargs), pages):
+        for item in response['data']:
+            yield item
+
+
+def read_ahead(iterable, size):
+    """
+    Iterate ``iterable`` on a background thread, up to ``size`` items ahead.
+
+    Exceptions raised by ``iterable`` are re-raised in the caller at the
+    position they occurred. Closing the returned generator stops the
+    background thread.
+    """
+    buffer = queue.Queue(maxsize=size)
+    stopped = threading.Event()
+    end = object()
+
+    def put(entry):
+        while not stopped.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def worker():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except Exception as e:
+            put((end, e))
+        else:
+            put((end, None))
+
+    thread = threading.Thread(
+        target=instrumentation.copy_context().run, args=(worker,), name='closeio-read-ahead',
+        daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item, error = buffer.get()
+            if item is end:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stopped.set()
 
 
 class DummyCookieJar(object):
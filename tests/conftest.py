@@ -0,0 +1,120 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from closeio import CloseIO
+from closeio.ratelimit import RateLimiter
+
+
+class FakeAPI(object):
+    """
+    Local HTTP server standing in for the close.io API.
+
+    Register responses with :meth:`add`; every request is recorded in
+    :attr:`requests` as ``(method, path, query, body)`` and its headers
+    in :attr:`request_headers`.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.request_headers = []
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return 'http://{}:{}/api/v1/'.format(host, port)
+
+    def add(self, method, path, body=None, status=200, headers=None):
+        """
+        Answer ``method`` requests to ``path`` (relative to the API root).
+
+        ``body`` may be a callable taking ``(query, body)`` and returning
+        ``(status, body)`` or ``(status, body, headers)``.
+        """
+        self.routes[method, '/api/v1/' + path] = (status, body, headers or {})
+
+    def respond(self, method, path, query, body, headers=None):
+        self.requests.append((method, path, query, body))
+        self.request_headers.append(headers or {})
+
+        try:
+            status, response, headers = self.routes[method, path]
+        except KeyError:
+            return 404, {'error': 'Not found'}, {}
+
+        if callable(response):
+            result = response(query, body)
+            if len(result) == 2:
+                return result + ({},)
+            return result
+
+        return status, response, headers
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _respond(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+
+                status, response, headers = api.respond(
+                    self.command, url.path, parse_qs(url.query), body, dict(self.headers))
+
+                if isinstance(response, bytes):
+                    content = response
+                else:
+                    content = json.dumps(response).encode('utf-8') if response is not None else b''
+
+                self.send_response(status)
+                headers = dict({'Content-Type': 'application/json'}, **headers)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def fake_api():
+    api = FakeAPI()
+    api.start()
+    yield api
+    api.stop()
+
+
+@pytest.fixture(autouse=True)
+def rate_limiters():
+    # limiters are shared per API key, don't leak limits between tests
+    RateLimiter._shared.clear()
+    yield
+    RateLimiter._shared.clear()
+
+
+@pytest.fixture(autouse=True)
+def shared_pools():
+    CloseIO._shared_pools.clear()
+    yield
+    CloseIO._shared_pools.clear()
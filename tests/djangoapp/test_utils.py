@@ -48,6 +48,18 @@ class TestCloseioWebhookPermission:
         with pytest.raises(ImproperlyConfigured):
             webhook_signature_valid(request)
 
+    def test_errors_because_signature_keys_are_not_json(self, rf, settings, headers, payload):
+        """Should raise an error if the signature keys cannot be decoded."""
+        settings.CLOSEIO_WEBHOOK_SIGNATURE_KEYS = '{"whsub_mBTylJxRXaBOXcuQmgUdmL": '
+
+        request = rf.post('/some/webhook/view', payload, **headers)
+        with pytest.raises(ImproperlyConfigured):
+            webhook_signature_valid(request)
+
+    def test_invalid_payload(self, rf, webhook_settings, headers):
+        request = rf.post('/some/webhook/view', '{"event": ', **headers)
+        assert webhook_signature_valid(request) is False
+
     def test_errors_because_signature_key_is_not_hex(self, rf, settings, headers, payload):
         """Should fail if the signature key is not a valid hex string."""
         webhook_id = 'whsub_mBTylJxRXaBOXcuQmgUdmL'
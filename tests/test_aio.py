@@ -0,0 +1,280 @@
+import asyncio
+import datetime
+
+import pytest
+
+from closeio import instrumentation
+from closeio.exceptions import CloseIOError, RateLimitError
+from closeio.records import Lead
+from closeio.retry import RetryPolicy
+from closeio.utils import Item
+
+aio = pytest.importorskip('closeio.aio')
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+@pytest.fixture
+def client(fake_api):
+    return aio.AsyncCloseIO('key', base_url=fake_api.url)
+
+
+@pytest.fixture
+def events():
+    events = []
+    instrumentation.add_listener(events.append)
+    yield events
+    instrumentation.remove_listener(events.append)
+
+
+class TestAsyncCloseIO:
+    def test_get_lead(self, fake_api, client):
+        fake_api.add('GET', 'lead/lead_1/', {
+            'id': 'lead_1',
+            'date_created': '2013-02-01T00:54:51.333000+00:00',
+        })
+
+        async def get_lead():
+            async with client:
+                return await client.get_lead('lead_1')
+
+        lead = run(get_lead())
+        assert isinstance(lead, Item)
+        assert lead.date_created == datetime.datetime(
+            2013, 2, 1, 0, 54, 51, 333000, tzinfo=datetime.timezone.utc)
+
+    def test_get_leads(self, fake_api, client):
+        def leads(query, body):
+            skip = int(query['_skip'][0])
+            assert query['query'] == ['name:Wayne']
+            return 200, {
+                'has_more': skip == 0,
+                'data': [{'id': 'lead_{}'.format(skip)}],
+            }
+
+        fake_api.add('GET', 'lead/', leads)
+
+        async def get_leads():
+            async with client:
+                return await collect(client.get_leads(query='name:Wayne'))
+
+        assert run(get_leads()) == [{'id': 'lead_0'}, {'id': 'lead_100'}]
+
+    def test_get_event_logs(self, fake_api, client):
+        def events(query, body):
+            cursor = query.get('_cursor', [''])[0]
+            return 200, {
+                'cursor_next': '' if cursor else 'next',
+                'data': [{'id': 'ev_{}'.format(cursor)}],
+            }
+
+        fake_api.add('GET', 'event/', events)
+
+        async def get_event_logs():
+            async with client:
+                return await collect(client.get_event_logs())
+
+        assert run(get_event_logs()) == [{'id': 'ev_'}, {'id': 'ev_next'}]
+
+    def test_create_lead(self, fake_api):
+        fake_api.add('POST', 'lead/', lambda query, body: (200, dict(body, id='lead_1')))
+        client = aio.AsyncCloseIO('key', base_url=fake_api.url, records=True)
+
+        async def create_lead():
+            async with client:
+                return await client.create_lead({
+                    'name': 'Wayne',
+                    'custom': {'date': datetime.date(1988, 11, 19)},
+                })
+
+        lead = run(create_lead())
+        assert isinstance(lead, Lead)
+        assert lead.custom['date'] == datetime.date(1988, 11, 19)
+        assert fake_api.requests[0][3] == {'name': 'Wayne', 'custom': {'date': '1988-11-19'}}
+
+    def test_delete_lead(self, fake_api, client):
+        fake_api.add('DELETE', 'lead/lead_1/', None, status=204)
+
+        async def delete_lead():
+            async with client:
+                return await client.delete_lead('lead_1')
+
+        assert run(delete_lead()) is True
+
+    def test_error(self, fake_api, client):
+        fake_api.add('GET', 'lead/lead_1/', {'error': 'Not allowed'}, status=403)
+
+        async def get_lead():
+            async with client:
+                return await client.get_lead('lead_1')
+
+        with pytest.raises(CloseIOError) as exc:
+            run(get_lead())
+
+        message, error, request_data = exc.value.args
+        assert message == 'Not allowed'
+        assert error.status == 403
+        assert request_data.startswith('url: {}lead/lead_1/'.format(fake_api.url))
+
+    def test_rate_limit_error(self, fake_api):
+        fake_api.add('GET', 'lead/', {'error': {
+            'message': 'API call count exceeded for this period', 'rate_reset': 0.8,
+            'rate_limit': 40, 'rate_window': 1, 'rate_limit_type': 'key',
+        }}, status=429)
+        client = aio.AsyncCloseIO('key', rate_limit_deadline=0, base_url=fake_api.url)
+
+        async def get_leads():
+            async with client:
+                return await collect(client.get_leads())
+
+        with pytest.raises(RateLimitError) as exc:
+            run(get_leads())
+
+        assert exc.value.rate_limit == 40
+
+    def test_rate_limit_retried(self, fake_api, client):
+        responses = [
+            (429, {'error': {'message': 'API call count exceeded', 'rate_reset': 0.1}}),
+            (200, {'id': 'lead_1'}),
+        ]
+        fake_api.add('GET', 'lead/lead_1/', lambda query, body: responses.pop(0))
+
+        async def get_lead():
+            async with client:
+                return await client.get_lead('lead_1')
+
+        assert run(get_lead()) == {'id': 'lead_1'}
+        assert len(fake_api.requests) == 2
+
+    def test_server_error_retried(self, fake_api):
+        responses = [(503, {'error': 'Service unavailable'}), (200, {'id': 'lead_1'})]
+        fake_api.add('GET', 'lead/lead_1/', lambda query, body: responses.pop(0))
+        client = aio.AsyncCloseIO(
+            'key', retry_policy=RetryPolicy(backoff=0), base_url=fake_api.url)
+
+        async def get_lead():
+            async with client:
+                return await client.get_lead('lead_1')
+
+        assert run(get_lead()) == {'id': 'lead_1'}
+        assert client.retry_policy.stats['retries'] == 1
+
+    def test_connection_error(self):
+        client = aio.AsyncCloseIO(
+            'key', retry_policy=RetryPolicy(backoff=0), base_url='http://127.0.0.1:1/api/v1/')
+
+        async def get_lead():
+            async with client:
+                return await client.get_lead('lead_1')
+
+        with pytest.raises(CloseIOError):
+            run(get_lead())
+
+        assert client.retry_policy.stats['exhausted'] == 1
+
+    def test_post_connect_error_retried(self):
+        client = aio.AsyncCloseIO(
+            'key', retry_policy=RetryPolicy(total=2, backoff=0),
+            base_url='http://127.0.0.1:1/api/v1/')
+
+        async def create_lead():
+            async with client:
+                return await client.create_lead({'name': 'Wayne Enterprises'})
+
+        with pytest.raises(CloseIOError):
+            run(create_lead())
+
+        assert client.retry_policy.stats['retries'] == 2
+
+
+class TestInstrumentation:
+    def test_get_lead(self, fake_api, client, events):
+        fake_api.add('GET', 'lead/lead_1/', {'id': 'lead_1'})
+
+        async def get_lead():
+            async with client:
+                return await client.get_lead('lead_1')
+
+        run(get_lead())
+
+        event, = events
+        assert event.method == 'get_lead'
+        assert event.http_method == 'GET'
+        assert event.endpoint == 'lead/{id}/'
+        assert event.url == fake_api.url + 'lead/lead_1/'
+        assert event.status == 200
+        assert event.bytes_sent == 0
+        assert event.bytes_received == len(b'{"id": "lead_1"}')
+        assert event.seconds > 0
+        assert event.retries == 0
+        assert event.page is None
+        assert event.error is None
+
+    def test_pages(self, fake_api, client, events):
+        fake_api.add('GET', 'lead/', lambda query, body: (200, {
+            'has_more': query['_skip'] == ['0'], 'data': [{'id': 'lead_1'}]}))
+
+        async def get_leads():
+            async with client:
+                return await collect(client.get_leads())
+
+        run(get_leads())
+
+        assert [(event.method, event.page) for event in events] == [
+            ('get_leads', 0), ('get_leads', 1)]
+
+    def test_retries(self, fake_api, client, events):
+        responses = [
+            (429, {'error': {'message': 'API call count exceeded', 'rate_reset': 0.01}}),
+            (200, {'id': 'lead_1'}),
+        ]
+        fake_api.add('GET', 'lead/lead_1/', lambda query, body: responses.pop(0))
+
+        async def get_lead():
+            async with client:
+                return await client.get_lead('lead_1')
+
+        run(get_lead())
+
+        event, = events
+        assert event.status == 200
+        assert event.retries == 1
+
+    def test_error_status(self, fake_api, client, events):
+        fake_api.add('POST', 'lead/', {'error': 'Not allowed'}, status=403)
+
+        async def create_lead():
+            async with client:
+                return await client.create_lead({'name': 'Wayne'})
+
+        with pytest.raises(CloseIOError):
+            run(create_lead())
+
+        event, = events
+        assert event.method == 'create_lead'
+        assert event.status == 403
+        assert event.bytes_sent == len(b'{"name":"Wayne"}')
+        assert event.error is None
+
+    def test_connection_error(self, events):
+        client = aio.AsyncCloseIO(
+            'key', retry_policy=RetryPolicy(total=1, backoff=0),
+            base_url='http://127.0.0.1:1/api/v1/')
+
+        async def get_lead():
+            async with client:
+                return await client.get_lead('lead_1')
+
+        with pytest.raises(CloseIOError):
+            run(get_lead())
+
+        event, = events
+        assert event.status is None
+        assert event.retries == 1
+        assert isinstance(event.error, aio.aiohttp.ClientConnectionError)
@@ -0,0 +1,153 @@
+import threading
+import time
+
+import pytest
+
+from closeio import CloseIO
+from closeio.bulk import (
+    BatchExecutor, BatchResult, BulkResult, Operation, bulk
+)
+from closeio.exceptions import CloseIOError
+
+
+class TestBulk:
+    def test_results(self):
+        def double(key, value):
+            if value < 0:
+                raise CloseIOError('negative')
+            return value * 2
+
+        results = {result.id: result for result in bulk(double, [('a', 1), ('b', -1), ('c', 3)])}
+
+        assert results['a'] == BulkResult('a', 2, None)
+        assert results['c'] == BulkResult('c', 6, None)
+        assert results['b'].result is None
+        assert isinstance(results['b'].error, CloseIOError)
+
+    def test_bounded_concurrency(self):
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def call(key):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            return key
+
+        results = list(bulk(call, ((i,) for i in range(40)), concurrency=4))
+
+        assert sorted(result.result for result in results) == list(range(40))
+        assert peak[0] == 4
+
+    def test_consumes_input_lazily(self):
+        pulled = []
+
+        def calls():
+            for i in range(1000):
+                pulled.append(i)
+                yield (i,)
+
+        results = bulk(lambda key: key, calls(), concurrency=3)
+        next(results)
+        results.close()
+
+        assert len(pulled) <= 6
+
+    def test_unexpected_errors_raised(self):
+        def call(key):
+            raise ValueError(key)
+
+        with pytest.raises(ValueError):
+            list(bulk(call, [('a',)]))
+
+    def test_invalid_concurrency(self):
+        with pytest.raises(CloseIOError):
+            list(bulk(lambda key: key, [('a',)], concurrency=0))
+
+
+class TestBulkUpdateLeads:
+    def test_update(self, fake_api):
+        for i in range(5):
+            fake_api.add('PUT', 'lead/lead_{}/'.format(i), lambda query, body: (200, body))
+
+        client = CloseIO('key', base_url=fake_api.url)
+        updates = (('lead_{}'.format(i), {'name': 'Lead {}'.format(i)}) for i in range(6))
+        results = {result.id: result for result in client.bulk_update_leads(updates, 3)}
+
+        assert len(results) == 6
+        assert results['lead_3'].result == {'name': 'Lead 3'}
+        assert results['lead_3'].error is None
+        assert isinstance(results['lead_5'].error, CloseIOError)
+
+
+class TestBatchExecutor:
+    def calls(self, count):
+        return (
+            Operation('create_activity_call', kwargs={'lead_id': 'lead_{}'.format(i)})
+            for i in range(count)
+        )
+
+    def test_run(self, fake_api):
+        def create_call(query, body):
+            if body['lead_id'] == 'lead_2':
+                return 400, {'error': 'Invalid lead'}
+            return 200, dict(body, id='acti_' + body['lead_id'])
+
+        fake_api.add('POST', 'activity/call/', create_call)
+        executor = BatchExecutor(CloseIO('key', base_url=fake_api.url), concurrency=3)
+
+        results = sorted(executor.run(self.calls(10)))
+
+        assert [result.index for result in results] == list(range(10))
+        for result in results:
+            assert result.operation.kwargs['lead_id'] == 'lead_{}'.format(result.index)
+        assert results[0].result == {'lead_id': 'lead_0', 'id': 'acti_lead_0'}
+        assert results[2].result is None
+        assert isinstance(results[2].error, CloseIOError)
+
+        stats = executor.stats
+        assert stats['succeeded'] == 9
+        assert stats['failed'] == 1
+        assert stats['throughput'] > 0
+
+    def test_tuples(self, fake_api):
+        fake_api.add('DELETE', 'task/task_1/', None)
+        executor = BatchExecutor(CloseIO('key', base_url=fake_api.url))
+
+        assert list(executor.run([('delete_task', ('task_1',))])) == [
+            BatchResult(0, Operation('delete_task', ('task_1',)), True, None),
+        ]
+
+    def test_fail_fast(self, fake_api):
+        fake_api.add('POST', 'activity/call/', {'error': 'Invalid lead'}, status=400)
+        executor = BatchExecutor(
+            CloseIO('key', base_url=fake_api.url), concurrency=2, fail_fast=True)
+
+        with pytest.raises(CloseIOError):
+            list(executor.run(self.calls(100)))
+
+        assert len(fake_api.requests) < 100
+        assert executor.stats['succeeded'] == 0
+
+    def test_unknown_method(self, fake_api):
+        fake_api.add('DELETE', 'task/task_1/', None)
+        executor = BatchExecutor(CloseIO('key', base_url=fake_api.url))
+
+        results = sorted(executor.run([
+            Operation('_api'), Operation('delete_task', ('task_1',)), Operation('missing'),
+        ]))
+
+        assert [result.result for result in results] == [None, True, None]
+        assert isinstance(results[0].error, CloseIOError)
+        assert isinstance(results[2].error, CloseIOError)
+        assert executor.stats['failed'] == 2
+
+    def test_unknown_method_fail_fast(self):
+        executor = BatchExecutor(CloseIO('key'), fail_fast=True)
+
+        with pytest.raises(CloseIOError):
+            list(executor.run([Operation('_api')]))
@@ -0,0 +1,230 @@
+import threading
+import time
+
+import pytest
+
+from closeio import CloseIO
+from closeio.cache import CachedValue, MembershipIndex, TTLCache
+from closeio.exceptions import CloseIOError
+
+ORGANIZATION = {
+    'id': 'orga_1',
+    'memberships': [
+        {'user_id': 'user_1', 'user_email': 'Bruce@Wayne.com ',
+         'user_full_name': 'Bruce Wayne', 'role_id': 'admin'},
+        {'user_id': 'user_2', 'user_email': 'alfred@wayne.com',
+         'user_full_name': 'Alfred Pennyworth', 'role_id': 'user'},
+    ],
+}
+
+
+class TestCachedValue:
+    def test_ttl(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr('closeio.cache.monotonic', lambda: now[0])
+        calls = []
+        value = CachedValue(lambda: calls.append(1) or len(calls), ttl=10)
+
+        assert value.get() == 1
+        now[0] += 9
+        assert value.get() == 1
+        now[0] += 1
+        assert value.get() == 2
+
+    def test_invalidate(self):
+        calls = []
+        value = CachedValue(lambda: calls.append(1) or len(calls), ttl=60)
+
+        assert value.get() == 1
+        value.invalidate()
+        assert value.get() == 2
+
+    def test_invalidate_while_loading(self):
+        loading = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def load():
+            calls.append(1)
+            if len(calls) == 1:
+                loading.set()
+                release.wait(5)
+                return 'stale'
+            return 'fresh'
+
+        value = CachedValue(load, ttl=60)
+        results = []
+        thread = threading.Thread(target=lambda: results.append(value.get()))
+        thread.start()
+        loading.wait(5)
+
+        value.invalidate()
+        release.set()
+        thread.join()
+
+        assert results == ['stale']
+        assert value.get() == 'fresh'
+        assert value.get() == 'fresh'
+        assert len(calls) == 2
+
+    def test_single_flight(self):
+        calls = []
+
+        def load():
+            calls.append(1)
+            time.sleep(0.05)
+            return 'value'
+
+        value = CachedValue(load, ttl=60)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(value.get()))
+                   for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ['value'] * 10
+        assert len(calls) == 1
+
+
+class TestMembershipIndex:
+    def test_lookups(self):
+        index = MembershipIndex([('orga_1', ORGANIZATION)])
+
+        assert index.user_ids(' bruce@wayne.COM') == ['user_1']
+        assert index.user_ids('joker@arkham.com') == []
+        assert index.find_name('Alfred Pennyworth') == ('orga_1', 'user_2')
+        assert index.find_name('alfred pennyworth') is None
+        assert index.memberships['orga_1', 'user_1']['role_id'] == 'admin'
+
+
+class TestCloseIOMemberships:
+    @pytest.fixture
+    def client(self, fake_api):
+        fake_api.add('GET', 'me/', {'memberships': [{'organization_id': 'orga_1'}]})
+        fake_api.add('GET', 'organization/orga_1/', ORGANIZATION)
+        fake_api.add('GET', 'user/user_2/', {'id': 'user_2', 'first_name': 'Alfred'})
+        return CloseIO('key', base_url=fake_api.url)
+
+    def test_find_user_id_cached(self, fake_api, client):
+        assert client.find_user_id('bruce@wayne.com') == 'user_1'
+        assert client.find_user_id('alfred@wayne.com') == 'user_2'
+        assert client.user_exists('BRUCE@wayne.com')
+        assert not client.user_exists('joker@arkham.com')
+
+        assert len(fake_api.requests) == 2
+
+    def test_find_user(self, fake_api, client):
+        user = client.find_user('Alfred Pennyworth')
+
+        assert user == {
+            'id': 'user_2', 'first_name': 'Alfred', 'email': 'alfred@wayne.com',
+            'full_name': 'Alfred Pennyworth',
+        }
+        assert [path for _, path, _, _ in fake_api.requests] == [
+            '/api/v1/me/', '/api/v1/organization/orga_1/', '/api/v1/user/user_2/',
+        ]
+
+        with pytest.raises(CloseIOError):
+            client.find_user('Joker')
+
+    def test_invalidate(self, fake_api, client):
+        client.find_user_id('bruce@wayne.com')
+        client.invalidate_memberships()
+        client.find_user_id('bruce@wayne.com')
+
+        assert len(fake_api.requests) == 4
+
+
+class TestTTLCache:
+    def test_per_key(self):
+        calls = []
+
+        def load(key):
+            calls.append(key)
+            return key.upper()
+
+        cache = TTLCache(ttl=60)
+        assert cache.get('a', load) == 'A'
+        assert cache.get('b', load) == 'B'
+        assert cache.get('a', load) == 'A'
+        assert calls == ['a', 'b']
+
+        cache.invalidate('a')
+        cache.get('a', load)
+        cache.get('b', load)
+        assert calls == ['a', 'b', 'a']
+
+
+class TestOrganizationUsers:
+    @pytest.fixture
+    def client(self, fake_api):
+        memberships = [
+            {'user_id': 'user_{}'.format(i), 'user_email': 'user{}@wayne.com'.format(i)}
+            for i in range(20)
+        ]
+        fake_api.add('GET', 'organization/orga_1/', {'id': 'orga_1', 'memberships': memberships})
+        for i in range(20):
+            fake_api.add('GET', 'user/user_{}/'.format(i), {'id': 'user_{}'.format(i)})
+        return CloseIO('key', base_url=fake_api.url)
+
+    def test_hydrated_in_order(self, fake_api, client):
+        users = client.get_organization_users('orga_1', concurrency=4)
+
+        assert users == [
+            {'id': 'user_{}'.format(i), 'email': 'user{}@wayne.com'.format(i)}
+            for i in range(20)
+        ]
+        assert len(fake_api.requests) == 21
+
+        client.get_organization_users('orga_1')
+        assert len(fake_api.requests) == 22
+
+    def test_not_hydrated(self, fake_api, client):
+        users = client.get_organization_users('orga_1', hydrate=False)
+
+        assert users[3] == {'id': 'user_3', 'email': 'user3@wayne.com'}
+        assert len(fake_api.requests) == 1
+
+
+class TestCatalogs:
+    @pytest.fixture
+    def client(self, fake_api):
+        statuses = [
+            {'id': 'stat_1', 'label': 'Potential'},
+            {'id': 'stat_2', 'label': 'Qualified'},
+        ]
+        fake_api.add('GET', 'status/lead/', lambda query, body: (
+            200, {'has_more': False, 'data': statuses}))
+        fake_api.add('POST', 'status/lead/', lambda query, body: (
+            200, statuses.append(dict(body, id='stat_3')) or statuses[-1]))
+        fake_api.add('GET', 'email_template/', {'has_more': False, 'data': [
+            {'id': 'tmpl_1', 'name': 'Welcome'},
+        ]})
+        return CloseIO('key', base_url=fake_api.url)
+
+    def test_find_lead_status_cached(self, fake_api, client):
+        assert client.find_lead_status('Qualified') == {'id': 'stat_2', 'label': 'Qualified'}
+        assert client.find_lead_status('Potential').id == 'stat_1'
+        assert client.get_lead_status('stat_2').label == 'Qualified'
+        assert len(fake_api.requests) == 1
+
+        with pytest.raises(CloseIOError):
+            client.find_lead_status('Won')
+
+    def test_returns_copies(self, client):
+        client.find_lead_status('Qualified').label = 'Changed'
+        assert client.find_lead_status('Qualified').label == 'Qualified'
+
+    def test_create_invalidates(self, fake_api, client):
+        client.find_lead_status('Qualified')
+        client.create_lead_status('Won')
+
+        assert client.find_lead_status('Won').id == 'stat_3'
+        assert len(fake_api.requests) == 3
+
+    def test_find_email_template(self, fake_api, client):
+        assert client.find_email_template('Welcome').id == 'tmpl_1'
+        assert client.find_email_template('Welcome').id == 'tmpl_1'
+        assert len(fake_api.requests) == 1
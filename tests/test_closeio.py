@@ -5,12 +5,15 @@ test_closeio
 Tests for `closeio` module.
 """
 import datetime
+import json
 import types
 import unittest
 
 from dateutil.tz import tzutc
 
-from closeio.utils import convert, parse
+from closeio import CloseIO
+from closeio.codec import dumps
+from closeio.utils import convert, parse, parse_datetime
 
 LEAD = {
     "status_id": "stat_1ZdiZqcSIkoGVnNOyxiEY58eTGQmFNG3LPlEVQ4V7Nk",
@@ -111,12 +114,53 @@ class TestCloseio(unittest.TestCase):
         self.assertEqual(list(p_gen), [x for x in range(10)])
         self.assertIsInstance(p_gen, types.GeneratorType)
 
+    def test_parse_datetime(self):
+        assert parse_datetime("2013-02-06T20:53:01.954000+00:00") == \
+            datetime.datetime(2013, 2, 6, 20, 53, 1, 954000, tzinfo=tzutc())
+        assert parse_datetime("2013-02-06T20:53:01") == datetime.datetime(2013, 2, 6, 20, 53, 1)
+        assert parse_datetime("1988-11-19") == datetime.date(1988, 11, 19)
+        assert parse_datetime("01:00:00.500000") == datetime.time(1, 0, 0, 500000)
+
+    def test_parse_datetime_requires_round_trip(self):
+        for value in [
+            "2013-02-06T20:53:01Z",
+            "2013-02-06T20:53:01.000000",
+            "2013-02-06 20:53:01",
+            "2013-13-01",
+            "01:00",
+            "1988",
+            "Bruce Wayne",
+            "+1 234",
+            "",
+        ]:
+            assert parse_datetime(value) is value
+
     def test_convert_full(self):
         assert LEAD == convert(parse(LEAD))
 
     def test_none(self):
         assert None is convert(None)
 
+    def test_dumps(self):
+        parsed = parse(LEAD)
+        assert json.loads(dumps(parsed).decode('utf-8')) == convert(parsed)
+        assert dumps({'name': 'Jürgen', 'ids': ('a', 'b')}) == \
+            '{"name":"Jürgen","ids":["a","b"]}'.encode('utf-8')
+
+
+def test_create_lead_encodes_dates(fake_api):
+    fake_api.add('POST', 'lead/', lambda query, body: (200, dict(body, id='lead_1')))
+    client = CloseIO('key', base_url=fake_api.url)
+
+    lead = client.create_lead({
+        'name': 'Wayne Enterprises',
+        'custom': {'Contract date': datetime.date(2020, 1, 2)},
+    })
+
+    _, _, _, body = fake_api.requests[0]
+    assert body['custom'] == {'Contract date': '2020-01-02'}
+    assert lead.custom['Contract date'] == datetime.date(2020, 1, 2)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,54 @@
+import datetime
+import json
+
+import pytest
+
+from closeio import codec
+from closeio.utils import Item, parse
+
+LEAD = {
+    'id': 'lead_1',
+    'date_updated': '2013-02-06T20:53:01.977000+00:00',
+    'custom': {'date_of_death': '1988-11-19', 'time_of_death': '01:00:00'},
+    'contacts': [{'name': 'Bruce Wayne', 'emails': []}],
+}
+
+
+@pytest.mark.parametrize('dumps', [codec.dumps, codec._json_dumps])
+def test_dumps(dumps):
+    value = {
+        'date': datetime.date(2020, 1, 2),
+        'datetime': datetime.datetime(2020, 1, 2, 3, 4, 5, 6000, tzinfo=datetime.timezone.utc),
+        'time': datetime.time(1, 2),
+        'item': Item(name='Jürgen'),
+        'tuple': ('a', 'b'),
+        'set': {1},
+        'generator': (i for i in range(2)),
+    }
+
+    assert json.loads(dumps(value).decode('utf-8')) == {
+        'date': '2020-01-02',
+        'datetime': '2020-01-02T03:04:05.006000+00:00',
+        'time': '01:02:00',
+        'item': {'name': 'Jürgen'},
+        'tuple': ['a', 'b'],
+        'set': [1],
+        'generator': [0, 1],
+    }
+
+
+@pytest.mark.parametrize('dumps', [codec.dumps, codec._json_dumps])
+def test_dumps_unsupported(dumps):
+    with pytest.raises(TypeError):
+        dumps({'object': object()})
+
+
+def test_round_trip():
+    assert codec.loads(codec.dumps(parse(LEAD))) == LEAD
+    assert codec.loads(json.dumps(LEAD)) == LEAD
+
+
+@pytest.mark.parametrize('data', [b'{"event": ', '[1, 2', b''])
+def test_loads_invalid(data):
+    with pytest.raises(ValueError):
+        codec.loads(data)
@@ -0,0 +1,103 @@
+import csv
+import datetime
+
+import pytest
+
+from closeio.contrib import columnar
+from closeio.contrib.columnar import LeadTable, write_leads
+from closeio.exceptions import CloseIOError
+from closeio.utils import parse
+
+LEADS = [
+    {
+        'id': 'lead_1',
+        'display_name': 'Wayne Enterprises',
+        'date_created': '2013-02-01T00:54:51.333000+00:00',
+        'addresses': [{'city': 'Gotham', 'country': 'US'}],
+        'custom': {'Source': 'Referral', 'Tags': ['a', 'b'], 'Ignored': 'x'},
+        'contacts': [
+            {'id': 'cont_1', 'name': 'Bruce', 'emails': [{'email': 'bruce@wayne.com'}]},
+            {'id': 'cont_2', 'name': 'Alfred', 'phones': [{'phone': '+1555'}]},
+        ],
+    },
+    {'id': 'lead_2', 'display_name': 'Arkham'},
+]
+
+
+class TestLeadTable:
+    def test_schema_is_stable(self):
+        table = LeadTable(custom_fields=['Source', 'Tags'])
+
+        assert table.names[0] == 'lead_id'
+        assert table.names[-2:] == ['custom.Source', 'custom.Tags']
+        assert all(len(row) == len(table.names) for lead in LEADS for row in table.rows(lead))
+
+    def test_rows(self):
+        table = LeadTable(custom_fields=['Source', 'Tags'])
+        rows = [dict(zip(table.names, row)) for lead in LEADS for row in table.rows(lead)]
+
+        assert [row['contact_id'] for row in rows] == ['cont_1', 'cont_2', None]
+        assert rows[0]['address_city'] == 'Gotham'
+        assert rows[0]['contact_email'] == 'bruce@wayne.com'
+        assert rows[1]['contact_phone'] == '+1555'
+        assert rows[1]['custom.Tags'] == 'a;b'
+        assert rows[0]['lead_date_created'] == datetime.datetime(
+            2013, 2, 1, 0, 54, 51, 333000, tzinfo=datetime.timezone.utc)
+        assert rows[2]['lead_date_created'] is None
+
+    def test_parsed_leads(self):
+        table = LeadTable()
+        assert list(table.rows(parse(LEADS[0]))) == list(table.rows(LEADS[0]))
+
+    def test_without_contacts(self):
+        table = LeadTable(contacts=False)
+        assert 'contact_id' not in table.names
+        assert len(list(table.rows(LEADS[0]))) == 1
+
+
+class TestWriteLeads:
+    def test_csv(self, tmp_path):
+        path = str(tmp_path / 'leads.csv')
+        stats = write_leads(LEADS * 5, path, format='csv', batch_size=4, custom_fields=['Source'])
+
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+
+        assert len(rows) == 15
+        assert rows[0]['lead_date_created'] == '2013-02-01T00:54:51.333000+00:00'
+        assert rows[0]['custom.Source'] == 'Referral'
+        assert stats['leads'] == 10
+        assert stats['rows'] == 15
+        assert stats['batches'] == 4
+        assert stats['rows_per_second'] > 0
+
+    def test_csv_without_pyarrow(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(columnar, 'pyarrow', None)
+        path = str(tmp_path / 'leads')
+
+        assert write_leads(LEADS, path)['rows'] == 3
+        with open(path, encoding='utf-8') as f:
+            assert f.readline().startswith('lead_id,')
+
+        with pytest.raises(CloseIOError):
+            write_leads(LEADS, path, format='parquet')
+
+    @pytest.mark.parametrize('format', ['parquet', 'arrow'])
+    def test_arrow(self, tmp_path, format):
+        pyarrow = pytest.importorskip('pyarrow')
+        path = str(tmp_path / 'leads')
+
+        stats = write_leads(LEADS * 5, path, format=format, batch_size=4)
+
+        if format == 'parquet':
+            import pyarrow.parquet
+            table = pyarrow.parquet.read_table(path)
+        else:
+            import pyarrow.ipc
+            reader = pyarrow.ipc.open_file(path)
+            assert reader.num_record_batches == stats['batches'] == 4
+            table = reader.read_all()
+
+        assert table.num_rows == 15
+        assert table.column('contact_id').to_pylist()[:3] == ['cont_1', 'cont_2', None]
+        assert table.schema.field('lead_date_created').type == pyarrow.timestamp('us', tz='UTC')
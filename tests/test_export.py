@@ -0,0 +1,170 @@
+import gzip
+import json
+
+import pytest
+import requests
+
+from closeio import CloseIO
+from closeio.exceptions import CloseIOError
+from closeio.export import iter_gunzipped, iter_json_values, wait_for_export
+
+LEADS = [
+    {'id': 'lead_{}'.format(i), 'name': 'Lead é {}'.format(i),
+     'date_created': '2013-02-01T00:54:51.333000+00:00', 'value': i * 1.5}
+    for i in range(200)
+]
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestIterJSONValues:
+    @pytest.mark.parametrize('size', [1, 7, 4096])
+    def test_array(self, size):
+        data = json.dumps(LEADS).encode('utf-8')
+        assert list(iter_json_values(chunked(data, size))) == LEADS
+
+    @pytest.mark.parametrize('size', [1, 7, 4096])
+    def test_ndjson(self, size):
+        data = '\n'.join(json.dumps(lead) for lead in LEADS).encode('utf-8')
+        assert list(iter_json_values(chunked(data, size))) == LEADS
+
+    def test_numbers_split_across_chunks(self):
+        assert list(iter_json_values([b'[12', b'34, 5', b'6]'])) == [1234, 56]
+        assert list(iter_json_values([b'12', b'34 5', b'6'])) == [1234, 56]
+
+    def test_empty(self):
+        assert list(iter_json_values([b' [ ] '])) == []
+        assert list(iter_json_values([])) == []
+
+    def test_truncated(self):
+        with pytest.raises(CloseIOError):
+            list(iter_json_values([b'[{"id": 1}, {"id"']))
+
+        with pytest.raises(CloseIOError):
+            list(iter_json_values([b'[{"id": 1}']))
+
+    def test_max_value_size(self):
+        def chunks():
+            yield b'[{"id": 1}, {"name": "'
+            while True:
+                yield b'x' * 10
+
+        values = iter_json_values(chunks(), max_value_size=100)
+        assert next(values) == {'id': 1}
+        with pytest.raises(CloseIOError):
+            next(values)
+
+        data = json.dumps([{'name': 'x' * 80}]).encode('utf-8')
+        assert list(iter_json_values(chunked(data, 1), max_value_size=100)) == [
+            {'name': 'x' * 80}]
+
+    def test_large_value_decoded_few_times(self, monkeypatch):
+        raw_decode = json.JSONDecoder.raw_decode
+        calls = []
+
+        def counting_raw_decode(self, *args, **kwargs):
+            calls.append(args)
+            return raw_decode(self, *args, **kwargs)
+
+        monkeypatch.setattr(json.JSONDecoder, 'raw_decode', counting_raw_decode)
+        data = json.dumps([LEADS]).encode('utf-8')
+
+        assert list(iter_json_values(chunked(data, 10))) == [LEADS]
+        assert len(calls) < 30
+
+
+class TestIterGunzipped:
+    def test_gzip(self):
+        data = json.dumps(LEADS).encode('utf-8')
+        assert b''.join(iter_gunzipped(chunked(gzip.compress(data), 5))) == data
+
+    @pytest.mark.parametrize('size', [5, 4096])
+    def test_gzip_members(self, size):
+        data = gzip.compress(b'[1, ') + gzip.compress(b'2, ') + gzip.compress(b'3]')
+        assert b''.join(iter_gunzipped(chunked(data, size))) == b'[1, 2, 3]'
+
+    def test_plain(self):
+        assert b''.join(iter_gunzipped([b'[', b'1]'])) == b'[1]'
+
+
+class TestWaitForExport:
+    def test_backoff(self, monkeypatch):
+        sleeps = []
+        monkeypatch.setattr('closeio.export.sleep', sleeps.append)
+        statuses = ['created', 'started', 'in_progress', 'in_progress', 'done']
+
+        export = wait_for_export(
+            lambda id: {'id': id, 'status': statuses.pop(0)}, 'expo_1', 1, 3)
+
+        assert export == {'id': 'expo_1', 'status': 'done'}
+        assert sleeps == [1, 2, 3, 3]
+
+    def test_error(self, monkeypatch):
+        with pytest.raises(CloseIOError):
+            wait_for_export(lambda id: {'status': 'error'}, 'expo_1')
+
+    def test_timeout(self, monkeypatch):
+        monkeypatch.setattr('closeio.export.sleep', lambda seconds: None)
+
+        with pytest.raises(CloseIOError):
+            wait_for_export(lambda id: {'status': 'started'}, 'expo_1', timeout=0)
+
+
+class TestStreamLeadExport:
+    def test_stream(self, fake_api):
+        statuses = ['created', 'done']
+
+        fake_api.add('POST', 'export/lead/', {'id': 'expo_1', 'status': 'created'})
+        fake_api.add('GET', 'export/expo_1/', lambda query, body: (200, {
+            'id': 'expo_1',
+            'status': statuses.pop(0),
+            'download_url': fake_api.url + 'download/expo_1.json.gz',
+        }))
+        fake_api.add('GET', 'download/expo_1.json.gz',
+                     gzip.compress(json.dumps(LEADS).encode('utf-8')),
+                     headers={'Content-Type': 'application/gzip'})
+
+        client = CloseIO('key', base_url=fake_api.url)
+        leads = client.stream_lead_export(query='name:Lead', poll_interval=0, chunk_size=100)
+
+        lead = next(leads)
+        assert lead.id == 'lead_0'
+        assert lead.date_created.year == 2013
+        assert [lead.id for lead in leads] == [lead['id'] for lead in LEADS[1:]]
+
+        assert fake_api.requests[0][3] == {'format': 'json', 'type': 'leads', 'query': 'name:Lead'}
+        assert 'Authorization' not in fake_api.request_headers[-1]
+
+    def test_download_timeout(self, fake_api, monkeypatch):
+        fake_api.add('POST', 'export/lead/', {'id': 'expo_1', 'status': 'created'})
+        fake_api.add('GET', 'export/expo_1/', lambda query, body: (200, {
+            'id': 'expo_1', 'status': 'done', 'download_url': fake_api.url + 'download',
+        }))
+        fake_api.add('GET', 'download', b'[]')
+
+        get = requests.get
+        timeouts = []
+
+        def recording_get(url, **kwargs):
+            timeouts.append(kwargs.get('timeout'))
+            return get(url, **kwargs)
+
+        monkeypatch.setattr(requests, 'get', recording_get)
+        client = CloseIO('key', base_url=fake_api.url)
+
+        assert list(client.stream_lead_export()) == []
+        assert list(client.stream_lead_export(download_timeout=5)) == []
+        assert timeouts == [(10, 60), 5]
+
+    def test_failed_download(self, fake_api):
+        fake_api.add('POST', 'export/lead/', {'id': 'expo_1', 'status': 'created'})
+        fake_api.add('GET', 'export/expo_1/', lambda query, body: (200, {
+            'id': 'expo_1', 'status': 'done', 'download_url': fake_api.url + 'missing',
+        }))
+
+        client = CloseIO('key', base_url=fake_api.url)
+
+        with pytest.raises(CloseIOError):
+            list(client.stream_lead_export())
@@ -0,0 +1,135 @@
+import pytest
+
+from closeio import CloseIO
+from closeio.exceptions import CloseIOError
+from closeio.httpcache import (
+    CacheEntry, HTTPCache, MemoryBackend, SQLiteBackend
+)
+from closeio.utils import Item, LazyItem
+
+LEAD = {'id': 'lead_1', 'name': 'Wayne Enterprises',
+        'date_created': '2013-02-01T00:54:51.333000+00:00', 'contacts': [{'id': 'cont_1'}]}
+
+
+class TestMemoryBackend:
+    def test_lru_bounded_by_bytes(self):
+        backend = MemoryBackend(max_bytes=25)
+        backend.set('a', CacheEntry('1', None, b'x' * 9))
+        backend.set('b', CacheEntry('1', None, b'x' * 9))
+        backend.get('a')
+        backend.set('c', CacheEntry('1', None, b'x' * 9))
+
+        assert backend.get('b') is None
+        assert backend.get('a').content == b'x' * 9
+        assert backend.size == 20
+
+    def test_replace_and_too_large(self):
+        backend = MemoryBackend(max_bytes=30)
+        backend.set('a', CacheEntry('1', None, b'x' * 9))
+        backend.set('a', CacheEntry('2', None, b'x' * 4))
+        assert backend.size == 5
+
+        backend.set('b', CacheEntry('1', None, b'x' * 100))
+        assert backend.get('b') is None
+        assert len(backend) == 1
+
+
+class TestSQLiteBackend:
+    def test_shared(self, tmp_path):
+        path = str(tmp_path / 'cache.db')
+        SQLiteBackend(path).set('a', CacheEntry('"v1"', None, b'{}'))
+
+        assert SQLiteBackend(path).get('a') == CacheEntry('"v1"', None, b'{}')
+        assert SQLiteBackend(path).get('b') is None
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        backend = SQLiteBackend(str(tmp_path / 'cache.db'), max_bytes=25)
+        backend.set('a', CacheEntry('1', None, b'x' * 9))
+        backend.set('b', CacheEntry('1', None, b'x' * 9))
+        backend.get('a')
+        backend.set('c', CacheEntry('1', None, b'x' * 9))
+
+        assert backend.get('b') is None
+        assert backend.get('a') is not None
+        assert backend.get('c') is not None
+
+
+class TestCloseIOHTTPCache:
+    @pytest.fixture
+    def lead_api(self, fake_api):
+        def lead(query, body):
+            if fake_api.request_headers[-1].get('If-None-Match') == '"v1"':
+                return 304, None
+            return 200, LEAD, {'ETag': '"v1"'}
+
+        fake_api.add('GET', 'lead/lead_1/', lead)
+        return fake_api
+
+    def test_conditional_get(self, lead_api, monkeypatch):
+        parsed = []
+        monkeypatch.setattr(
+            'closeio.closeio.parse', lambda value, **kwargs: parsed.append(value) or value)
+        client = CloseIO('key', http_cache=HTTPCache(), base_url=lead_api.url)
+
+        first = client.get_lead('lead_1')
+        second = client.get_lead('lead_1')
+
+        assert first == second == LEAD
+        assert first is not second
+        assert len(parsed) == 1
+        assert 'If-None-Match' not in lead_api.request_headers[0]
+        assert lead_api.request_headers[1]['If-None-Match'] == '"v1"'
+
+    def test_returns_copies(self, lead_api):
+        client = CloseIO('key', records=True, http_cache=HTTPCache(), base_url=lead_api.url)
+
+        lead = client.get_lead('lead_1')
+        lead.contacts[0].name = 'Bruce'
+        lead = client.get_lead('lead_1')
+
+        assert lead.__class__.__name__ == 'Lead'
+        assert lead.contacts[0] == {'id': 'cont_1'}
+        assert lead.date_created.year == 2013
+
+    def test_shared_by_records_and_items(self, lead_api):
+        cache = HTTPCache()
+        records = CloseIO('key', records=True, http_cache=cache, base_url=lead_api.url)
+        items = CloseIO('key', http_cache=cache, base_url=lead_api.url)
+
+        assert records.get_lead('lead_1').__class__.__name__ == 'Lead'
+        assert type(items.get_lead('lead_1')) is Item
+        assert records.get_lead('lead_1').__class__.__name__ == 'Lead'
+        assert type(items.get_lead('lead_1')) is Item
+
+        lazy = CloseIO('key', lazy=True, http_cache=cache, base_url=lead_api.url)
+        assert isinstance(lazy.get_lead('lead_1'), LazyItem)
+
+    def test_shared_backend(self, lead_api, tmp_path):
+        path = str(tmp_path / 'cache.db')
+        CloseIO('key', http_cache=HTTPCache(SQLiteBackend(path)), base_url=lead_api.url) \
+            .get_lead('lead_1')
+        client = CloseIO('key', http_cache=HTTPCache(SQLiteBackend(path)), base_url=lead_api.url)
+
+        assert client.get_lead('lead_1').date_created.year == 2013
+        assert lead_api.request_headers[1]['If-None-Match'] == '"v1"'
+
+    def test_not_found_drops_entry(self, fake_api):
+        responses = [(200, LEAD, {'ETag': '"v1"'}), (404, {'error': 'Not found'})]
+        fake_api.add('GET', 'lead/lead_1/', lambda query, body: responses.pop(0))
+        cache = HTTPCache()
+        client = CloseIO('key', http_cache=cache, base_url=fake_api.url)
+
+        client.get_lead('lead_1')
+        assert len(cache.backend) == 1
+
+        with pytest.raises(CloseIOError):
+            client.get_lead('lead_1')
+        assert len(cache.backend) == 0
+
+    def test_query_not_cached(self, fake_api):
+        fake_api.add('GET', 'lead/', {'has_more': False, 'data': [LEAD]}, headers={'ETag': '"v1"'})
+        cache = HTTPCache()
+
+        list(CloseIO('key', http_cache=cache, base_url=fake_api.url).get_leads())
+
+        assert len(cache.backend) == 0
@@ -0,0 +1,178 @@
+import importlib.util
+import logging
+import sys
+import threading
+
+import pytest
+
+from closeio import CloseIO, instrumentation
+from closeio.exceptions import CloseIOError
+from closeio.retry import RetryPolicy
+
+
+@pytest.fixture
+def events():
+    events = []
+    instrumentation.add_listener(events.append)
+    yield events
+    instrumentation.remove_listener(events.append)
+
+
+def leads(query, body):
+    skip = int(query['_skip'][0])
+    return 200, {'has_more': skip < 200, 'data': [{'id': 'lead_{}'.format(skip)}]}
+
+
+def test_endpoint():
+    assert instrumentation.endpoint(
+        'https://app.close.io/api/v1/lead/lead_abc123/?_fields=id') == 'lead/{id}/'
+    assert instrumentation.endpoint('http://localhost/api/v1/status/lead/') == 'status/lead/'
+
+
+def test_get_lead(fake_api, events):
+    fake_api.add('GET', 'lead/lead_1/', {'id': 'lead_1'})
+    CloseIO('key', base_url=fake_api.url).get_lead('lead_1')
+
+    event, = events
+    assert event.method == 'get_lead'
+    assert event.http_method == 'GET'
+    assert event.endpoint == 'lead/{id}/'
+    assert event.url == fake_api.url + 'lead/lead_1/'
+    assert event.status == 200
+    assert event.bytes_sent == 0
+    assert event.bytes_received == len(b'{"id": "lead_1"}')
+    assert event.seconds > 0
+    assert event.retries == 0
+    assert event.page is None
+    assert event.error is None
+
+
+def test_create_lead(fake_api, events):
+    fake_api.add('POST', 'lead/', {'id': 'lead_1'})
+    CloseIO('key', base_url=fake_api.url).create_lead({'name': 'Wayne'})
+
+    assert events[0].method == 'create_lead'
+    assert events[0].bytes_sent == len(b'{"name":"Wayne"}')
+
+
+@pytest.mark.parametrize('page_window', [1, 3])
+def test_pages(fake_api, events, page_window):
+    fake_api.add('GET', 'lead/', leads)
+    client = CloseIO('key', base_url=fake_api.url, page_window=page_window)
+
+    assert len(list(client.get_leads())) == 3
+    assert sorted(event.page for event in events)[:3] == [0, 1, 2]
+    assert {event.method for event in events} == {'get_leads'}
+
+
+def test_cursor_pages(fake_api, events):
+    def event_logs(query, body):
+        cursor = query.get('_cursor', [''])[0]
+        return 200, {'cursor_next': 'next' if not cursor else '', 'data': [{'id': 'ev_1'}]}
+
+    fake_api.add('GET', 'event/', event_logs)
+    client = CloseIO('key', base_url=fake_api.url, read_ahead=2)
+
+    assert len(list(client.get_event_logs())) == 2
+    assert [(event.method, event.page) for event in events] == [
+        ('get_event_logs', 0), ('get_event_logs', 1)]
+
+
+def test_retries(fake_api, events):
+    responses = [(500, {'error': 'oops'}), (200, {'id': 'lead_1'})]
+    fake_api.add('GET', 'lead/lead_1/', lambda query, body: responses.pop(0))
+    client = CloseIO('key', base_url=fake_api.url, retry_policy=RetryPolicy(backoff=0))
+
+    client.get_lead('lead_1')
+
+    event, = events
+    assert event.status == 200
+    assert event.retries == 1
+
+
+def test_connection_error(events):
+    client = CloseIO('key', base_url='http://127.0.0.1:1/api/v1/',
+                     retry_policy=RetryPolicy(total=0), max_retries=0)
+
+    with pytest.raises(CloseIOError):
+        client.get_lead('lead_1')
+
+    event, = events
+    assert event.status is None
+    assert event.error is not None
+    assert event.bytes_received is None
+
+
+def test_failing_listener(fake_api, events):
+    def fail(event):
+        raise ValueError('broken listener')
+
+    fake_api.add('GET', 'lead/lead_1/', {'id': 'lead_1'})
+    instrumentation.add_listener(fail)
+    try:
+        assert CloseIO('key', base_url=fake_api.url).get_lead('lead_1').id == 'lead_1'
+    finally:
+        instrumentation.remove_listener(fail)
+
+    assert len(events) == 1
+
+
+def test_logging_listener(fake_api, caplog):
+    fake_api.add('GET', 'lead/lead_1/', {'id': 'lead_1'})
+    listener = instrumentation.LoggingListener(level=logging.INFO)
+    instrumentation.add_listener(listener)
+    try:
+        with caplog.at_level(logging.INFO, logger='closeio.instrumentation'):
+            CloseIO('key', base_url=fake_api.url).get_lead('lead_1')
+    finally:
+        instrumentation.remove_listener(listener)
+
+    assert 'close.io GET lead/{id}/ -> 200' in caplog.text
+    assert '(get_lead, page None' in caplog.text
+
+
+def test_prometheus_listener(fake_api):
+    prometheus_client = pytest.importorskip('prometheus_client')
+    registry = prometheus_client.CollectorRegistry()
+    listener = instrumentation.PrometheusListener(registry=registry)
+
+    fake_api.add('GET', 'lead/lead_1/', {'id': 'lead_1'})
+    instrumentation.add_listener(listener)
+    try:
+        CloseIO('key', base_url=fake_api.url).get_lead('lead_1')
+    finally:
+        instrumentation.remove_listener(listener)
+
+    labels = {'method': 'get_lead', 'http_method': 'GET', 'endpoint': 'lead/{id}/',
+              'status': '200'}
+    assert registry.get_sample_value('closeio_request_duration_seconds_count', labels) == 1
+
+
+def test_no_listeners():
+    assert not instrumentation.listeners
+    assert instrumentation.call('get_lead', instrumentation.context) == (None, None)
+
+
+def test_context_without_contextvars(monkeypatch):
+    # Python < 3.7, load a fresh copy so the shared module is left alone
+    monkeypatch.setitem(sys.modules, 'contextvars', None)
+    spec = importlib.util.spec_from_file_location(
+        'closeio_instrumentation_legacy', instrumentation.__file__)
+    legacy = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(legacy)
+    assert legacy.contextvars is None
+    legacy.add_listener(lambda event: None)
+
+    def in_thread(context):
+        results = []
+        thread = threading.Thread(target=context.run, args=(
+            lambda: results.append(legacy.context()),))
+        thread.start()
+        thread.join()
+        return results[0]
+
+    assert legacy.call('get_leads', legacy.fetch_page, 3, lambda: in_thread(
+        legacy.copy_context())) == ('get_leads', 3)
+    assert in_thread(legacy.copy_context()) == (None, None)
+    assert legacy.context() == (None, None)
+    assert legacy.time_ns() > 0
@@ -0,0 +1,162 @@
+import pytest
+
+from closeio import CloseIO
+from closeio.contrib.mirror import LeadMirror, SQLiteLeadStore
+
+
+def lead(id, name, **fields):
+    return dict({'id': id, 'name': name, 'date_updated': '2013-02-01T00:54:51.333000+00:00'},
+                **fields)
+
+
+def event(action, object_id, date, object_type='lead', lead_id=None, data=None, **fields):
+    return dict({
+        'id': 'ev_{}_{}'.format(object_id, date),
+        'action': action,
+        'object_type': object_type,
+        'object_id': object_id,
+        'lead_id': lead_id or object_id,
+        'data': data,
+        'date_updated': '2020-01-01T00:00:{:02d}+00:00'.format(date),
+    }, **fields)
+
+
+@pytest.fixture
+def api(fake_api):
+    fake_api.leads = {
+        'lead_1': lead('lead_1', 'Wayne Enterprises'),
+        'lead_2': lead('lead_2', 'Arkham'),
+        'lead_3': lead('lead_3', 'Ace Chemicals'),
+    }
+    fake_api.events = []
+
+    fake_api.add('GET', 'lead/', lambda query, body: (200, {
+        'has_more': False, 'data': list(fake_api.leads.values()),
+    }))
+    for id in ['lead_1', 'lead_2', 'lead_3', 'lead_4']:
+        fake_api.add('GET', 'lead/{}/'.format(id), lambda query, body, id=id: (
+            (200, fake_api.leads[id]) if id in fake_api.leads
+            else (404, {'error': 'Not found'})))
+
+    def events(query, body):
+        # newest first, like close.io
+        since = query['date_updated__gte'][0]
+        return 200, {
+            'data': [e for e in reversed(fake_api.events) if e['date_updated'] >= since],
+            'cursor_next': None,
+        }
+
+    fake_api.add('GET', 'event/', events)
+    return fake_api
+
+
+@pytest.fixture
+def mirror(api):
+    return LeadMirror(CloseIO('key', base_url=api.url))
+
+
+def request_paths(api):
+    return [path for _, path, _, _ in api.requests]
+
+
+class TestSQLiteLeadStore:
+    def test_round_trip(self, tmp_path):
+        path = str(tmp_path / 'leads.db')
+        store = SQLiteLeadStore(path)
+        with store.transaction():
+            store.put(lead('lead_1', 'Wayne Enterprises'))
+            store.set_state('cursor', 'abc')
+
+        store = SQLiteLeadStore(path)
+        assert len(store) == 1
+        assert store.get('lead_1').date_updated.year == 2013
+        assert store.get('lead_2') is None
+        assert store.get_state('cursor') == 'abc'
+
+
+class TestLeadMirror:
+    def test_initial_load(self, api, mirror):
+        stats = mirror.sync()
+
+        assert stats['loaded'] == 3
+        assert [lead.id for lead in mirror.store] == ['lead_1', 'lead_2', 'lead_3']
+        assert mirror.cursor is not None
+
+    def test_apply_events(self, api, mirror):
+        mirror.sync()
+        mirror.store.set_state(mirror.CURSOR, '2020-01-01T00:00:00+00:00')
+        api.requests[:] = []
+
+        api.leads['lead_3']['contacts'] = [{'id': 'cont_1'}]
+        api.events.extend([
+            event('created', 'lead_4', 1, data=lead('lead_4', 'Joker')),
+            event('updated', 'lead_1', 2, data={'name': 'Wayne Corp'}),
+            event('deleted', 'lead_2', 3),
+            event('created', 'cont_1', 4, object_type='contact', lead_id='lead_3'),
+            event('updated', 'cont_1', 5, object_type='contact', lead_id='lead_3'),
+        ])
+
+        stats = mirror.sync()
+
+        assert stats == {'loaded': 0, 'events': 5, 'refetched': 1, 'deleted': 1}
+        assert mirror.store.get('lead_4').name == 'Joker'
+        assert mirror.store.get('lead_1').name == 'Wayne Corp'
+        assert mirror.store.get('lead_1').date_updated.year == 2013
+        assert mirror.store.get('lead_2') is None
+        assert mirror.store.get('lead_3').contacts == [{'id': 'cont_1'}]
+        assert mirror.cursor == '2020-01-01T00:00:05+00:00'
+        # only the lead without full data in its events was fetched
+        assert request_paths(api) == ['/api/v1/event/', '/api/v1/lead/lead_3/']
+
+        api.requests[:] = []
+        assert mirror.sync()['events'] == 0
+        assert request_paths(api) == ['/api/v1/event/']
+
+    def test_same_time_across_syncs(self, api, mirror):
+        mirror.sync()
+        mirror.store.set_state(mirror.CURSOR, '2020-01-01T00:00:00+00:00')
+
+        api.events.append(event('updated', 'lead_1', 2, data={'name': 'Wayne Corp'}))
+        assert mirror.sync()['events'] == 1
+
+        # arrives after the first sync, with the time of the cursor
+        api.events.append(event('updated', 'lead_2', 2, data={'name': 'Arkham Asylum'}))
+        mirror.store.put(lead('lead_1', 'Wayne Enterprises'))
+
+        assert mirror.sync()['events'] == 1
+        assert mirror.store.get('lead_2').name == 'Arkham Asylum'
+        # the event applied by the first sync is not applied again
+        assert mirror.store.get('lead_1').name == 'Wayne Enterprises'
+        assert mirror.cursor == '2020-01-01T00:00:02+00:00'
+        assert mirror.sync()['events'] == 0
+
+    def test_events_of_one_lead(self, api, mirror):
+        mirror.sync()
+        mirror.store.set_state(mirror.CURSOR, '2020-01-01T00:00:00+00:00')
+
+        api.events.extend([
+            event('updated', 'lead_1', 1, data={'name': 'Wayne Corp', 'url': 'wayne.com'}),
+            event('updated', 'lead_1', 2, data={'name': 'Wayne Enterprises'}),
+            event('updated', 'lead_2', 3, data={'name': 'Arkham Asylum'}),
+            event('deleted', 'lead_2', 4),
+        ])
+
+        assert mirror.sync() == {'loaded': 0, 'events': 4, 'refetched': 0, 'deleted': 1}
+        assert mirror.store.get('lead_1').name == 'Wayne Enterprises'
+        assert mirror.store.get('lead_1').url == 'wayne.com'
+        assert 'lead_2' not in mirror.store
+
+    def test_merge(self, api, mirror):
+        mirror.sync()
+        mirror.store.set_state(mirror.CURSOR, '2020-01-01T00:00:00+00:00')
+
+        del api.leads['lead_2']
+        api.leads['lead_1']['name'] = 'Wayne Arkham'
+        api.events.append(event('merged', 'lead_1', 1, meta={'merge_source_lead_id': 'lead_2'}))
+
+        stats = mirror.sync()
+
+        assert stats['refetched'] == 1
+        assert stats['deleted'] == 1
+        assert mirror.store.get('lead_1').name == 'Wayne Arkham'
+        assert 'lead_2' not in mirror.store
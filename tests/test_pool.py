@@ -0,0 +1,85 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from closeio import CloseIO
+from closeio.exceptions import CloseIOError
+from closeio.httpcache import HTTPCache
+from closeio.retry import RetryPolicy
+
+
+def test_pool_size():
+    client = CloseIO('key', pool_connections=2, pool_maxsize=32, pool_block=True)
+    adapter = client._api._session.get_adapter(client.base_url)
+
+    assert adapter._pool_connections == 2
+    assert adapter._pool_maxsize == 32
+    assert adapter._pool_block
+    assert client.pool_stats['pool_maxsize'] == 32
+
+
+def test_shared_session():
+    first = CloseIO('key', shared_session=True)
+    second = CloseIO('key', shared_session=True)
+    other = CloseIO('other', shared_session=True)
+    private = CloseIO('key')
+
+    def pools(client):
+        client._api
+        return client._adapter.poolmanager
+
+    assert pools(first) is pools(second)
+    assert pools(first) is not pools(other)
+    assert pools(first) is not pools(private)
+
+
+def test_shared_session_keeps_client_settings(fake_api):
+    fake_api.add('GET', 'lead/lead_1/', {'id': 'lead_1'})
+    first = CloseIO('key', base_url=fake_api.url, shared_session=True,
+                    retry_policy=RetryPolicy(total=1))
+    second = CloseIO('key', base_url=fake_api.url, shared_session=True,
+                     retry_policy=RetryPolicy(total=7), http_cache=HTTPCache())
+
+    first.get_lead('lead_1')
+    second.get_lead('lead_1')
+
+    assert first._adapter.retry_policy.total == 1
+    assert first._adapter.http_cache is None
+    assert second._adapter.retry_policy.total == 7
+    assert second._adapter.http_cache is second._http_cache
+    assert second.retry_policy.stats['requests'] == 1
+    assert first.pool_stats['requests'] == second.pool_stats['requests'] == 1
+    # one connection, opened by the first client and reused by the second
+    assert second.pool_stats['connections_opened'] == 1
+
+
+def test_shared_session_pool_settings():
+    CloseIO('key', shared_session=True, pool_maxsize=4)
+
+    with pytest.raises(CloseIOError):
+        CloseIO('key', shared_session=True, pool_maxsize=8)
+
+    CloseIO('key', shared_session=True, pool_maxsize=4)
+    CloseIO('other', shared_session=True, pool_maxsize=8)
+
+
+def test_pool_stats(fake_api):
+    def lead(query, body):
+        time.sleep(0.05)
+        return 200, {'id': 'lead_1'}
+
+    fake_api.add('GET', 'lead/lead_1/', lead)
+    client = CloseIO('key', base_url=fake_api.url, pool_maxsize=2, pool_block=True)
+
+    with ThreadPoolExecutor(8) as executor:
+        leads = list(executor.map(client.get_lead, ['lead_1'] * 8))
+
+    assert [lead.id for lead in leads] == ['lead_1'] * 8
+    stats = client.pool_stats
+    assert stats['requests'] == 8
+    assert stats['in_flight'] == 0
+    assert stats['peak'] > 2
+    assert stats['saturated'] > 0
+    assert stats['pools'] == 1
+    assert 1 <= stats['connections_opened'] <= 2
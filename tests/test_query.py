@@ -0,0 +1,126 @@
+import pytest
+
+from closeio.contrib.mirror import SQLiteLeadStore, index_terms
+from closeio.contrib.query import (
+    And, LocalQueryEngine, Or, Term, UnsupportedQuery
+)
+
+LEADS = [
+    {
+        'id': 'lead_1', 'display_name': 'Wayne Enterprises', 'status_label': 'Potential',
+        'custom': {'Source': 'Referral', 'Lead Owner': 'Bruce'},
+        'contacts': [{'emails': [{'email': 'Bruce@Wayne.com'}],
+                      'phones': [{'phone': '+1 (555) 010-0001'}]}],
+    },
+    {
+        'id': 'lead_2', 'display_name': 'Wayne Foundation', 'status_label': 'Qualified',
+        'custom': {'Lead Owner': 'Alfred'},
+        'contacts': [{'emails': [{'email': 'alfred@wayne.com'}]}],
+    },
+    {
+        'id': 'lead_3', 'display_name': 'Arkham Asylum', 'status_label': 'Potential',
+        'custom': {'Source': 'Web'},
+        'contacts': [{'phones': [{'phone': '+15550100003'}]}],
+    },
+]
+
+
+class FakeClient(object):
+    def __init__(self):
+        self.queries = []
+
+    def get_leads(self, query=None):
+        self.queries.append(query)
+        return iter([{'id': 'remote'}])
+
+
+@pytest.fixture
+def engine():
+    store = SQLiteLeadStore(custom_fields=['Source', 'Lead Owner'])
+    with store.transaction():
+        store.put_many(LEADS)
+    return LocalQueryEngine(store, FakeClient())
+
+
+def ids(engine, query):
+    return sorted(engine.lead_ids(query))
+
+
+class TestIndex:
+    def test_terms(self):
+        terms = set(index_terms(LEADS[0], ['Source']))
+        assert ('email', 'bruce@wayne.com') in terms
+        assert ('phone', '+15550100001') in terms
+        assert ('status', 'potential') in terms
+        assert ('custom.Source', 'referral') in terms
+
+    def test_update_and_delete(self, engine):
+        store = engine.store
+        store.put(dict(LEADS[0], status_label='Won'))
+        assert ids(engine, 'status:potential') == ['lead_3']
+
+        store.delete('lead_3')
+        assert ids(engine, 'status:potential') == []
+
+
+class TestPlan:
+    def test_local(self, engine):
+        plan = engine.plan('email:bruce@wayne.com OR (status:Potential AND custom.Source:web*)')
+
+        assert plan.local
+        assert plan.reason is None
+        assert plan.expression == Or((
+            Term('email', 'bruce@wayne.com', False),
+            And((Term('status', 'potential', False), Term('custom.Source', 'web', True))),
+        ))
+
+    @pytest.mark.parametrize('query', [
+        'wayne',
+        'city:Gotham',
+        'custom.Unindexed:x',
+        'NOT status:Potential',
+        'name:>a',
+        'status:*',
+        '(status:Potential',
+    ])
+    def test_remote(self, engine, query):
+        plan = engine.plan(query)
+
+        assert not plan.local
+        assert plan.reason
+        assert not engine.can_serve(query)
+
+
+class TestQuery:
+    def test_equality(self, engine):
+        assert ids(engine, 'email:BRUCE@wayne.com') == ['lead_1']
+        assert ids(engine, 'phone:"+1 555 010 0003"') == ['lead_3']
+        assert ids(engine, 'lead_status:"Potential"') == ['lead_1', 'lead_3']
+
+    def test_prefix(self, engine):
+        assert ids(engine, 'name:wayne*') == ['lead_1', 'lead_2']
+        assert ids(engine, 'phone:+1555*') == ['lead_1', 'lead_3']
+
+    def test_custom_exists(self, engine):
+        assert ids(engine, 'custom.Source:*') == ['lead_1', 'lead_3']
+        assert ids(engine, '"custom.Lead Owner":alfred') == ['lead_2']
+
+    def test_boolean(self, engine):
+        assert ids(engine, 'name:wayne* status:potential') == ['lead_1']
+        assert ids(engine, 'name:wayne* AND status:potential') == ['lead_1']
+        assert ids(engine, 'email:alfred@wayne.com or custom.Source:web') == ['lead_2', 'lead_3']
+        assert ids(engine, '(name:arkham* OR name:"wayne f"*) status:qualified') == ['lead_2']
+        assert ids(engine, 'name:arkham* status:qualified') == []
+
+    def test_get_leads(self, engine):
+        leads = list(engine.get_leads('custom.Source:*'))
+        assert [lead.id for lead in leads] == ['lead_1', 'lead_3']
+        assert engine.client.queries == []
+
+        assert list(engine.get_leads('wayne')) == [{'id': 'remote'}]
+        assert engine.client.queries == ['wayne']
+
+    def test_no_fallback(self, engine):
+        engine.client = None
+        with pytest.raises(UnsupportedQuery):
+            engine.get_leads('wayne')
@@ -0,0 +1,120 @@
+import pytest
+
+from closeio import CloseIO
+from closeio.exceptions import RateLimitError
+from closeio.ratelimit import (
+    RateLimiter, TokenBucket, endpoint_group, parse_rate_limit_headers
+)
+
+RATE_LIMITED = {'error': {
+    'message': 'API call count exceeded for this period', 'rate_reset': 0.2,
+    'rate_limit': 40, 'rate_window': 1, 'rate_limit_type': 'key',
+}}
+
+
+class TestEndpointGroup:
+    def test_first_segment(self):
+        assert endpoint_group('https://app.close.io/api/v1/lead/lead_1/') == 'lead'
+        assert endpoint_group('https://app.close.io/api/v1/activity/note/?lead_id=x') == \
+            'activity'
+        assert endpoint_group('http://127.0.0.1:80/api/v1/me/') == 'me'
+
+
+class TestParseRateLimitHeaders:
+    def test_ratelimit_header(self):
+        headers = {'RateLimit': 'limit=40, remaining=12, reset=0.5'}
+        assert parse_rate_limit_headers(headers) == (40, 12, 0.5)
+
+    def test_x_rate_limit_headers(self):
+        headers = {'X-Rate-Limit-Limit': '40', 'X-Rate-Limit-Remaining': '3'}
+        assert parse_rate_limit_headers(headers) == (40, 3, None)
+
+    def test_missing(self):
+        assert parse_rate_limit_headers({}) == (None, None, None)
+
+
+class TestTokenBucket:
+    def test_unknown_limit_never_waits(self):
+        bucket = TokenBucket()
+        assert all(bucket.reserve(0) == 0 for _ in range(100))
+
+    def test_paces_after_burst(self):
+        bucket = TokenBucket(limit=2, window=1)
+        now = bucket.updated
+        assert bucket.reserve(now) == 0
+        assert bucket.reserve(now) == 0
+        assert bucket.reserve(now) == pytest.approx(0.5)
+        assert bucket.reserve(now) == pytest.approx(1.0)
+
+    def test_block(self):
+        bucket = TokenBucket()
+        now = bucket.updated
+        bucket.block(2, now)
+        assert bucket.reserve(now + 0.5) == pytest.approx(1.5)
+        assert bucket.reserve(now + 3) == 0
+
+
+class TestRateLimiter:
+    def test_shared_per_api_key(self):
+        assert RateLimiter.for_api_key('a') is RateLimiter.for_api_key('a')
+        assert RateLimiter.for_api_key('a') is not RateLimiter.for_api_key('b')
+
+    def test_learn_from_error(self):
+        limiter = RateLimiter()
+        limiter.learn('lead', error=RATE_LIMITED['error'])
+
+        assert 0 < limiter.retry_after('lead') <= 0.2
+        assert limiter.retry_after('activity') == 0
+        assert 0 < limiter.reserve('lead') <= 0.2
+
+    def test_learn_from_retry_after(self):
+        limiter = RateLimiter()
+        limiter.learn('lead', headers={'Retry-After': '3'}, error={})
+        assert 2.5 < limiter.retry_after('lead') <= 3
+
+    def test_learn_remaining_from_headers(self):
+        limiter = RateLimiter()
+        limiter.learn('lead', headers={'RateLimit': 'limit=40, remaining=0, reset=0.3'})
+        assert 0 < limiter.reserve('lead') <= 0.3
+
+    def test_acquire_respects_deadline(self, monkeypatch):
+        sleeps = []
+        monkeypatch.setattr('closeio.ratelimit.sleep', sleeps.append)
+
+        limiter = RateLimiter()
+        limiter.learn('lead', headers={'Retry-After': '30'}, error={})
+        limiter.acquire('lead', deadline=0)
+
+        assert sleeps == []
+
+
+class TestCloseIORateLimit:
+    def test_retries_rate_limited_request(self, fake_api):
+        responses = [(429, RATE_LIMITED), (200, {'id': 'lead_1'})]
+        fake_api.add('GET', 'lead/lead_1/', lambda query, body: responses.pop(0))
+
+        client = CloseIO('key', base_url=fake_api.url)
+
+        assert client.get_lead('lead_1') == {'id': 'lead_1'}
+        assert len(fake_api.requests) == 2
+
+    def test_raises_after_deadline(self, fake_api):
+        fake_api.add('GET', 'lead/lead_1/', RATE_LIMITED, status=429)
+
+        client = CloseIO('key', rate_limit_deadline=0, base_url=fake_api.url)
+
+        with pytest.raises(RateLimitError) as exc:
+            client.get_lead('lead_1')
+
+        assert exc.value.rate_limit == 40
+        assert len(fake_api.requests) == 1
+
+    def test_disabled(self, fake_api):
+        fake_api.add('GET', 'lead/lead_1/', RATE_LIMITED, status=429)
+
+        client = CloseIO('key', rate_limit_deadline=None, base_url=fake_api.url)
+
+        with pytest.raises(RateLimitError):
+            client.get_lead('lead_1')
+
+        assert len(fake_api.requests) == 1
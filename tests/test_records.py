@@ -0,0 +1,121 @@
+import copy
+import datetime
+import pickle
+
+import pytest
+
+from closeio import records
+from closeio.utils import Item, convert, parse, parse_response
+
+LEAD = {
+    "id": "lead_IIDHIStmFcFQZZP0BRe99V1MCoXWz2PGCm6EDmR9v2O",
+    "name": "Wayne Enterprises (Sample Lead)",
+    "status_label": "Potential",
+    "date_created": "2013-02-01T00:54:51.333000+00:00",
+    "custom": {
+        "date_of_death": "1988-11-19",
+        "foo": "bar"
+    },
+    "contacts": [
+        {
+            "name": "Bruce Wayne",
+            "date_updated": "2013-02-06T20:53:01.954000+00:00",
+            "emails": [
+                {
+                    "type": "office",
+                    "email": "thedarkknight@close.io"
+                }
+            ],
+        }
+    ],
+    "opportunities": [
+        {
+            "status_type": "active",
+            "value": 50000,
+            "date_won": None,
+        }
+    ],
+    "tasks": [],
+}
+
+
+class TestRecords:
+    def test_lead(self):
+        lead = parse(LEAD, record=records.Lead)
+
+        assert isinstance(lead, records.Lead)
+        assert lead == parse(LEAD)
+        assert parse(LEAD) == lead
+        assert convert(lead) == LEAD
+
+        assert lead.name == lead['name'] == 'Wayne Enterprises (Sample Lead)'
+        assert lead.date_created == datetime.datetime(
+            2013, 2, 1, 0, 54, 51, 333000, tzinfo=datetime.timezone.utc)
+        assert isinstance(lead.contacts[0], records.Contact)
+        assert isinstance(lead.opportunities[0], records.Opportunity)
+        assert lead.contacts[0].emails[0].email == 'thedarkknight@close.io'
+        assert isinstance(lead.custom, Item)
+
+    def test_overflow(self):
+        lead = records.Lead(id='lead_1', status_label='Potential')
+        lead['custom.cf_1'] = 'foo'
+        lead.something = 'bar'
+
+        assert lead._extra == {'custom.cf_1': 'foo', 'something': 'bar'}
+        assert lead.something == 'bar'
+        assert dict(lead) == {
+            'id': 'lead_1',
+            'status_label': 'Potential',
+            'custom.cf_1': 'foo',
+            'something': 'bar',
+        }
+        assert len(lead) == 4
+        assert 'name' not in lead
+        assert lead.get('name') is None
+
+        with pytest.raises(AttributeError):
+            lead.name
+        with pytest.raises(KeyError):
+            lead['name']
+
+        del lead['custom.cf_1']
+        del lead.id
+        assert dict(lead) == {'status_label': 'Potential', 'something': 'bar'}
+
+    def test_no_dict(self):
+        lead = records.Lead(id='lead_1')
+        assert not hasattr(lead, '__dict__')
+
+    def test_activity_type(self):
+        activities = parse([
+            {'_type': 'Note', 'note': 'foo'},
+            {'_type': 'Call', 'duration': 12},
+            {'_type': 'Unknown', 'foo': 'bar'},
+        ], record=records.Activity)
+
+        assert [type(a) for a in activities] == [
+            records.Note,
+            records.Call,
+            records.Activity,
+        ]
+        assert activities[1].duration == 12
+
+    def test_pickle(self):
+        lead = parse(LEAD, record=records.Lead)
+        assert pickle.loads(pickle.dumps(lead)) == lead
+        assert copy.deepcopy(lead) == lead
+
+    def test_parse_response(self):
+        class Client(object):
+            _record_types = records.RECORD_TYPES
+
+            @parse_response
+            def get_leads(self):
+                return (lead for lead in [LEAD])
+
+            @parse_response
+            def me(self):
+                return LEAD
+
+        assert isinstance(next(Client().get_leads()), records.Lead)
+        assert isinstance(Client().me(), Item)
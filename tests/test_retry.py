@@ -0,0 +1,204 @@
+import socket
+import threading
+
+import pytest
+import urllib3
+
+from closeio import CloseIO
+from closeio.exceptions import CloseIOError
+from closeio.retry import IDEMPOTENT_METHODS, RetryPolicy
+
+
+@pytest.fixture
+def flaky_api(fake_api):
+    """
+    ``fake_api`` with a ``flaky(method, path, failures, body)`` helper.
+
+    The registered route answers with ``failures`` 503 responses before
+    returning ``body``.
+    """
+    def flaky(method, path, failures, body, status=503, headers=None):
+        responses = [(status, {'error': 'Service unavailable'}, headers or {})] * failures
+
+        def respond(query, request_body):
+            if responses:
+                return responses.pop(0)
+            return 200, body
+
+        fake_api.add(method, path, respond)
+
+    fake_api.flaky = flaky
+    return fake_api
+
+
+def client(api, **policy):
+    policy.setdefault('backoff', 0)
+    return CloseIO('key', retry_policy=RetryPolicy(**policy), base_url=api.url)
+
+
+class TestRetryPolicy:
+    def test_delay_grows_exponentially_up_to_cap(self):
+        policy = RetryPolicy(backoff=0.5, cap=3, jitter=False)
+        assert [policy.delay(retry) for retry in range(1, 6)] == [0.5, 1, 2, 3, 3]
+
+    def test_jitter(self):
+        policy = RetryPolicy(backoff=1, cap=30)
+        delays = [policy.delay(4) for _ in range(100)]
+        assert all(0 <= delay <= 8 for delay in delays)
+        assert len(set(delays)) > 1
+
+    def test_retry_after(self):
+        policy = RetryPolicy(backoff=0.5, cap=10, jitter=False)
+        assert policy.delay(1, {'Retry-After': '4'}) == 4
+        assert policy.delay(1, {'Retry-After': '60'}) == 10
+
+    def test_methods(self):
+        policy = RetryPolicy()
+        assert policy.can_retry('get', 0)
+        assert policy.can_retry('DELETE', 0)
+        assert not policy.can_retry('POST', 0)
+        assert not policy.can_retry('GET', 3)
+
+        policy = RetryPolicy(methods=IDEMPOTENT_METHODS | {'POST', 'PUT'})
+        assert policy.can_retry('POST', 0)
+
+    def test_wait_sleeps(self, monkeypatch):
+        sleeps = []
+        monkeypatch.setattr('closeio.retry.sleep', sleeps.append)
+
+        assert RetryPolicy(backoff=2, jitter=False).wait(2) == 4
+        assert sleeps == [4]
+
+
+class TestCloseIORetry:
+    def test_get_retried(self, flaky_api):
+        flaky_api.flaky('GET', 'lead/lead_1/', 2, {'id': 'lead_1'})
+        api = client(flaky_api)
+
+        assert api.get_lead('lead_1') == {'id': 'lead_1'}
+        assert len(flaky_api.requests) == 3
+        assert api.retry_policy.stats == {
+            'requests': 1,
+            'retried_requests': 1,
+            'exhausted': 0,
+            'retries': 2,
+            'backoff_seconds': 0,
+        }
+
+    def test_delete_retried(self, flaky_api):
+        flaky_api.flaky('DELETE', 'task/task_1/', 1, None)
+
+        assert client(flaky_api).delete_task('task_1') is True
+        assert len(flaky_api.requests) == 2
+
+    def test_post_not_retried_by_default(self, flaky_api):
+        flaky_api.flaky('POST', 'lead/', 1, {'id': 'lead_1'})
+
+        with pytest.raises(CloseIOError):
+            client(flaky_api).create_lead({'name': 'Wayne Enterprises'})
+
+        assert len(flaky_api.requests) == 1
+
+    def test_post_opt_in(self, flaky_api):
+        flaky_api.flaky('POST', 'lead/', 1, {'id': 'lead_1'})
+        api = client(flaky_api, methods=IDEMPOTENT_METHODS | {'POST'})
+
+        assert api.create_lead({'name': 'Wayne Enterprises'}) == {'id': 'lead_1'}
+        assert len(flaky_api.requests) == 2
+
+    def test_exhausted(self, flaky_api):
+        flaky_api.flaky('GET', 'lead/lead_1/', 5, {'id': 'lead_1'})
+        api = client(flaky_api, total=2)
+
+        with pytest.raises(CloseIOError):
+            api.get_lead('lead_1')
+
+        assert len(flaky_api.requests) == 3
+        assert api.retry_policy.stats['exhausted'] == 1
+
+    def test_other_status_not_retried(self, flaky_api):
+        flaky_api.flaky('GET', 'lead/lead_1/', 1, {'id': 'lead_1'}, status=404)
+
+        with pytest.raises(CloseIOError):
+            client(flaky_api).get_lead('lead_1')
+
+        assert len(flaky_api.requests) == 1
+
+    def test_connection_error(self, monkeypatch):
+        waits = []
+        monkeypatch.setattr('closeio.retry.sleep', waits.append)
+        api = CloseIO('key', retry_policy=RetryPolicy(jitter=False),
+                      base_url='http://127.0.0.1:1/api/v1/')
+
+        with pytest.raises(CloseIOError):
+            api.get_lead('lead_1')
+
+        assert waits == [0.5, 1, 2]
+        assert api.retry_policy.stats['exhausted'] == 1
+
+    def test_connection_attempts_counted(self, monkeypatch):
+        monkeypatch.setattr('closeio.retry.sleep', lambda seconds: None)
+        create_connection = urllib3.util.connection.create_connection
+        attempts = []
+
+        def connect(*args, **kwargs):
+            attempts.append(args)
+            return create_connection(*args, **kwargs)
+
+        monkeypatch.setattr('urllib3.util.connection.create_connection', connect)
+        api = CloseIO('key', retry_policy=RetryPolicy(total=2),
+                      base_url='http://127.0.0.1:1/api/v1/')
+
+        with pytest.raises(CloseIOError):
+            api.get_lead('lead_1')
+
+        # urllib3 does not retry underneath the policy
+        assert len(attempts) == 3
+        assert api.retry_policy.stats['retries'] == 2
+
+    def test_max_retries(self):
+        assert CloseIO('key', max_retries=1).retry_policy.total == 1
+        assert CloseIO('key').retry_policy.total == RetryPolicy().total
+
+    def test_post_connect_error_retried(self, monkeypatch):
+        waits = []
+        monkeypatch.setattr('closeio.retry.sleep', waits.append)
+        api = CloseIO('key', retry_policy=RetryPolicy(total=2, jitter=False),
+                      base_url='http://127.0.0.1:1/api/v1/')
+
+        with pytest.raises(CloseIOError):
+            api.create_lead({'name': 'Wayne Enterprises'})
+
+        # never sent, so retried although POST is not idempotent
+        assert waits == [0.5, 1]
+        assert api.retry_policy.stats['exhausted'] == 1
+
+    def test_post_read_error_not_retried(self, monkeypatch):
+        monkeypatch.setattr('closeio.retry.sleep', lambda seconds: None)
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen(5)
+        accepted = []
+
+        def hang_up():
+            while True:
+                try:
+                    connection, _ = server.accept()
+                except OSError:
+                    return
+                accepted.append(connection)
+                connection.recv(65536)
+                connection.close()
+
+        threading.Thread(target=hang_up, daemon=True).start()
+        api = CloseIO('key', retry_policy=RetryPolicy(total=2),
+                      base_url='http://127.0.0.1:{}/api/v1/'.format(server.getsockname()[1]))
+
+        try:
+            with pytest.raises(CloseIOError):
+                api.create_lead({'name': 'Wayne Enterprises'})
+        finally:
+            server.close()
+
+        assert len(accepted) == 1
+        assert api.retry_policy.stats['retries'] == 0
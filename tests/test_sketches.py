@@ -0,0 +1,84 @@
+import datetime
+
+import pytest
+
+from closeio import CloseIO
+from closeio.exceptions import CloseIOError
+from closeio.sketches import HyperLogLog, SpaceSaving
+
+
+class TestHyperLogLog:
+    @pytest.mark.parametrize('n', [0, 10, 1000, 50000])
+    def test_count(self, n):
+        sketch = HyperLogLog()
+        sketch.update('value {}'.format(i) for i in range(n))
+        sketch.update('value {}'.format(i) for i in range(n))
+
+        assert sketch.count() == pytest.approx(n, rel=0.03, abs=1)
+
+    def test_merge(self):
+        first, second = HyperLogLog(10), HyperLogLog(10)
+        first.update(range(0, 600))
+        second.update(range(400, 1000))
+        first.merge(second)
+
+        assert first.count() == pytest.approx(1000, rel=0.1)
+
+        with pytest.raises(CloseIOError):
+            first.merge(HyperLogLog(12))
+
+    def test_precision(self):
+        with pytest.raises(CloseIOError):
+            HyperLogLog(20)
+
+
+class TestSpaceSaving:
+    def test_exact(self):
+        sketch = SpaceSaving(10)
+        sketch.update('aababcabcd')
+
+        assert sketch.top() == [('a', 4), ('b', 3), ('c', 2), ('d', 1)]
+        assert sketch.top(2) == [('a', 4), ('b', 3)]
+        assert sketch.error('a') == 0
+
+    def test_heavy_hitters(self):
+        sketch = SpaceSaving(5)
+        for i in range(1000):
+            sketch.add('frequent' if i % 3 == 0 else 'rare {}'.format(i))
+
+        value, count = sketch.top(1)[0]
+        assert value == 'frequent'
+        assert 334 <= count <= 334 + sketch.error('frequent')
+        assert sketch.total == 1000
+        assert len(sketch.counts) == 5
+
+
+class TestCustomFieldValues:
+    @pytest.fixture
+    def client(self, fake_api):
+        values = ['Web', 'Referral', 'Web', ['Web', 'Fair'], '2020-01-02T00:00:00+00:00']
+
+        def leads(query, body):
+            skip = int(query['_skip'][0])
+            data = [{'custom.Source': value} for value in values[skip:skip + 100]]
+            return 200, {'has_more': False, 'data': data}
+
+        fake_api.add('GET', 'lead/', leads)
+        return CloseIO('key', base_url=fake_api.url)
+
+    def test_projection(self, fake_api, client):
+        values = client.custom_field_values('Source')
+
+        _, _, query, _ = fake_api.requests[0]
+        assert query['query'] == ['custom.Source:*']
+        assert query['_fields'] == ['custom.Source']
+        assert sorted(values, key=str) == [
+            datetime.datetime(2020, 1, 2, tzinfo=datetime.timezone.utc),
+            'Fair', 'Referral', 'Web',
+        ]
+
+    def test_cardinality(self, client):
+        assert client.custom_field_cardinality('Source') == 4
+
+    def test_top(self, client):
+        assert client.top_custom_field_values('Source', n=2) == [('Web', 3), ('Referral', 1)]
@@ -0,0 +1,76 @@
+import pytest
+import requests
+from slumber.exceptions import (
+    HttpClientError, HttpNotFoundError, HttpServerError
+)
+
+from closeio import CloseIO
+from closeio.exceptions import CloseIOError
+from closeio.transport import Endpoint
+
+
+@pytest.fixture
+def api(fake_api):
+    return Endpoint(requests.Session(), fake_api.url)
+
+
+def test_urls():
+    api = Endpoint(None, 'https://example.com/api/v1')
+
+    assert api.url() == 'https://example.com/api/v1/'
+    assert api.status.lead.url() == 'https://example.com/api/v1/status/lead/'
+    assert api.lead('lead_1').url() == 'https://example.com/api/v1/lead/lead_1/'
+    assert api.status is api.status
+    assert api.lead('lead_1')._settings is api._settings
+    with pytest.raises(AttributeError):
+        api._private
+
+
+def test_requests(fake_api, api):
+    fake_api.add('GET', 'lead/', lambda query, body: (200, {'query': query}))
+    fake_api.add('PUT', 'lead/lead_1/', lambda query, body: (200, body))
+    fake_api.add('DELETE', 'lead/lead_1/', status=204)
+
+    assert api.lead.get(query='name:Wayne', _limit=None) == {'query': {'query': ['name:Wayne']}}
+    assert api.lead('lead_1').put({'name': 'Wayne'}) == {'name': 'Wayne'}
+    assert api.lead('lead_1').delete() is True
+
+    _, _, _, body = fake_api.requests[1]
+    assert body == {'name': 'Wayne'}
+    assert fake_api.request_headers[1]['content-type'] == 'application/json'
+
+
+def test_decode(fake_api, api):
+    fake_api.add('GET', 'empty/', status=204)
+    fake_api.add('GET', 'text/', b'plain', headers={'Content-Type': 'text/plain'})
+    fake_api.add('GET', 'broken/', b'{"id": ')
+
+    assert api.empty.get() is None
+    assert api.text.get() == b'plain'
+    assert api.broken.get() == b'{"id": '
+
+
+@pytest.mark.parametrize('status, exception_class', [
+    (400, HttpClientError),
+    (404, HttpNotFoundError),
+    (500, HttpServerError),
+])
+def test_errors(fake_api, api, status, exception_class):
+    fake_api.add('GET', 'lead/lead_1/', {'error': 'Nope'}, status=status)
+
+    with pytest.raises(exception_class) as excinfo:
+        api.lead('lead_1').get()
+
+    assert excinfo.value.response.status_code == status
+    assert excinfo.value.content == b'{"error": "Nope"}'
+
+
+def test_client_errors(fake_api):
+    fake_api.add('GET', 'lead/lead_1/', {'error': 'Unknown lead'}, status=404)
+    client = CloseIO('key', base_url=fake_api.url, retry_policy=None)
+
+    with pytest.raises(CloseIOError) as excinfo:
+        client.get_lead('lead_1')
+
+    assert excinfo.value.args[0] == 'Unknown lead'
+    assert isinstance(excinfo.value.args[1], HttpNotFoundError)
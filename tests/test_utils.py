@@ -1,4 +1,27 @@
-from closeio.utils import paginate_via_cursor
+import copy
+import datetime
+import json
+import logging
+import pickle
+import threading
+import time
+
+import pytest
+
+from closeio import utils
+from closeio.exceptions import CloseIOError, RateLimitError
+from closeio.utils import (
+    LazyItem, convert, custom_field_values, paginate_concurrently,
+    paginate_via_cursor, paginate_via_cursor_read_ahead, parse, parse_response,
+    read_ahead
+)
+
+
+def test_custom_field_values():
+    assert custom_field_values({'custom.Source': 'Web'}, 'Source') == ['Web']
+    assert custom_field_values({'custom': {'Source': ['Web', None]}}, 'Source') == ['Web']
+    assert custom_field_values({'custom': {}}, 'Source') == []
+    assert custom_field_values({}, 'Source') == []
 
 
 def test_paginate_via_cursor():
@@ -14,3 +37,234 @@ def test_paginate_via_cursor():
 
     response = paginate_via_cursor(test_function)
     assert list(response) == [{'id': 1}, {'id': 2}, {'id': 3}, {'id': 4}, {'id': 5}, {'id': 6}]
+
+
+def test_paginate_via_cursor_limit():
+    limits = []
+
+    def test_function(**kwargs):
+        limits.append(kwargs['_limit'])
+        return {'cursor_next': '', 'data': []}
+
+    list(paginate_via_cursor(test_function))
+    list(paginate_via_cursor(test_function, _limit=100))
+    assert limits == [50, 100]
+
+    with pytest.raises(CloseIOError):
+        list(paginate_via_cursor(test_function, _limit=101))
+
+
+class TestReadAhead:
+    def test_paginate_via_cursor_read_ahead(self):
+        responses = {
+            '': {'cursor_next': '11111', 'data': [{'id': 1}, {'id': 2}]},
+            '11111': {'cursor_next': '22222', 'data': [{'id': 3}, {'id': 4}]},
+            '22222': {'cursor_next': '', 'data': [{'id': 5}, {'id': 6}]}
+        }
+
+        def test_function(**kwargs):
+            return responses[kwargs['_cursor']]
+
+        response = paginate_via_cursor_read_ahead(test_function, 1)
+        assert list(response) == [{'id': i} for i in range(1, 7)]
+
+    def test_error_position(self):
+        def pages():
+            yield 1
+            yield 2
+            raise CloseIOError('boom')
+
+        items = read_ahead(pages(), 5)
+        assert next(items) == 1
+        assert next(items) == 2
+        with pytest.raises(CloseIOError):
+            next(items)
+
+    def test_bounded(self):
+        produced = []
+
+        def pages():
+            for i in range(100):
+                produced.append(i)
+                yield i
+
+        items = read_ahead(pages(), 2)
+        assert next(items) == 0
+
+        for _ in range(50):
+            if len(produced) >= 4:
+                break
+            time.sleep(0.01)
+        time.sleep(0.05)
+
+        # one consumed, two queued, one waiting to be queued
+        assert len(produced) == 4
+        items.close()
+
+
+class TestPaginateConcurrently:
+    def leads(self, total, calls, rate_limited=()):
+        rate_limited = set(rate_limited)
+
+        def get(**kwargs):
+            skip, limit = kwargs['_skip'], kwargs['_limit']
+            calls.append(skip)
+            if skip in rate_limited:
+                rate_limited.remove(skip)
+                raise RateLimitError('slow down', 0, 40, 1, 'key')
+
+            return {
+                'has_more': skip + limit < total,
+                'data': [{'id': i} for i in range(skip, min(skip + limit, total))],
+            }
+
+        return get
+
+    def test_order(self):
+        calls = []
+        items = list(paginate_concurrently(self.leads(1050, calls), 4))
+
+        assert items == [{'id': i} for i in range(1050)]
+        # pages after the last one may already be in flight, at most a window's worth
+        assert set(range(0, 1100, 100)) <= set(calls)
+        assert max(calls) < 1100 + 4 * 100
+
+    def test_single_page(self):
+        calls = []
+        assert len(list(paginate_concurrently(self.leads(10, calls), 4))) == 10
+        assert calls == [0]
+
+    def test_total_results(self):
+        calls = []
+
+        def get(**kwargs):
+            page = self.leads(250, calls)(**kwargs)
+            page['total_results'] = 250
+            return page
+
+        assert len(list(paginate_concurrently(get, 8))) == 250
+        assert sorted(calls) == [0, 100, 200]
+
+    def test_rate_limit_shrinks_window(self, monkeypatch):
+        monkeypatch.setattr(utils, 'sleep', lambda seconds: None)
+        calls = []
+        items = list(paginate_concurrently(self.leads(1000, calls, rate_limited=[300]), 4))
+
+        assert items == [{'id': i} for i in range(1000)]
+        assert calls.count(300) == 2
+
+    def test_rate_limit_shrinks_window_once(self, monkeypatch, caplog):
+        sleeps = []
+        monkeypatch.setattr(utils, 'sleep', sleeps.append)
+        caplog.set_level(logging.INFO, logger='closeio.utils')
+        calls = []
+        get = self.leads(1000, calls, rate_limited=[100, 200, 300, 400])
+
+        # all pages of the first window are rate limited before any is consumed
+        barrier = threading.Barrier(4)
+
+        def leads(**kwargs):
+            if kwargs['_skip'] in (100, 200, 300, 400) and calls.count(kwargs['_skip']) == 0:
+                barrier.wait(timeout=5)
+            return get(**kwargs)
+
+        items = list(paginate_concurrently(leads, 4))
+
+        assert items == [{'id': i} for i in range(1000)]
+        assert sleeps == [0]
+        assert [record.getMessage() for record in caplog.records] == [
+            'close.io rate limit hit, reducing pagination window to 2']
+
+    def test_rate_limit_raised_at_window_one(self, monkeypatch):
+        monkeypatch.setattr(utils, 'sleep', lambda seconds: None)
+
+        def get(**kwargs):
+            if kwargs['_skip'] == 100:
+                raise RateLimitError('slow down', 0, 40, 1, 'key')
+            return {'has_more': True, 'data': []}
+
+        with pytest.raises(RateLimitError):
+            list(paginate_concurrently(get, 2))
+
+
+class TestLazyItem:
+    RESPONSE = {
+        'id': 'lead_1',
+        'date_created': '2013-02-01T00:54:51.333000+00:00',
+        'custom': {'date_of_death': '1988-11-19'},
+        'contacts': [{'date_updated': '2013-02-06T20:53:01.954000+00:00'}],
+    }
+
+    def test_decodes_on_access(self):
+        item = parse(self.RESPONSE, lazy=True)
+
+        assert isinstance(item, LazyItem)
+        assert dict.__getitem__(item, 'date_created') == '2013-02-01T00:54:51.333000+00:00'
+        assert item.date_created == datetime.datetime(
+            2013, 2, 1, 0, 54, 51, 333000, tzinfo=datetime.timezone.utc)
+        assert isinstance(dict.__getitem__(item, 'date_created'), datetime.datetime)
+        assert dict.__getitem__(item, 'custom') == {'date_of_death': '1988-11-19'}
+        assert item['custom']['date_of_death'] == datetime.date(1988, 11, 19)
+        assert item.get('contacts')[0].date_updated.year == 2013
+        assert item.get('missing', 1) == 1
+
+    def test_decoded_value_is_cached(self):
+        item = parse(self.RESPONSE, lazy=True)
+        assert item['custom'] is item['custom']
+
+    def test_same_as_eager(self):
+        eager = parse(self.RESPONSE)
+        lazy = parse(self.RESPONSE, lazy=True)
+
+        assert lazy == eager
+        assert eager == lazy
+        assert not lazy != eager
+        assert parse(self.RESPONSE, lazy=True) == parse(self.RESPONSE, lazy=True)
+        assert dict(parse(self.RESPONSE, lazy=True)) == eager
+        assert json.dumps(convert(lazy)) == json.dumps(convert(eager))
+        assert sorted(lazy) == sorted(eager)
+        assert repr(lazy) == repr(eager)
+
+    def test_update_same_as_eager(self):
+        for item in (parse(self.RESPONSE), parse(self.RESPONSE, lazy=True)):
+            item.update({'date_created': '2021-01-01'}, id='lead_2')
+            item.update([('custom', None)], contacts=[])
+
+            assert item['date_created'] == '2021-01-01'
+            assert item == dict(self.RESPONSE, date_created='2021-01-01', id='lead_2',
+                                custom=None, contacts=[])
+
+        lazy = parse(self.RESPONSE, lazy=True)
+        lazy.update(parse(self.RESPONSE, lazy=True))
+        assert lazy == parse(self.RESPONSE)
+
+        lazy = parse(self.RESPONSE, lazy=True)
+        lazy.clear()
+        assert lazy == {}
+
+    def test_attributes(self):
+        item = parse(self.RESPONSE, lazy=True)
+        item.name = 'Wayne'
+        assert item['name'] == 'Wayne'
+        del item.name
+        assert 'name' not in item
+
+        with pytest.raises(AttributeError):
+            item.name
+
+    def test_pickle(self):
+        item = parse(self.RESPONSE, lazy=True)
+        assert pickle.loads(pickle.dumps(item)) == parse(self.RESPONSE)
+        assert copy.deepcopy(item) == parse(self.RESPONSE)
+
+    def test_parse_response(self):
+        class Client(object):
+            def __init__(self, lazy):
+                self._lazy = lazy
+
+            @parse_response
+            def get_lead(self):
+                return TestLazyItem.RESPONSE
+
+        assert isinstance(Client(lazy=True).get_lead(), LazyItem)
+        assert not isinstance(Client(lazy=False).get_lead(), LazyItem)